@@ -73,7 +73,11 @@ else:
 '''
 
 
-import bpy
+try:
+    import bpy
+except ImportError:
+    # Outside Blender only the bpy-free core package is usable
+    bpy = None
 
 
 def npt_register():
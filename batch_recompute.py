@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""
+Headless batch driver for recomputing spine volumes on all dendrites.
+
+Run from a shell to shard the dendrites of a .blend file across N
+background Blender processes, each with Neuropil Tools enabled:
+
+    python batch_recompute.py -n 8 -b /path/to/blender volume.blend
+
+Every worker writes one result file per dendrite into the output directory
+and appends the dendrite name to a resume file once its result is safely
+on disk, so rerunning the same command after a crash only processes the
+dendrites that are left.  When all workers have finished, the results are
+merged back into the psd_list of each dendrite, the .blend file is saved
+and the report is written.
+
+"""
+
+# python imports
+
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import traceback
+
+
+RESUME_FILE_NAME = 'recompute_resume.txt'
+
+
+def write_atomic(file_name, text):
+    """ Write text to file_name so readers never see a partial file """
+    tmp_file_name = file_name + '.tmp'
+    with open(tmp_file_name, 'w') as tmp_file:
+        tmp_file.write(text)
+        tmp_file.flush()
+        os.fsync(tmp_file.fileno())
+    os.replace(tmp_file_name, file_name)
+
+
+def result_file_name(out_dir, dend):
+    return os.path.join(out_dir, dend + '.json')
+
+
+def read_resume(out_dir):
+    """ Return the set of dendrites already finished in out_dir """
+    resume_file_name = os.path.join(out_dir, RESUME_FILE_NAME)
+    if not os.path.exists(resume_file_name):
+        return set()
+    with open(resume_file_name) as resume_file:
+        done = set(line.strip() for line in resume_file if line.strip())
+    # Only trust entries whose result file actually made it to disk
+    return set(d for d in done if os.path.exists(result_file_name(out_dir, d)))
+
+
+def mark_done(out_dir, dend):
+    with open(os.path.join(out_dir, RESUME_FILE_NAME), 'a') as resume_file:
+        resume_file.write(dend + '\n')
+        resume_file.flush()
+        os.fsync(resume_file.fileno())
+
+
+# Worker side, runs inside a background Blender with the add-on enabled:
+
+def run_worker(index, count, out_dir, force=False):
+    import bpy
+
+    context = bpy.context
+    scn = context.scene
+    volume_analyzer = scn.volume_analyzer
+
+    dend_names = volume_analyzer.get_dendrite_names(context)
+    done = read_resume(out_dir)
+    shard = [dend for dend in dend_names[index::count] if dend not in done]
+    print('Worker %d/%d: %d dendrites to process' % (index, count, len(shard)))
+
+    for dend in shard:
+        t_start = time.time()
+        obj = scn.objects[dend]
+        # Shell objects only live in this worker's copy of the scene
+        obj.spine_head_ana.make_shell_head_opt = False
+        obj.spine_head_ana.make_shell_spine_opt = False
+
+        report_file = io.StringIO()
+        try:
+            volume_analyzer.recompute_volumes(context, [dend], report_file, force)
+        except Exception:
+            print('Worker %d: failed on %s' % (index, dend))
+            traceback.print_exc()
+            continue
+
+        mesh = obj.data
+        reg_list = obj.mcell.regions.region_list
+        psd_list = obj.spine_head_ana.psd_list
+        regions = {}
+        for psd in psd_list:
+            for reg_name in (psd.head_name, psd.spine_name, psd.neck_name):
+                reg = reg_list.get(reg_name) if reg_name else None
+                if reg != None:
+                    regions[reg_name] = sorted(reg.get_region_faces(mesh))
+
+        result = {
+            'dendrite': dend,
+            'report': report_file.getvalue(),
+            'psds': [psd.to_dict() for psd in psd_list],
+            'regions': regions,
+            'time': time.time() - t_start,
+        }
+        write_atomic(result_file_name(out_dir, dend), json.dumps(result))
+        mark_done(out_dir, dend)
+        print('Worker %d: finished %s in %.1f s' % (index, dend, result['time']))
+
+
+def run_merge(out_dir, report_file_name):
+    import bpy
+
+    context = bpy.context
+    scn = context.scene
+
+    report = []
+    for dend in scn.volume_analyzer.get_dendrite_names(context):
+        file_name = result_file_name(out_dir, dend)
+        if not os.path.exists(file_name):
+            report.append('***** No results for %s\n' % (dend))
+            continue
+        with open(file_name) as result_file:
+            result = json.load(result_file)
+
+        obj = scn.objects[dend]
+        bpy.context.view_layer.objects.active = obj
+        mesh = obj.data
+        regions = obj.mcell.regions
+        for reg_name, faces in result['regions'].items():
+            if regions.region_list.get(reg_name) == None:
+                regions.add_region_by_name(context, reg_name)
+            regions.region_list[reg_name].set_region_faces(mesh, set(faces))
+
+        psd_list = obj.spine_head_ana.psd_list
+        for psd_data in result['psds']:
+            psd = psd_list.get(psd_data['name'])
+            if psd == None:
+                psd = psd_list.add()
+            psd.from_dict(psd_data)
+
+        report.append(result['report'])
+
+    bpy.ops.wm.save_mainfile()
+    write_atomic(report_file_name, ''.join(report))
+
+
+# Driver side, runs in a plain Python interpreter:
+
+def run_driver(args):
+    blend_file = os.path.abspath(args.blend_file)
+    out_dir = args.out_dir
+    if out_dir == None:
+        out_dir = os.path.splitext(blend_file)[0] + '_recompute'
+    out_dir = os.path.abspath(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    if args.restart:
+        resume_file_name = os.path.join(out_dir, RESUME_FILE_NAME)
+        if os.path.exists(resume_file_name):
+            os.remove(resume_file_name)
+
+    script = os.path.abspath(__file__)
+    blender_cmd = [args.blender, '-b', blend_file, '--python', script, '--']
+
+    workers = []
+    for i in range(args.workers):
+        log_file = open(os.path.join(out_dir, 'worker_%d.log' % (i)), 'a')
+        cmd = blender_cmd + ['--worker', str(i), str(args.workers), '-o', out_dir]
+        if args.force:
+            cmd.append('--force')
+        print('Starting worker %d: %s' % (i, ' '.join(cmd)))
+        proc = subprocess.Popen(cmd, stdout=log_file, stderr=subprocess.STDOUT)
+        workers.append((proc, log_file))
+
+    n_failed = 0
+    for i, (proc, log_file) in enumerate(workers):
+        status = proc.wait()
+        log_file.close()
+        if status != 0:
+            n_failed += 1
+            print('Worker %d exited with status %d' % (i, status))
+
+    print('Merging results from %s' % (out_dir))
+    cmd = blender_cmd + ['--merge', '-o', out_dir, '-r', os.path.abspath(args.report)]
+    subprocess.check_call(cmd)
+
+    return(n_failed)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description='Recompute spine volumes of all dendrites in a .blend file')
+    parser.add_argument('blend_file', nargs='?',
+                        help='.blend file to process')
+    parser.add_argument('-n', '--workers', type=int, default=os.cpu_count(),
+                        help='number of background Blender workers')
+    parser.add_argument('-b', '--blender', default='blender',
+                        help='Blender executable')
+    parser.add_argument('-o', '--out_dir', default=None,
+                        help='directory for per-dendrite results and resume file')
+    parser.add_argument('-r', '--report', default='spine_data_report.txt',
+                        help='report file written after merging')
+    parser.add_argument('--restart', action='store_true',
+                        help='ignore the resume file and process all dendrites')
+    parser.add_argument('--force', action='store_true',
+                        help='recompute spines whose regions and mesh are unchanged')
+    parser.add_argument('--worker', nargs=2, type=int, metavar=('INDEX', 'COUNT'),
+                        help=argparse.SUPPRESS)
+    parser.add_argument('--merge', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        run_worker(args.worker[0], args.worker[1], args.out_dir, args.force)
+        return(0)
+    if args.merge:
+        run_merge(args.out_dir, args.report)
+        return(0)
+    if args.blend_file == None:
+        parser.error('a .blend file is required')
+    return(run_driver(args))
+
+
+if __name__ == '__main__':
+    # Inside Blender our arguments follow the '--' separator
+    if '--' in sys.argv:
+        argv = sys.argv[sys.argv.index('--')+1:]
+    else:
+        argv = sys.argv[1:]
+    status = main(argv)
+    # Blender ignores the return value of the script, so only exit here
+    #   when running as the driver
+    if '--' not in sys.argv:
+        sys.exit(status)
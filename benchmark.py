@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+
+# <pep8 compliant>
+
+"""
+Benchmark harness for the geometry kernels behind the spine analyzers.
+
+Generates a closed dendrite mesh with spines and optional disjoint pieces,
+tags a PSD, head and neck region on every spine, and times the core
+functions that back compute_region_area, set_n_components,
+calculate_diameter and compute_volume.  Results are written as JSON so
+runs on different machines, Blender/NumPy versions or commits can be
+compared:
+
+    python benchmark.py -s 50 -e 0.02 -o before.json
+    python benchmark.py -s 50 -e 0.02 -o after.json -c before.json
+
+"""
+
+# python imports
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+# Import the core package without Blender, whatever the add-on folder is named
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+core = importlib.import_module(os.path.basename(os.path.dirname(os.path.abspath(__file__))) + '.core')
+
+
+def grid_triangles(n_around, n_along, offset=0):
+    """ Return the triangles of a tube grid of n_around x n_along vertices
+        that wraps around in the first index """
+    i = np.arange(n_around)
+    j = np.arange(n_along - 1)
+    a = (i[:, None]*n_along + j[None, :]).ravel()
+    b = (((i + 1) % n_around)[:, None]*n_along + j[None, :]).ravel()
+    tris = np.concatenate((np.stack((a, b, b + 1), axis=1),
+                           np.stack((a, b + 1, a + 1), axis=1)))
+    return tris + offset
+
+
+def cap_triangles(ring, center, flip):
+    """ Return a triangle fan closing a ring of vertex indices at center """
+    nxt = np.roll(ring, -1)
+    tris = np.stack((np.full(len(ring), center), nxt, ring), axis=1)
+    if flip:
+        tris = tris[:, ::-1]
+    return tris
+
+
+def sphere_mesh(center, radius, n):
+    """ Return (verts, tris) of a closed UV sphere """
+    theta = np.linspace(0.0, 2*np.pi, 2*n, endpoint=False)
+    phi = np.linspace(0.0, np.pi, n + 1)[1:-1]
+    ring = np.stack((np.cos(theta)[:, None]*np.sin(phi)[None, :],
+                     np.sin(theta)[:, None]*np.sin(phi)[None, :],
+                     np.ones(2*n)[:, None]*np.cos(phi)[None, :]), axis=2).reshape(-1, 3)
+    verts = np.concatenate((ring, [[0.0, 0.0, 1.0], [0.0, 0.0, -1.0]]))*radius + center
+    tris = grid_triangles(2*n, n - 1)
+    top = len(ring)
+    tris = np.concatenate((tris[:, ::-1],
+                           cap_triangles(np.arange(2*n)*(n - 1), top, True),
+                           cap_triangles(np.arange(2*n)*(n - 1) + n - 2, top + 1, False)))
+    return verts, tris
+
+
+def torus_mesh(center, major, minor, n):
+    """ Return (verts, tris) of a closed torus around the z axis, with 2*n
+        vertices around the tube and 4*n around the axis """
+    theta = np.linspace(0.0, 2*np.pi, 4*n, endpoint=False)
+    phi = np.linspace(0.0, 2*np.pi, 2*n, endpoint=False)
+    r = major + minor*np.cos(phi)
+    verts = np.stack((np.cos(theta)[:, None]*r[None, :],
+                      np.sin(theta)[:, None]*r[None, :],
+                      np.ones(4*n)[:, None]*minor*np.sin(phi)[None, :]), axis=2).reshape(-1, 3)
+    # Close the tube with the row of triangles joining the last and first
+    #   vertex around it
+    i = np.arange(4*n)
+    a = i*2*n + 2*n - 1
+    b = ((i + 1) % (4*n))*2*n + 2*n - 1
+    seam = np.concatenate((np.stack((a, b, b - 2*n + 1), axis=1),
+                           np.stack((a, b - 2*n + 1, a - 2*n + 1), axis=1)))
+    tris = np.concatenate((grid_triangles(4*n, 2*n), seam))
+    return verts + center, tris
+
+
+def dendrite_mesh(n_spines=20, edge=0.02, n_components=1, length=4.0, radius=0.3,
+                  spine_length=0.8, spine_radius=0.35, seed=0):
+    """ Return (verts, tris, regions) of a closed dendrite along x with dome
+        shaped spines, plus n_components-1 separate spheres.  regions maps
+        'psd', 'head' and 'neck' to one triangle index array per spine """
+    rng = np.random.default_rng(seed)
+    n_around = max(8, int(round(2*np.pi*radius/edge)))
+    n_along = max(4, int(round(length/edge)) + 1)
+    theta = np.linspace(0.0, 2*np.pi, n_around, endpoint=False)
+    x = np.linspace(0.0, length, n_along)
+
+    # Spine bases spread along the shaft at random angles
+    x_c = np.linspace(spine_radius, length - spine_radius, n_spines) if n_spines else np.zeros(0)
+    theta_c = rng.uniform(0.0, 2*np.pi, n_spines)
+    dx = x[None, None, :] - x_c[:, None, None]
+    dtheta = np.angle(np.exp(1j*(theta[None, :, None] - theta_c[:, None, None])))
+    d = np.sqrt(dx**2 + (radius*dtheta)**2)
+    h_s = spine_length*np.sqrt(np.clip(1.0 - (d/spine_radius)**2, 0.0, None))
+    h = h_s.max(axis=0) if n_spines else np.zeros((n_around, n_along))
+    owner = h_s.argmax(axis=0) if n_spines else np.zeros((n_around, n_along), dtype=int)
+
+    r = radius + h
+    verts = np.stack((np.broadcast_to(x, (n_around, n_along)),
+                      r*np.cos(theta)[:, None], r*np.sin(theta)[:, None]), axis=2).reshape(-1, 3)
+    tris = grid_triangles(n_around, n_along)
+    h_tri = h.ravel()[tris].mean(axis=1)
+    owner_tri = owner.ravel()[tris[:, 0]]
+
+    regions = {'psd': [], 'head': [], 'neck': []}
+    bands = {'psd': (0.9, 2.0), 'head': (0.5, 2.0), 'neck': (0.05, 0.5)}
+    for s in range(n_spines):
+        mine = owner_tri == s
+        for name, (lo, hi) in bands.items():
+            regions[name].append(np.nonzero(mine & (h_tri >= lo*spine_length) & (h_tri < hi*spine_length))[0])
+
+    # Close the ends of the shaft
+    n_grid = len(verts)
+    verts = np.concatenate((verts, [[0.0, 0.0, 0.0], [length, 0.0, 0.0]]))
+    ring = np.arange(n_around)*n_along
+    tris = np.concatenate((tris, cap_triangles(ring, n_grid, False),
+                           cap_triangles(ring + n_along - 1, n_grid + 1, True)))
+
+    # Disjoint pieces floating beside the shaft
+    n_sphere = max(4, int(round(np.pi*0.2/edge)))
+    for k in range(n_components - 1):
+        center = np.array([length*(k + 0.5)/(n_components - 1), 0.0, -radius - spine_length - 0.5])
+        s_verts, s_tris = sphere_mesh(center, 0.2, n_sphere)
+        tris = np.concatenate((tris, s_tris + len(verts)))
+        verts = np.concatenate((verts, s_verts))
+
+    return verts, tris, regions
+
+
+def time_call(func, repeat):
+    times = []
+    for i in range(repeat):
+        t_start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t_start)
+    return {'min': min(times), 'median': float(np.median(times)),
+            'mean': float(np.mean(times)), 'repeat': repeat}
+
+
+def run_benchmarks(verts, tris, regions, repeat):
+    tri_face = np.arange(len(tris))
+    n_faces = len(tris)
+
+    def region_area():
+        areas = core.face_areas(verts, tris, tri_face, n_faces)
+        return [core.masked_area(areas, faces) for faces in regions['psd']]
+
+    def n_components():
+        return core.label_components(len(verts), core.unique_edges(tris))
+
+    def diameter():
+        return [core.diameter_stats(core.slice_diameters(verts, tris[faces]))
+                for faces in regions['neck']]
+
+    labels = core.label_components(len(verts), core.unique_edges(tris))[1]
+
+    def boundary_center():
+        return [core.boundary_center(verts, tris[faces]) for faces in regions['head']]
+
+    def head_volume():
+        return [core.hull_volume(verts, tris, tris[faces], labels) for faces in regions['head']]
+
+    def spine_volume():
+        return [core.hull_volume(verts, tris, tris[np.concatenate((h, n))], labels)
+                for h, n in zip(regions['head'], regions['neck'])]
+
+    benchmarks = [
+        ('compute_region_area', region_area),
+        ('set_n_components', n_components),
+        ('calculate_diameter', diameter),
+        ('compute_region_boundary_center', boundary_center),
+        ('compute_volume_head', head_volume),
+        ('compute_volume_spine', spine_volume),
+    ]
+    results = {}
+    for name, func in benchmarks:
+        results[name] = time_call(func, repeat)
+        print('%-32s %10.4f s (min of %d)' % (name, results[name]['min'], repeat))
+    return results
+
+
+def compare(results, baseline_file_name):
+    with open(baseline_file_name) as baseline_file:
+        baseline = json.load(baseline_file)
+    if baseline.get('params') != results['params']:
+        print('Warning: baseline was run with different parameters')
+    print('\n%-32s %10s %10s %8s' % ('benchmark', 'baseline', 'current', 'ratio'))
+    for name, timing in results['results'].items():
+        old = baseline['results'].get(name)
+        if old == None:
+            continue
+        print('%-32s %10.4f %10.4f %8.2f' % (name, old['min'], timing['min'], timing['min']/old['min']))
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description='Time the spine analyzer kernels on synthetic dendrite meshes')
+    parser.add_argument('-s', '--spines', type=int, default=20,
+                        help='number of spines on the dendrite')
+    parser.add_argument('-e', '--edge', type=float, default=0.02,
+                        help='target edge length in microns, sets the triangle density')
+    parser.add_argument('-n', '--components', type=int, default=1,
+                        help='number of disjoint mesh components')
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help='number of timed runs of each benchmark')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed for spine placement')
+    parser.add_argument('-o', '--output', default=None,
+                        help='JSON file to write the results to')
+    parser.add_argument('-c', '--compare', default=None,
+                        help='JSON file of an earlier run to compare against')
+    args = parser.parse_args(argv)
+
+    params = {'spines': args.spines, 'edge': args.edge,
+              'components': args.components, 'seed': args.seed}
+    verts, tris, regions = dendrite_mesh(args.spines, args.edge, args.components, seed=args.seed)
+    print('Mesh: %d vertices, %d triangles, %d spines, %d components\n' %
+          (len(verts), len(tris), args.spines, args.components))
+
+    results = {
+        'params': params,
+        'mesh': {'vertices': len(verts), 'triangles': len(tris)},
+        'environment': {'python': platform.python_version(), 'numpy': np.__version__,
+                        'machine': platform.machine(), 'system': platform.system()},
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': run_benchmarks(verts, tris, regions, args.repeat),
+    }
+    if args.output != None:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+    if args.compare != None:
+        compare(results, args.compare)
+    return(0)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
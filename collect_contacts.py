@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""
+Headless collector of contact measurements from many .blend files.
+
+Run from a shell to read the psd_list of every object in a set of .blend
+files with N background Blender processes and gather them in one table:
+
+    python collect_contacts.py -n 8 -b /path/to/blender -o contacts.csv blends/
+
+Each worker is started with --factory-startup, so no add-ons (GAMer,
+CellBlender or Neuropil Tools itself) are loaded.  It reads the raw ID
+properties stored in the file and fills in defaults and enum names from
+the definition of SpineHeadAnalyzerPSDProperty in spine_head_analyzer.py.
+Progress and the time taken per file are printed as each file finishes,
+and all rows are written to the table (CSV, .npz or Parquet, see
+psd_table) in one go at the end, since .npz and Parquet tables can only be
+appended to by rewriting them.  The per-file results are kept until the
+table is written, so a failed write loses nothing.
+
+"""
+
+# python imports
+
+import argparse
+import ast
+import glob
+import json
+import os
+import sys
+import time
+
+
+ANALYZER_FILE_NAME = 'spine_head_analyzer.py'
+PSD_CLASS_NAME = 'SpineHeadAnalyzerPSDProperty'
+
+
+def psd_schema(file_name):
+    """ Return [(name, kind, default, enum identifiers)] for the properties
+        of SpineHeadAnalyzerPSDProperty, read from its source without
+        importing it """
+    with open(file_name) as f:
+        tree = ast.parse(f.read())
+    cls = [node for node in tree.body
+           if isinstance(node, ast.ClassDef) and node.name == PSD_CLASS_NAME][0]
+    enum_lists = {}
+    schema = []
+    for node in cls.body:
+        if isinstance(node, ast.Assign) and isinstance(node.targets[0], ast.Name):
+            try:
+                enum_lists[node.targets[0].id] = ast.literal_eval(node.value)
+            except ValueError:
+                pass
+        elif isinstance(node, ast.AnnAssign) and isinstance(node.annotation, ast.Call):
+            kind = node.annotation.func.id
+            keywords = {k.arg: k.value for k in node.annotation.keywords}
+            items = None
+            if kind == 'EnumProperty':
+                items = [item[0] for item in enum_lists[keywords['items'].id]]
+                default = ast.literal_eval(keywords['default']) if 'default' in keywords else items[0]
+            elif 'default' in keywords:
+                default = ast.literal_eval(keywords['default'])
+            else:
+                default = {'BoolProperty': False, 'StringProperty': ''}.get(kind, 0.0)
+            if kind == 'FloatVectorProperty':
+                default = list(default)
+            schema.append((node.target.id, kind, default, items))
+    return(schema)
+
+
+def decode_psd(raw, schema):
+    """ Return the record of one PSD from its raw ID property dict """
+    record = {}
+    for name, kind, default, items in schema:
+        value = raw.get(name, default)
+        if kind == 'EnumProperty' and isinstance(value, int):
+            value = items[value] if 0 <= value < len(items) else default
+        elif kind == 'BoolProperty':
+            value = bool(value)
+        elif kind == 'FloatVectorProperty':
+            value = [float(v) for v in value]
+        elif kind == 'FloatProperty':
+            value = float(value)
+        record[name] = value
+    return(record)
+
+
+# Worker side, runs inside a background Blender without add-ons:
+
+def run_worker(result_file_name, analyzer_file_name):
+    import bpy
+
+    t_start = time.time()
+    schema = psd_schema(analyzer_file_name)
+    blend = os.path.basename(bpy.data.filepath)
+    records = []
+    for obj in bpy.data.objects:
+        data = obj.get('spine_head_ana')
+        if data == None:
+            continue
+        for raw in data.to_dict().get('psd_list', []):
+            record = {'blend': blend, 'object': obj.name}
+            record.update(decode_psd(raw, schema))
+            records.append(record)
+
+    result = {'blend': blend, 'records': records, 'time': time.time() - t_start}
+    tmp_file_name = result_file_name + '.tmp'
+    with open(tmp_file_name, 'w') as result_file:
+        json.dump(result, result_file)
+    os.replace(tmp_file_name, result_file_name)
+
+
+# Driver side, runs in a plain Python interpreter:
+
+def blend_files(paths):
+    """ Return the .blend files given directly or found in directories """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, '*.blend'))))
+        else:
+            files.append(path)
+    return([os.path.abspath(f) for f in files])
+
+
+def run_driver(args):
+    import job_pool
+    import psd_table
+
+    files = blend_files(args.blend_files)
+    if len(files) == 0:
+        print('No .blend files found')
+        return(1)
+    table_file_name = os.path.abspath(args.output)
+    psd_table.table_format(table_file_name)
+    out_dir = os.path.splitext(table_file_name)[0] + '_parts'
+    os.makedirs(out_dir, exist_ok=True)
+
+    script = os.path.abspath(__file__)
+    analyzer = os.path.join(os.path.dirname(script), ANALYZER_FILE_NAME)
+    jobs = []
+    for i, blend_file in enumerate(files):
+        result_file_name = os.path.join(out_dir, 'part_%04d.json' % (i))
+        cmd = [args.blender, '-b', '--factory-startup', blend_file,
+               '--python-exit-code', '1', '--python', script,
+               '--', '--worker', result_file_name, analyzer]
+        job = job_pool.Job(blend_file, [(cmd, None)])
+        job.result_file_name = result_file_name
+        jobs.append(job)
+
+    t_start = time.time()
+    n_failed = 0
+    records = []
+    done = []
+    for n_done, job in enumerate(job_pool.run_jobs(jobs, args.workers), 1):
+        name = os.path.basename(job.name)
+        if not job.ok or not os.path.exists(job.result_file_name):
+            n_failed += 1
+            print('[%d/%d] %s  FAILED  %.1f s\n%s' % (n_done, len(jobs), name, job.elapsed, job.error))
+            continue
+        with open(job.result_file_name) as result_file:
+            result = json.load(result_file)
+        records.extend(result['records'])
+        done.append(job.result_file_name)
+        print('[%d/%d] %s  %d contacts  %.1f s (%.1f s reading)' %
+              (n_done, len(jobs), name, len(result['records']), job.elapsed, result['time']))
+
+    n_rows = 0
+    if len(records) > 0:
+        n_rows = psd_table.write_table(table_file_name, psd_table.to_columns(records), append=args.append)
+    for result_file_name in done:
+        os.remove(result_file_name)
+    if len(os.listdir(out_dir)) == 0:
+        os.rmdir(out_dir)
+    print('Wrote %d contacts from %d of %d files to %s in %.1f s' %
+          (n_rows, len(jobs) - n_failed, len(jobs), table_file_name, time.time() - t_start))
+    return(n_failed)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description='Collect the contact measurements of many .blend files into one table')
+    parser.add_argument('blend_files', nargs='*',
+                        help='.blend files or directories of .blend files')
+    parser.add_argument('-n', '--workers', type=int, default=os.cpu_count(),
+                        help='number of background Blender processes')
+    parser.add_argument('-b', '--blender', default='blender',
+                        help='Blender executable')
+    parser.add_argument('-o', '--output', default='contacts.csv',
+                        help='table to write (.csv, .npz or .parquet)')
+    parser.add_argument('-a', '--append', action='store_true',
+                        help='add to an existing table instead of replacing it')
+    parser.add_argument('--worker', nargs=2, metavar=('RESULT', 'ANALYZER'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        run_worker(args.worker[0], args.worker[1])
+        return(0)
+    if len(args.blend_files) == 0:
+        parser.error('at least one .blend file or directory is required')
+    return(run_driver(args))
+
+
+if __name__ == '__main__':
+    # Inside Blender our arguments follow the '--' separator
+    if '--' in sys.argv:
+        argv = sys.argv[sys.argv.index('--')+1:]
+    else:
+        argv = sys.argv[1:]
+    status = main(argv)
+    # Blender ignores the return value of the script, so only exit here
+    #   when running as the driver
+    if '--' not in sys.argv:
+        sys.exit(status)
@@ -0,0 +1,193 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+
+# <pep8 compliant>
+
+"""
+This file contains the in-process tagger for contact regions.
+
+The faces of a base object lying on one of its contact objects are found
+directly from the mesh data: a KD-tree over the base face centroids picks
+the faces near each contact, and a BVH tree of the contact decides which of
+those are within a small distance of its surface or inside it, by the
+parity of ray crossings so flipped normals do not matter.
+
+Contacts are matched to their base objects once per run through a scene
+index built from the contact patterns, and only contacts whose world-space
+bounding box overlaps the base are handed to the tagger.
+
+"""
+
+# python imports
+
+import numpy as np
+
+# blender imports
+from mathutils import Vector
+from mathutils.bvhtree import BVHTree
+from mathutils.kdtree import KDTree
+
+from . import mesh_arrays
+from .core import geometry
+from . import pattern_registry
+
+
+class ContactIndex:
+    """ Contact objects of each base object in objs, matched by the contact
+        patterns of the scene """
+
+    def __init__(self, context, objs=None):
+        scn = context.scene
+        if objs == None:
+            objs = scn.collection.children[0].objects
+        self.objs = objs
+        self.contacts = {}
+        self.bounds = {}
+        names = [obj.name for obj in objs]
+
+        for contact_pattern in scn.test_tool.contact_pattern_list:
+            bn1_regex = contact_pattern.base_name_1_regex
+            bn2_regex = contact_pattern.base_name_2_regex
+            c_regex = contact_pattern.contact_name_regex
+            c_bn2_recomp = pattern_registry.compile_regex(c_regex + bn2_regex)
+            bn1_c_recomp = pattern_registry.compile_regex(bn1_regex + c_regex)
+            bases_1 = set([name for name in names if pattern_registry.fullmatch(bn1_regex, name)])
+            bases_2 = set([name for name in names if pattern_registry.fullmatch(bn2_regex, name)])
+
+            # A contact is a base name followed by contact and base 2 parts,
+            #   or contact and base 1 parts followed by a base name
+            for name in names:
+                for k in range(1, len(name)):
+                    head = name[:k]
+                    tail = name[k:]
+                    if head in bases_1 and c_bn2_recomp.fullmatch(tail):
+                        self.add(head, name)
+                    if tail in bases_2 and bn1_c_recomp.fullmatch(head):
+                        self.add(tail, name)
+
+    def add(self, b_obj_name, c_obj_name):
+        c_obj_names = self.contacts.setdefault(b_obj_name, [])
+        if c_obj_name not in c_obj_names:
+            c_obj_names.append(c_obj_name)
+
+    def bases(self):
+        return([obj.name for obj in self.objs if obj.name in self.contacts])
+
+    def get_bounds(self, name):
+        """ Return the world-space bounding box of an object as (lo, hi) """
+        bounds = self.bounds.get(name)
+        if bounds == None:
+            obj = self.objs[name]
+            corners = np.array([tuple(c) for c in obj.bound_box])
+            t_mat = np.array(obj.matrix_world)
+            corners = corners @ t_mat[:3, :3].T + t_mat[:3, 3]
+            bounds = self.bounds[name] = (corners.min(axis=0), corners.max(axis=0))
+        return(bounds)
+
+    def contacts_for(self, b_obj_name, distance=0.0):
+        """ Return the contacts of a base object whose bounding boxes come
+            within distance of the bounding box of the base """
+        b_lo, b_hi = self.get_bounds(b_obj_name)
+        c_obj_names = []
+        for c_obj_name in self.contacts.get(b_obj_name, []):
+            c_lo, c_hi = self.get_bounds(c_obj_name)
+            if np.all(c_lo <= b_hi + distance) and np.all(b_lo <= c_hi + distance):
+                c_obj_names.append(c_obj_name)
+        return(c_obj_names)
+
+
+# Rays along three skew directions, so that a ray grazing an edge or
+#   slipping through a small hole is outvoted by the other two
+RAY_DIRECTIONS = [Vector(d).normalized() for d in
+                  ((0.5773, 0.5774, 0.5775), (-0.6019, 0.1234, 0.7890), (0.2671, -0.9183, 0.2921))]
+
+
+def ray_inside(bvh, co, length):
+    """ Return True if co is inside the closed surface in bvh, counting the
+        crossings of rays from co, so the result does not depend on the
+        direction of the face normals """
+    step = 1e-6*length
+    votes = 0
+    for direction in RAY_DIRECTIONS:
+        origin = co
+        travelled = 0.0
+        hits = 0
+        while travelled < length:
+            loc, normal, index, dist = bvh.ray_cast(origin, direction, length - travelled)
+            if loc == None:
+                break
+            hits += 1
+            origin = loc + direction*step
+            travelled += dist + step
+        votes += hits % 2
+    return(votes >= 2)
+
+
+class ContactTagger:
+    """ Tags the faces of one base object against any number of contacts """
+
+    def __init__(self, b_obj):
+        verts = mesh_arrays.get_world_vertices(b_obj)
+        face_verts, face_sizes = mesh_arrays.get_polygons(b_obj.data)
+        centroids = geometry.polygon_centroids(verts, face_verts, face_sizes)
+        self.kd = KDTree(len(centroids))
+        for i, co in enumerate(centroids.tolist()):
+            self.kd.insert(co, i)
+        self.kd.balance()
+
+    def tag(self, c_obj, distance):
+        """ Return the sorted indices of the base faces whose centroid is
+            inside c_obj or within distance of its surface """
+        verts = mesh_arrays.get_world_vertices(c_obj)
+        if len(verts) == 0:
+            return([])
+        face_verts, face_sizes = mesh_arrays.get_polygons(c_obj.data)
+        polys = np.split(face_verts, np.cumsum(face_sizes)[:-1])
+        bvh = BVHTree.FromPolygons(verts.tolist(), [p.tolist() for p in polys])
+
+        # Only faces within the bounding sphere of the contact can be tagged
+        lo = verts.min(axis=0)
+        hi = verts.max(axis=0)
+        center = (lo + hi)/2
+        radius = float(np.linalg.norm(hi - center)) + distance
+
+        faces = []
+        for co, i, d in self.kd.find_range(Vector(center), radius):
+            loc, normal, index, dist = bvh.find_nearest(co, distance)
+            if loc != None or ray_inside(bvh, co, 2*radius):
+                faces.append(i)
+        return(sorted(faces))
+
+
+def tag_contacts(context, b_obj, c_obj_names, distance):
+    """ Assign one region per contact object to b_obj holding the faces
+        tagged by that contact, and return {region name: face count} """
+    scn = context.scene
+    tagger = ContactTagger(b_obj)
+    mesh = b_obj.data
+    regions = b_obj.mcell.regions
+    counts = {}
+    for c_obj_name in c_obj_names:
+        if c_obj_name in counts:
+            continue
+        faces = tagger.tag(scn.objects[c_obj_name], distance)
+        if regions.region_list.get(c_obj_name) == None:
+            regions.add_region_by_name(context, c_obj_name)
+        mesh_arrays.set_region_faces(regions.region_list[c_obj_name], mesh, faces)
+        counts[c_obj_name] = len(faces)
+    return(counts)
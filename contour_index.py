@@ -0,0 +1,294 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""
+This file contains an indexer for the contours of a RECONSTRUCT series.
+
+Section files are streamed one tag at a time and scanned in parallel, and
+the result records for every contour the sections it appears on, its
+number of traces and its bounding box, so callers need not re-read the
+series to find out what it contains.
+
+The per-section results are kept in a cache file next to the .ser, stamped
+with the size and modification time of each section file, so reopening a
+series only re-reads the sections that changed since it was last indexed.
+
+"""
+
+# python imports
+
+import concurrent.futures
+import glob
+import json
+import os
+import re
+
+import numpy as np
+
+
+thickness_re = re.compile('defaultThickness="(.*?)"')
+dim_re = re.compile(r'dim="(\d+)"')
+xcoef_re = re.compile('xcoef="(.*?)"')
+ycoef_re = re.compile('ycoef="(.*?)"')
+name_re = re.compile('name="(.*?)"')
+points_re = re.compile('points="(.*?)"', re.DOTALL)
+
+CACHE_VERSION = 1
+
+
+class ContourInfo:
+    """ Sections, trace count and bounding box of one contour.  The bounding
+        box is (xmin, ymin, zmin, xmax, ymax, zmax) in section coordinates,
+        with z given by section number times section thickness """
+
+    def __init__(self, name):
+        self.name = name
+        self.sections = []
+        self.n_traces = 0
+        self.bbox = [np.inf, np.inf, np.inf, -np.inf, -np.inf, -np.inf]
+
+
+class SeriesIndex:
+    """ Section range, section thickness and contours of a series """
+
+    def __init__(self, ser_file, thickness, section_numbers, min_section,
+                 max_section, contours):
+        self.ser_file = ser_file
+        self.thickness = thickness
+        self.section_numbers = section_numbers
+        self.min_section = min_section
+        self.max_section = max_section
+        self.contours = contours
+
+    def names(self):
+        return(sorted(self.contours))
+
+
+def section_numbers(ser_prefix):
+    """ Return the sorted numbers of the section files of a series """
+    patc = re.compile(re.escape(ser_prefix + os.path.extsep) + '[0-9]+')
+    files = glob.glob(ser_prefix + os.path.extsep + '[0-9]*')
+    return(sorted([int(os.path.splitext(fn)[1][1:]) for fn in files if patc.fullmatch(fn)]))
+
+
+def longest_run(numbers):
+    """ Return (first, last) of the longest run of consecutive numbers """
+    numbers = np.asarray(numbers)
+    breaks = np.nonzero(np.diff(numbers) != 1)[0] + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [len(numbers)]))
+    i = int(np.argmax(ends - starts))
+    return(int(numbers[starts[i]]), int(numbers[ends[i]-1]))
+
+
+def read_thickness(ser_file):
+    """ Return the default section thickness of a series as a string """
+    with open(ser_file, 'r', errors='replace') as f:
+        for line in f:
+            m = thickness_re.search(line)
+            if m:
+                return(m.group(1))
+    return('0.05')
+
+
+def iter_tags(f):
+    """ Yield the text of each tag in an open XML file without reading the
+        whole file, so memory use is bounded by the largest tag """
+    buf = ''
+    for line in f:
+        buf += line
+        if '>' not in line:
+            continue
+        tags = buf.split('>')
+        buf = tags.pop()
+        for tag in tags:
+            yield tag
+
+
+def transform_points(dim, xcoef, ycoef, pts):
+    """ Map trace points into section coordinates by inverting the
+        RECONSTRUCT polynomial transform given by xcoef and ycoef """
+    if dim == 0:
+        return(pts)
+    u = pts[:, 0]
+    v = pts[:, 1]
+    a = xcoef
+    b = ycoef
+    # Invert the affine part exactly
+    det = a[1]*b[2] - a[2]*b[1]
+    if det == 0.0:
+        return(pts)
+    x = ( b[2]*(u - a[0]) - a[2]*(v - b[0]))/det
+    y = (-b[1]*(u - a[0]) + a[1]*(v - b[0]))/det
+    if not (np.any(a[3:]) or np.any(b[3:])):
+        return(np.column_stack((x, y)))
+    # Refine for the nonlinear terms with Newton steps
+    for i in range(10):
+        fu = a[0] + a[1]*x + a[2]*y + a[3]*x*y + a[4]*x*x + a[5]*y*y - u
+        fv = b[0] + b[1]*x + b[2]*y + b[3]*x*y + b[4]*x*x + b[5]*y*y - v
+        j11 = a[1] + a[3]*y + 2*a[4]*x
+        j12 = a[2] + a[3]*x + 2*a[5]*y
+        j21 = b[1] + b[3]*y + 2*b[4]*x
+        j22 = b[2] + b[3]*x + 2*b[5]*y
+        det = j11*j22 - j12*j21
+        det[det == 0.0] = 1.0
+        x = x - ( j22*fu - j12*fv)/det
+        y = y - (-j21*fu + j11*fv)/det
+    return(np.column_stack((x, y)))
+
+
+def _coefs(regex, tag):
+    m = regex.search(tag)
+    c = np.zeros(6)
+    if m:
+        vals = [float(s) for s in m.group(1).split()][:6]
+        c[:len(vals)] = vals
+    return(c)
+
+
+def scan_section(file_name):
+    """ Return {contour name: [n_traces, xmin, ymin, xmax, ymax]} for the
+        traces in one section file """
+    contours = {}
+    dim = 0
+    xcoef = ycoef = None
+    with open(file_name, 'r', errors='replace') as f:
+        for tag in iter_tags(f):
+            tag = tag.lstrip()
+            if tag.startswith('<Transform'):
+                m = dim_re.search(tag)
+                dim = int(m.group(1)) if m else 0
+                xcoef = _coefs(xcoef_re, tag)
+                ycoef = _coefs(ycoef_re, tag)
+            elif tag.startswith('<Contour'):
+                m = name_re.search(tag)
+                if m == None:
+                    continue
+                entry = contours.setdefault(m.group(1), [0, np.inf, np.inf, -np.inf, -np.inf])
+                entry[0] += 1
+                m = points_re.search(tag)
+                if m == None:
+                    continue
+                pts = np.array(m.group(1).replace(',', ' ').split(), dtype=np.float64)
+                if len(pts) < 2:
+                    continue
+                pts = pts[:len(pts)//2*2].reshape(-1, 2)
+                if xcoef is not None:
+                    pts = transform_points(dim, xcoef, ycoef, pts)
+                lo = pts.min(axis=0)
+                hi = pts.max(axis=0)
+                entry[1] = min(entry[1], lo[0])
+                entry[2] = min(entry[2], lo[1])
+                entry[3] = max(entry[3], hi[0])
+                entry[4] = max(entry[4], hi[1])
+    return(contours)
+
+
+def cache_file_name(ser_file):
+    return(os.path.splitext(ser_file)[0] + '.contour_index.json')
+
+
+def file_stamp(file_name):
+    st = os.stat(file_name)
+    return([st.st_size, st.st_mtime_ns])
+
+
+def load_cache(ser_file):
+    """ Return {section file name: {'stamp': ..., 'contours': ...}} from the
+        cache file of a series, or an empty dict if there is no usable cache """
+    try:
+        with open(cache_file_name(ser_file), 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return({})
+    if not isinstance(cache, dict) or cache.get('version') != CACHE_VERSION:
+        return({})
+    return(cache.get('sections', {}))
+
+
+def save_cache(ser_file, sections):
+    """ Write the cache file of a series, skipping it if the series
+        directory is not writable """
+    file_name = cache_file_name(ser_file)
+    tmp_file_name = file_name + '.tmp'
+    try:
+        with open(tmp_file_name, 'w') as f:
+            json.dump({'version': CACHE_VERSION, 'sections': sections}, f)
+        os.replace(tmp_file_name, file_name)
+    except OSError as e:
+        print('Could not write contour index cache %s: %s' % (file_name, e))
+
+
+def build_index(ser_file, max_workers=None, use_cache=True):
+    """ Index the contours of the series ser_file over the longest run of
+        consecutive section files, scanning sections on a thread pool.
+        With use_cache, sections whose size and modification time match the
+        cache file are not read again """
+    ser_prefix = os.path.splitext(ser_file)[0]
+    thickness = read_thickness(ser_file)
+    numbers = section_numbers(ser_prefix)
+    if len(numbers) == 0:
+        return(SeriesIndex(ser_file, thickness, numbers, None, None, {}))
+    min_section, max_section = longest_run(numbers)
+    sections = list(range(min_section, max_section+1))
+    file_names = ['%s%s%d' % (ser_prefix, os.path.extsep, i) for i in sections]
+
+    cache = load_cache(ser_file) if use_cache else {}
+    new_cache = {}
+    results = [None]*len(file_names)
+    stale = []
+    for i, file_name in enumerate(file_names):
+        key = os.path.basename(file_name)
+        stamp = file_stamp(file_name)
+        entry = cache.get(key)
+        if entry != None and entry.get('stamp') == stamp:
+            results[i] = entry['contours']
+            new_cache[key] = entry
+        else:
+            stale.append(i)
+            new_cache[key] = {'stamp': stamp}
+
+    if len(stale) > 0:
+        print('Scanning %d of %d section files' % (len(stale), len(file_names)))
+        if max_workers == None:
+            max_workers = min(32, (os.cpu_count() or 1) + 4)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+            scanned = pool.map(scan_section, [file_names[i] for i in stale])
+            for i, found in zip(stale, scanned):
+                results[i] = found
+                new_cache[os.path.basename(file_names[i])]['contours'] = found
+
+    if len(stale) > 0 or len(new_cache) != len(cache):
+        save_cache(ser_file, new_cache)
+
+    z_step = float(thickness)
+    contours = {}
+    for section, found in zip(sections, results):
+        for name, (n_traces, xmin, ymin, xmax, ymax) in found.items():
+            info = contours.get(name)
+            if info == None:
+                info = contours[name] = ContourInfo(name)
+            info.sections.append(section)
+            info.n_traces += n_traces
+            z = section*z_step
+            bbox = info.bbox
+            info.bbox = [float(min(bbox[0], xmin)), float(min(bbox[1], ymin)), min(bbox[2], z),
+                         float(max(bbox[3], xmax)), float(max(bbox[4], ymax)), max(bbox[5], z)]
+
+    return(SeriesIndex(ser_file, thickness, numbers, min_section, max_section, contours))
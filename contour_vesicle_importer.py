@@ -48,6 +48,7 @@ import glob
 
 globals()['neuropil_tools'] = importlib.import_module(__package__)
 #import neuropil_tools
+from . import contour_index
 from .. import cellblender
 
 
@@ -245,65 +246,19 @@ class ContourVesicleSceneProperty(bpy.types.PropertyGroup):
 
     def read_contour_list(self, context, filepath):
         self.filepath = filepath
-        ser_file = self.filepath
-        ser_prefix = os.path.splitext(self.filepath)[0]
-
-        first_re = re.compile('first3Dsection="(\d*)"')
-        last_re = re.compile('last3Dsection="(\d*)"')
-        default_thick_re = re.compile('defaultThickness="(.*)"')
-
-        ser_data = open(ser_file, "r").read()
-        self.section_thickness = default_thick_re.search(ser_data).group(1)
-
-        trace_file_glob = sorted(glob.glob(ser_prefix + os.path.extsep + '[0-9]*'))
-        pat = ser_prefix + '\\' + os.path.extsep + '[0-9]+'
-        patc = re.compile(pat)
-        trace_file_list = [patc.fullmatch(item).string for item in trace_file_glob if patc.fullmatch(item)]
-        trace_num_list = sorted([int(os.path.splitext(fn)[1][1:]) for fn in trace_file_list])
-
-        # create list of contiguous runs of section file numbers
-        r_list = []
-        cur_r = [0,1]
-        r_next = trace_num_list[cur_r[0]]+1
-
-        for i in range(1,len(trace_num_list)):
-          if trace_num_list[i] == r_next:
-            r_next += 1
-            cur_r[1] += 1
-            if i == len(trace_num_list)-1:
-              r_list.append(cur_r)
-          else:
-            r_list.append(cur_r)
-            cur_r = [i,1]
-            r_next = trace_num_list[cur_r[0]]+1
-
-        r_list = np.array(r_list)
-        print('')
-        print(trace_num_list)
-        print('')
-        print(r_list)
-        print('')
+
+        index = contour_index.build_index(self.filepath)
+        self.section_thickness = index.thickness
+        if index.min_section == None:
+            print('No section files found for %s' % (filepath))
+            return
 
         # set min and max section numbers of longest contiguous run found
-        r_max = r_list[np.argmax(r_list[:, 1])]
-        self.min_section = str(trace_num_list[r_max[0]])
-        self.max_section = str(trace_num_list[r_max[0]+r_max[1]-1])
-
-        contour_re = re.compile('Contour\ name=\"(.*?)\"')
-
-        all_names = []
-        for i in range(int(self.min_section), int(self.max_section)):
-            trace_file_name = '%s%s%d' % (ser_prefix, os.path.extsep, i)
-            print('Reading contour names in trace file: %s' % (trace_file_name))
-#            all_names += contour_re.findall(open(ser_prefix[:-3] + str(i)).read())
-            all_names += contour_re.findall(open(trace_file_name).read())
-         # Now you would put each item in this python list into a Blender collection property
-        contour_names = sorted(list(set(all_names)))
-
-        for name in contour_names:
+        self.min_section = str(index.min_section)
+        self.max_section = str(index.max_section)
+
+        for name in index.names():
             self.add_contour(context, name,"contour")
-        for item in self.contour_list:
-            print(item)
 
     
     def include_filtered_contour(self,context):
@@ -0,0 +1,42 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+
+# <pep8 compliant>
+
+"""
+This package contains the geometry kernels of Neuropil Tools.
+
+Everything here works on plain NumPy arrays (vertex coordinates, triangle
+vertex indices and region face indices) and does not import bpy, so the
+analyses can be run and benchmarked outside Blender, for example in
+worker processes on a cluster.  The add-on reads mesh data into arrays
+with mesh_arrays and passes them to the functions exported below.
+
+"""
+
+from .components import label_components, component_sizes
+from .diameter import principal_axis, unique_edges, slice_diameters, \
+                      diameter_stats
+from .geometry import triangle_areas, face_areas, masked_area, \
+                      boundary_edges, polygon_centroids, boundary_loops, \
+                      plane_fit, polygon_area
+from .regions import FaceSet, union_face_sets, region_triangles, \
+                     region_area, boundary_center, boundary_cross_section, \
+                     hull_volume, region_moments, region_centroids, \
+                     face_triangle_index, face_set_triangles, sweep_regions
+from .volume import convex_hull, hull_intersection_volume
@@ -0,0 +1,68 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""
+This file contains connected-component labeling for mesh graphs.
+
+Components are found with a vectorized union-find (hook and shortcut)
+over the edge array, so no selection operators are needed.
+
+"""
+
+# python imports
+
+import numpy as np
+
+
+def label_components(n_verts, edges):
+    """ Label the connected components of a graph with n_verts vertices and
+        an (M,2) edge array.  Returns (n_components, labels) where labels
+        holds a component number in 0..n_components-1 for every vertex """
+    parent = np.arange(n_verts)
+    edges = np.asarray(edges).reshape(-1, 2)
+    u = edges[:, 0]
+    v = edges[:, 1]
+
+    while True:
+        # Every tree is a star here, so parent[] of an endpoint is a root
+        pu = parent[u]
+        pv = parent[v]
+        lo = np.minimum(pu, pv)
+        hi = np.maximum(pu, pv)
+        merge = lo != hi
+        if not merge.any():
+            break
+
+        # Hook the larger root of each edge onto the smaller one
+        np.minimum.at(parent, hi[merge], lo[merge])
+
+        # Shortcut until every vertex points directly at its root
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+    roots, labels = np.unique(parent, return_inverse=True)
+    return len(roots), labels.reshape(-1)
+
+
+def component_sizes(labels, n_components):
+    """ Return the number of vertices in each component """
+    return np.bincount(labels, minlength=n_components)
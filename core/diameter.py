@@ -0,0 +1,125 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""
+This file contains an in-process diameter estimator for spine necks and heads.
+
+The surface patch is sliced by planes perpendicular to its principal axis and
+the diameter of each cross section is measured from the points where the
+slicing planes cut the mesh edges.
+
+"""
+
+# python imports
+
+import numpy as np
+
+from . import components
+
+
+def principal_axis(verts):
+    """ Return (centroid, unit vector) of the principal axis of verts """
+    centroid = verts.mean(axis=0)
+    covm = np.cov(verts - centroid, rowvar=False)
+    eigval, eigvec = np.linalg.eigh(covm)
+    return centroid, eigvec[:, np.argmax(eigval)]
+
+
+def unique_edges(tris):
+    """ Return the unique undirected edges of a triangle array """
+    edges = np.concatenate((tris[:, [0, 1]], tris[:, [1, 2]], tris[:, [2, 0]]))
+    edges.sort(axis=1)
+    return np.unique(edges, axis=0)
+
+
+def triangle_edges(tris):
+    """ Return (edges, tri_edges) where edges are the unique undirected
+        edges of a triangle array and tri_edges (T,3) indexes the edges of
+        each triangle """
+    edges = np.concatenate((tris[:, [0, 1]], tris[:, [1, 2]], tris[:, [2, 0]]))
+    edges.sort(axis=1)
+    edges, inverse = np.unique(edges, axis=0, return_inverse=True)
+    return edges, inverse.reshape(3, -1).T
+
+
+def slice_diameters(verts, tris, n_slices=16):
+    """ Slice the surface given by verts and tris into n_slices cross sections
+        along its principal axis and return the diameter of every closed or
+        open curve the slicing planes cut from the surface (twice the mean
+        distance of the cut points from the centroid of their curve), so a
+        section that cuts two branches gives two diameters.  Curves made of
+        fewer than three cut points are skipped """
+    used = np.unique(tris)
+    if len(used) < 3:
+        return np.zeros(0)
+    centroid, axis = principal_axis(verts[used])
+
+    edges, tri_edges = triangle_edges(tris)
+    t = (verts - centroid) @ axis
+    t0 = t[edges[:, 0]]
+    t1 = t[edges[:, 1]]
+
+    # Slice planes at the centers of n_slices equal intervals along the axis
+    t_min = t[used].min()
+    t_max = t[used].max()
+    planes = t_min + (t_max - t_min)*(np.arange(n_slices) + 0.5)/n_slices
+
+    # Find every (edge, plane) pair where the edge crosses the plane
+    cross = (t0[:, None] - planes)*(t1[:, None] - planes) < 0.0
+    e_idx, s_idx = np.nonzero(cross)
+    if len(e_idx) == 0:
+        return np.zeros(0)
+
+    p0 = verts[edges[e_idx, 0]]
+    p1 = verts[edges[e_idx, 1]]
+    w = (planes[s_idx] - t0[e_idx])/(t1[e_idx] - t0[e_idx])
+    pts = p0 + w[:, None]*(p1 - p0)
+
+    # A plane crossing a triangle cuts two of its edges, and the segment
+    #   between the two cut points links them into the same curve
+    tri_cross = cross[tri_edges]
+    t_idx, t_s = np.nonzero(tri_cross.sum(axis=1) == 2)
+    slot = np.argsort(~tri_cross[t_idx, :, t_s], axis=1, kind='stable')[:, :2]
+    keys = e_idx*n_slices + s_idx
+    links = np.stack([np.searchsorted(keys, tri_edges[t_idx, slot[:, k]]*n_slices + t_s)
+                      for k in range(2)], axis=1)
+    n_loops, loop = components.label_components(len(pts), links)
+
+    # Per-curve centroid and mean radius, accumulated with bincount
+    n_pts = np.bincount(loop, minlength=n_loops)
+    c = np.stack([np.bincount(loop, weights=pts[:, i], minlength=n_loops)
+                  for i in range(3)], axis=1)
+    c /= n_pts[:, None]
+    r = np.linalg.norm(pts - c[loop], axis=1)
+    r_sum = np.bincount(loop, weights=r, minlength=n_loops)
+
+    # Report the curves in order along the axis
+    valid = np.nonzero(n_pts >= 3)[0]
+    first = np.full(n_loops, n_slices)
+    np.minimum.at(first, loop, s_idx)
+    valid = valid[np.argsort(first[valid], kind='stable')]
+    return 2.0*r_sum[valid]/n_pts[valid]
+
+
+def diameter_stats(diameters):
+    """ Return (max, min, median) of a set of section diameters """
+    if len(diameters) == 0:
+        return (0.0, 0.0, 0.0)
+    return (float(diameters.max()), float(diameters.min()),
+            float(np.median(diameters)))
@@ -0,0 +1,124 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""
+This file contains vectorized geometry kernels for triangle meshes.
+
+All functions operate on plain NumPy arrays (vertex coordinates and
+triangle vertex indices) and do not depend on Blender.
+
+"""
+
+# python imports
+
+import numpy as np
+
+
+def triangle_areas(verts, tris):
+    """ Return the area of every triangle in tris """
+    v0 = verts[tris[:, 0]]
+    v1 = verts[tris[:, 1]]
+    v2 = verts[tris[:, 2]]
+    return 0.5*np.linalg.norm(np.cross(v1 - v0, v2 - v0), axis=1)
+
+
+def face_areas(verts, tris, tri_face=None, n_faces=None):
+    """ Return the area of every face, summing triangles that belong to the
+        same face when tri_face maps each triangle to its face index """
+    areas = triangle_areas(verts, tris)
+    if tri_face is None:
+        return areas
+    if n_faces is None:
+        n_faces = int(tri_face.max()) + 1 if len(tri_face) else 0
+    return np.bincount(tri_face, weights=areas, minlength=n_faces)
+
+
+def masked_area(areas, faces):
+    """ Sum areas over faces given as an index array or a boolean mask """
+    if len(faces) == 0:
+        return 0.0
+    return float(areas[faces].sum())
+
+
+def boundary_edges(tris):
+    """ Return the edges of a triangle array that belong to only one
+        triangle, which form the open boundary of the surface """
+    edges = np.concatenate((tris[:, [0, 1]], tris[:, [1, 2]], tris[:, [2, 0]]))
+    edges.sort(axis=1)
+    edges, counts = np.unique(edges, axis=0, return_counts=True)
+    return edges[counts == 1]
+
+
+def polygon_centroids(verts, face_verts, face_sizes):
+    """ Return the vertex centroid of each polygon, with polygons given by
+        the flat array of their vertex indices and their sizes """
+    face_sizes = np.asarray(face_sizes)
+    starts = np.concatenate(([0], np.cumsum(face_sizes)[:-1]))
+    sums = np.add.reduceat(verts[face_verts], starts, axis=0)
+    return sums/face_sizes[:, None]
+
+
+def boundary_loops(tris):
+    """ Return the boundary of a triangle array as a list of closed loops,
+        each an array of vertex indices in order along the boundary.
+        Boundary edges keep the direction they have in their triangle, so
+        on a consistently oriented surface every loop runs the same way.
+        Raises ValueError if the boundary cannot be split into loops, where
+        the surface is not manifold (several loops touch at a vertex) or not
+        consistently oriented """
+    edges = np.concatenate((tris[:, [0, 1]], tris[:, [1, 2]], tris[:, [2, 0]]))
+    keys = np.sort(edges, axis=1)
+    keys, inverse, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+    edges = edges[counts[inverse.ravel()] == 1]
+    if len(edges) == 0:
+        return []
+    for end in (edges[:, 0], edges[:, 1]):
+        values, counts = np.unique(end, return_counts=True)
+        if (counts > 1).any():
+            raise ValueError('Boundary is not manifold at vertices %s' %
+                             (values[counts > 1][:10].tolist()))
+    succ = dict(zip(edges[:, 0].tolist(), edges[:, 1].tolist()))
+    loops = []
+    while succ:
+        start, v = succ.popitem()
+        loop = [start]
+        while v != start and v in succ:
+            loop.append(v)
+            v = succ.pop(v)
+        if v != start:
+            raise ValueError('Boundary is not consistently oriented at vertex %d' % (v))
+        loops.append(np.array(loop))
+    return loops
+
+
+def plane_fit(points):
+    """ Return (centroid, unit normal) of the least squares plane through
+        points, the normal being the direction of least variance """
+    centroid = points.mean(axis=0)
+    covm = np.cov(points - centroid, rowvar=False)
+    eigval, eigvec = np.linalg.eigh(covm)
+    return centroid, eigvec[:, 0]
+
+
+def polygon_area(verts, nvec):
+    """ Return the area of the closed polygon verts projected on the plane
+        with unit normal nvec, signed positive when the polygon runs
+        counterclockwise seen from the side nvec points to """
+    vector_area = np.cross(verts, np.roll(verts, -1, axis=0)).sum(axis=0)
+    return 0.5*float(np.dot(vector_area, nvec))
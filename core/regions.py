@@ -0,0 +1,273 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+
+# <pep8 compliant>
+
+"""
+This file contains measurements of mesh regions.
+
+A region is given as an array of face indices into a triangulated mesh
+with tri_face mapping each triangle to the face it came from, so these
+functions work the same on arrays read from Blender and on arrays loaded
+in a plain worker process.
+
+"""
+
+# python imports
+
+import numpy as np
+
+from . import geometry
+from . import volume
+
+
+class FaceSet:
+    """ The faces of a region of a mesh with n_faces faces, stored as sorted
+        face indices when the region is small and as a packed bitset when it
+        covers a large part of the mesh.  Set algebra works on either form,
+        e.g. neck = spine - head """
+
+    # Above this fraction of the mesh one bit per face takes less memory
+    #   than a 32 bit index per member
+    DENSE_FRACTION = 1.0/32
+
+    def __init__(self, n_faces, faces=None, mask=None):
+        self.n_faces = n_faces
+        if mask is None:
+            faces = np.unique(np.asarray(faces if faces is not None else [], dtype=np.int64))
+            faces = faces[(faces >= 0) & (faces < n_faces)]
+        else:
+            faces = np.flatnonzero(mask)
+        self.size = len(faces)
+        if self.size > n_faces*self.DENSE_FRACTION:
+            if mask is None:
+                mask = np.zeros(n_faces, dtype=bool)
+                mask[faces] = True
+            self.indices = None
+            self.bits = np.packbits(mask)
+        else:
+            self.indices = faces.astype(np.int32)
+            self.bits = None
+
+    def __len__(self):
+        return self.size
+
+    def faces(self):
+        """ Return the sorted face indices """
+        if self.indices is not None:
+            return self.indices.astype(np.int64)
+        return np.flatnonzero(self.mask())
+
+    def mask(self):
+        """ Return a boolean array over all faces of the mesh """
+        if self.bits is not None:
+            return np.unpackbits(self.bits, count=self.n_faces).astype(bool)
+        mask = np.zeros(self.n_faces, dtype=bool)
+        mask[self.indices] = True
+        return mask
+
+    def _combine(self, other, sparse_op, dense_op):
+        if self.n_faces != other.n_faces:
+            raise ValueError('Face sets of meshes with %d and %d faces' % (self.n_faces, other.n_faces))
+        if (self.indices is not None) and (other.indices is not None):
+            return FaceSet(self.n_faces, faces=sparse_op(self.indices, other.indices))
+        return FaceSet(self.n_faces, mask=dense_op(self.mask(), other.mask()))
+
+    def __or__(self, other):
+        return self._combine(other, np.union1d, np.logical_or)
+
+    def __and__(self, other):
+        return self._combine(other, np.intersect1d, np.logical_and)
+
+    def __sub__(self, other):
+        return self._combine(other, np.setdiff1d, lambda a, b: a & ~b)
+
+
+def union_face_sets(face_sets, n_faces):
+    """ Return the union of many face sets of one mesh in one pass """
+    mask = np.zeros(n_faces, dtype=bool)
+    for face_set in face_sets:
+        if face_set.indices is not None:
+            mask[face_set.indices] = True
+        else:
+            mask |= face_set.mask()
+    return FaceSet(n_faces, mask=mask)
+
+
+def region_triangles(tris, tri_face, faces):
+    """ Return the triangles of tris belonging to the faces of a region,
+        given as face indices or as a boolean mask over all faces """
+    faces = np.asarray(faces)
+    if faces.dtype == bool:
+        return tris[faces[tri_face]]
+    return tris[np.isin(tri_face, faces)]
+
+
+def region_area(verts, tris, tri_face, faces):
+    """ Return the surface area of a region """
+    return float(geometry.triangle_areas(verts, region_triangles(tris, tri_face, faces)).sum())
+
+
+def boundary_center(verts, region_tris):
+    """ Return the centroid of the boundary vertices of the region made of
+        region_tris, or None if the region has no boundary """
+    bnd_verts = np.unique(geometry.boundary_edges(region_tris))
+    if len(bnd_verts) == 0:
+        return None
+    return verts[bnd_verts].mean(axis=0)
+
+
+def boundary_cross_section(verts, region_tris):
+    """ Return (center, normal, area) of the cross section closing the
+        boundary of the region made of region_tris, measured on its longest
+        boundary loop: the centroid and best fitting plane of the loop
+        vertices and the area of the loop projected on that plane.  Returns
+        None if the region has no boundary, and raises ValueError if the
+        boundary does not split into loops (see geometry.boundary_loops) """
+    loops = geometry.boundary_loops(region_tris)
+    if len(loops) == 0:
+        return None
+    loop = max(loops, key=len)
+    center, normal = geometry.plane_fit(verts[loop])
+    area = abs(geometry.polygon_area(verts[loop], normal))
+    return center, normal, area
+
+
+def hull_volume(verts, tris, region_tris, labels=None):
+    """ Return the volume of the part of the mesh inside the convex hull of
+        a region.  With vertex component labels, only the component that
+        holds the region is intersected with the hull """
+    if len(region_tris) == 0:
+        return None
+    if labels is not None:
+        piece = labels[region_tris[0, 0]]
+        tris = tris[labels[tris[:, 0]] == piece]
+    hull_points = verts[np.unique(region_tris)]
+    return volume.hull_intersection_volume(verts, tris, hull_points)
+
+
+def region_moments(verts, region_tris):
+    """ Return (centroid, area_centroid, axes) of the region made of
+        region_tris: the mean of its vertices, the area-weighted mean of its
+        triangle centroids and its principal axes as the rows of a 3x3
+        array in order of decreasing extent.  For a flat region such as a
+        PSD the last axis is its normal.  Returns None for an empty region """
+    if len(region_tris) == 0:
+        return None
+    centroid = verts[np.unique(region_tris)].mean(axis=0)
+    tri_centers = verts[region_tris].mean(axis=1)
+    areas = geometry.triangle_areas(verts, region_tris)
+    total = areas.sum()
+    if total == 0.0:
+        return centroid, centroid.copy(), np.eye(3)
+    area_centroid = (areas @ tri_centers)/total
+    # Second moment of each triangle as a uniform sheet, about area_centroid
+    d = verts[region_tris] - area_centroid
+    s = d.sum(axis=1)
+    covm = (np.einsum('t,tki,tkj->ij', areas, d, d) +
+            np.einsum('t,ti,tj->ij', areas, s, s))/(12.0*total)
+    eigval, eigvec = np.linalg.eigh(covm)
+    return centroid, area_centroid, eigvec[:, ::-1].T
+
+
+def region_centroids(verts, tris, tri_face, face_sets, n_faces=None):
+    """ Return the vertex centroid of each region in face_sets (face index
+        arrays) as an (N,3) array, with NaN rows for empty regions.  The
+        triangles of all regions are looked up at once through
+        face_triangle_index """
+    if n_faces is None:
+        n_faces = int(tri_face.max()) + 1 if len(tri_face) else 0
+    n_regions = len(face_sets)
+    centroids = np.full((n_regions, 3), np.nan)
+    if n_regions == 0:
+        return centroids
+    order, starts = face_triangle_index(tri_face, n_faces)
+    faces = [np.asarray(f, dtype=np.int64).reshape(-1) for f in face_sets]
+    region = np.repeat(np.arange(n_regions), [len(f) for f in faces])
+    faces = np.concatenate(faces)
+    keep = (faces >= 0) & (faces < n_faces)
+    faces = faces[keep]
+    region = region[keep]
+    if len(faces) == 0:
+        return centroids
+
+    # Each (region, vertex) pair once, so shared vertices count once
+    tri_region = np.repeat(region, starts[faces + 1] - starts[faces])
+    used = tris[face_set_triangles(order, starts, faces)]
+    keys = np.unique(tri_region[:, None]*len(verts) + used)
+    region = keys // len(verts)
+    used = keys % len(verts)
+    counts = np.bincount(region, minlength=n_regions)
+    sums = np.stack([np.bincount(region, weights=verts[used, i], minlength=n_regions)
+                     for i in range(3)], axis=1)
+    found = counts > 0
+    centroids[found] = sums[found]/counts[found, None]
+    return centroids
+
+
+def face_triangle_index(tri_face, n_faces):
+    """ Return (order, starts): the triangles of face f are
+        order[starts[f]:starts[f+1]] """
+    order = np.argsort(tri_face, kind='stable')
+    starts = np.searchsorted(tri_face[order], np.arange(n_faces + 1))
+    return order, starts
+
+
+def face_set_triangles(order, starts, faces):
+    """ Return the indices of the triangles of faces from the lookup made
+        by face_triangle_index, in time proportional to the region size """
+    lo = starts[faces]
+    counts = starts[faces + 1] - lo
+    if np.all(counts == 1):
+        return order[lo]
+    offsets = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+    return order[offsets + np.arange(counts.sum())]
+
+
+def sweep_regions(verts, tris, tri_face, face_sets, world_verts=None,
+                  moments=(), sections=(), n_faces=None):
+    """ Measure many regions of one mesh in one pass.  face_sets maps region
+        names to face index arrays.  Returns {name: {'area': ...}} with the
+        region area (from world_verts if given), adding 'moments' as
+        returned by region_moments for the names in moments and 'section' as
+        returned by boundary_cross_section for the names in sections.  A
+        section that cannot be measured is None, with the reason in 'error' """
+    if n_faces is None:
+        n_faces = int(tri_face.max()) + 1 if len(tri_face) else 0
+    if world_verts is None:
+        world_verts = verts
+    areas = geometry.face_areas(world_verts, tris, tri_face, n_faces)
+    order, starts = face_triangle_index(tri_face, n_faces)
+    moments = set(moments)
+    sections = set(sections)
+    results = {}
+    for name, faces in face_sets.items():
+        faces = np.asarray(faces, dtype=np.int64)
+        faces = faces[(faces >= 0) & (faces < n_faces)]
+        result = results[name] = {'area': geometry.masked_area(areas, faces)}
+        if (name in moments) or (name in sections):
+            region_tris = tris[face_set_triangles(order, starts, faces)]
+            if name in moments:
+                result['moments'] = region_moments(verts, region_tris)
+            if name in sections:
+                try:
+                    result['section'] = boundary_cross_section(verts, region_tris)
+                except ValueError as e:
+                    result['section'] = None
+                    result['error'] = str(e)
+    return results
@@ -0,0 +1,358 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""
+This file contains a volume engine for the intersection of a closed
+triangle mesh with the convex hull of a set of points.
+
+The mesh surface is clipped against the hull one plane at a time.  The cut
+left on each plane is kept as the boundary of a planar cap, and caps cut
+by later planes are closed along the line where the two planes meet, so
+the clipped surface and its caps always bound a solid whose volume is a
+sum of signed tetrahedra.
+
+"""
+
+# python imports
+
+import numpy as np
+
+from . import components
+
+
+def convex_hull(points):
+    """ Return (faces, normals, offsets) of the convex hull of points, where
+        faces index into points and normals point out of the hull.
+        Returns None if the points are coplanar """
+    points = np.asarray(points, dtype=np.float64)
+    n_pts = len(points)
+    if n_pts < 4:
+        return None
+    eps = 1e-9*max(np.ptp(points, axis=0).max(), 1e-30)
+
+    # Initial tetrahedron from extreme points
+    i0 = int(np.argmin(points[:, 0]))
+    i1 = int(np.argmax(np.linalg.norm(points - points[i0], axis=1)))
+    u = points[i1] - points[i0]
+    d = np.linalg.norm(np.cross(points - points[i0], u), axis=1)
+    i2 = int(np.argmax(d))
+    if d[i2] <= eps*np.linalg.norm(u):
+        return None
+    w = np.cross(u, points[i2] - points[i0])
+    w = w/np.linalg.norm(w)
+    d = (points - points[i0]) @ w
+    i3 = int(np.argmax(np.abs(d)))
+    if abs(d[i3]) <= eps:
+        return None
+    if d[i3] > 0.0:
+        i1, i2 = i2, i1
+
+    # Every point outside the hull so far sits in the conflict list of one
+    #   face it can see, so each new apex only has its own fan of faces
+    #   tested against the points freed from the faces it replaces.  Faces
+    #   are keyed by their vertex triple
+    planes = {}
+    outside = {}
+    edge_face = {}
+    rest = np.setdiff1d(np.arange(n_pts), [i0, i1, i2, i3])
+    pending = add_faces(points, [(i0, i1, i2), (i0, i3, i1), (i1, i3, i2), (i2, i3, i0)],
+                        rest, planes, outside, edge_face, eps)
+    while pending:
+        face = pending.pop()
+        conflict = outside.pop(face, None)
+        if conflict is None:
+            continue
+        apex = conflict[np.argmax(points[conflict] @ planes[face][0])]
+        apex_point = points[apex]
+
+        # Faces seen from the apex form a connected patch around face, which
+        #   is replaced by a fan from the apex to its horizon
+        visible = {face}
+        todo = [face]
+        horizon = []
+        while todo:
+            a, b, c = todo.pop()
+            for edge in ((a, b), (b, c), (c, a)):
+                other = edge_face[(edge[1], edge[0])]
+                if other in visible:
+                    continue
+                normal, offset = planes[other]
+                if apex_point @ normal - offset > eps:
+                    visible.add(other)
+                    todo.append(other)
+                else:
+                    horizon.append(edge)
+
+        freed = [conflict]
+        for a, b, c in visible:
+            freed.append(outside.pop((a, b, c), np.zeros(0, dtype=np.int64)))
+            del planes[(a, b, c)]
+            for edge in ((a, b), (b, c), (c, a)):
+                del edge_face[edge]
+        freed = np.concatenate(freed)
+        freed = freed[freed != apex]
+        pending.extend(add_faces(points, [(a, b, apex) for a, b in horizon],
+                                 freed, planes, outside, edge_face, eps))
+
+    faces = np.array(list(planes), dtype=np.int64)
+    normals, offsets = face_planes(points, faces)
+    return faces, normals, offsets
+
+
+def add_faces(points, new_faces, candidates, planes, outside, edge_face, eps):
+    """ Add new_faces to the hull being built by convex_hull and hand each
+        of the candidate points to the new face it is farthest outside of.
+        Returns the new faces that have points outside """
+    new_faces = [tuple(int(i) for i in face) for face in new_faces]
+    normals, offsets = face_planes(points, np.array(new_faces))
+    for face, normal, offset in zip(new_faces, normals, offsets):
+        planes[face] = (normal, offset)
+        a, b, c = face
+        for edge in ((a, b), (b, c), (c, a)):
+            edge_face[edge] = face
+    if len(candidates) == 0:
+        return []
+
+    dist = points[candidates] @ normals.T - offsets
+    best = np.argmax(dist, axis=1)
+    out = dist[np.arange(len(candidates)), best] > eps
+    candidates = candidates[out]
+    best = best[out]
+    order = np.argsort(best, kind='stable')
+    owners, starts = np.unique(best[order], return_index=True)
+    pending = []
+    for owner, group in zip(owners, np.split(candidates[order], starts[1:])):
+        outside[new_faces[owner]] = group
+        pending.append(new_faces[owner])
+    return pending
+
+
+def face_planes(points, faces):
+    """ Return unit normals and plane offsets of triangles faces """
+    p0 = points[faces[:, 0]]
+    normals = np.cross(points[faces[:, 1]] - p0, points[faces[:, 2]] - p0)
+    length = np.linalg.norm(normals, axis=1)
+    length[length == 0.0] = 1.0
+    normals = normals/length[:, None]
+    return normals, np.einsum('ij,ij->i', normals, p0)
+
+
+def _interpolate(x_in, d_in, x_out, d_out):
+    # Always interpolate from the inside to the outside vertex so the two
+    #   triangles sharing an edge compute bitwise identical cut points
+    w = d_in/(d_in - d_out)
+    return x_in + (x_out - x_in)*w[:, None]
+
+
+def clip_triangles(tris, normal, offset):
+    """ Clip a triangle soup tris of shape (T,3,3) to the half-space
+        x.normal <= offset.  Returns (kept triangles, cut segments), where
+        each cut segment runs along the new open boundary in the direction
+        given by the orientation of its triangle """
+    d = (tris[:, :, 0]*normal[0] + tris[:, :, 1]*normal[1] +
+         tris[:, :, 2]*normal[2]) - offset
+    out = d > 0.0
+    if not out.any():
+        return tris, np.zeros((0, 2, 3))
+    n_out = out.sum(axis=1)
+    keep = [tris[n_out == 0]]
+    segs = []
+
+    for n_lone, lone_is_out in ((1, True), (2, False)):
+        sel = n_out == n_lone
+        if not sel.any():
+            continue
+        t = tris[sel]
+        td = d[sel]
+        # Rotate each triangle so its lone vertex comes first
+        lone = np.argmax(out[sel] == lone_is_out, axis=1)
+        order = (lone[:, None] + np.arange(3)) % 3
+        rows = np.arange(len(t))[:, None]
+        t = t[rows, order]
+        td = td[rows, order]
+        a, b, c = t[:, 0], t[:, 1], t[:, 2]
+        da, db, dc = td[:, 0], td[:, 1], td[:, 2]
+        if lone_is_out:
+            p_ab = _interpolate(b, db, a, da)
+            p_ca = _interpolate(c, dc, a, da)
+            keep.append(np.stack((p_ab, b, c), axis=1))
+            keep.append(np.stack((p_ab, c, p_ca), axis=1))
+            segs.append(np.stack((p_ca, p_ab), axis=1))
+        else:
+            p_ab = _interpolate(a, da, b, db)
+            p_ca = _interpolate(a, da, c, dc)
+            keep.append(np.stack((a, p_ab, p_ca), axis=1))
+            segs.append(np.stack((p_ab, p_ca), axis=1))
+
+    if segs:
+        segs = np.concatenate(segs)
+    else:
+        segs = np.zeros((0, 2, 3))
+    return np.concatenate(keep), segs
+
+
+def clip_segments(segs, normal, offset):
+    """ Clip segments of shape (S,2,3) to the half-space x.normal <= offset.
+        Returns (kept segments, index of the segment each was cut from,
+        crossing points, crossing is an exit, index of crossing segment) """
+    d = (segs[:, :, 0]*normal[0] + segs[:, :, 1]*normal[1] +
+         segs[:, :, 2]*normal[2]) - offset
+    out = d > 0.0
+    a_out = out[:, 0]
+    b_out = out[:, 1]
+    inside = ~a_out & ~b_out
+    exits = np.nonzero(~a_out & b_out)[0]
+    entries = np.nonzero(a_out & ~b_out)[0]
+
+    p_exit = _interpolate(segs[exits, 0], d[exits, 0], segs[exits, 1], d[exits, 1])
+    p_entry = _interpolate(segs[entries, 1], d[entries, 1], segs[entries, 0], d[entries, 0])
+    kept = np.concatenate((segs[inside],
+                           np.stack((segs[exits, 0], p_exit), axis=1),
+                           np.stack((p_entry, segs[entries, 1]), axis=1)))
+    crossing = np.concatenate((exits, entries))
+    kept_src = np.concatenate((np.nonzero(inside)[0], crossing))
+    points = np.concatenate((p_exit, p_entry))
+    is_exit = np.concatenate((np.ones(len(exits), dtype=bool),
+                              np.zeros(len(entries), dtype=bool)))
+    return kept, kept_src, points, is_exit, crossing
+
+
+def close_cap(points, is_exit, line_dir):
+    """ Return the segments that close a planar cap cut by a plane, given
+        the points where the cap boundary crosses the plane.  Walking along
+        the line of the cut in line_dir, the cap winding number goes up by
+        one at each exit and down by one at each entry, and every interval
+        between crossings is covered that many times.  Returns None when
+        the crossings do not pair up, so the cap cannot be closed """
+    order = np.argsort(points @ line_dir, kind='stable')
+    points = points[order]
+    winding = np.cumsum(np.where(is_exit[order], 1, -1))
+    if winding[-1] != 0:
+        return None
+    winding = winding[:-1]
+    start = points[:-1]
+    end = points[1:]
+    segs = np.where((winding > 0)[:, None, None],
+                    np.stack((start, end), axis=1),
+                    np.stack((end, start), axis=1))
+    return np.repeat(segs, np.abs(winding), axis=0)
+
+
+def weld(points):
+    """ Merge points with identical coordinates.  Returns (unique points,
+        index of the unique point for every input point) """
+    points = np.asarray(points).reshape(-1, 3)
+    unique, inverse = np.unique(points, axis=0, return_inverse=True)
+    return unique, inverse.reshape(-1)
+
+
+def signed_volumes(tris, origin):
+    """ Return the signed volume of the tetrahedron from origin to each
+        triangle of a soup of shape (T,3,3) """
+    a = tris[:, 0] - origin
+    b = tris[:, 1] - origin
+    c = tris[:, 2] - origin
+    return np.einsum('ij,ij->i', a, np.cross(b, c))/6.0
+
+
+def clip_to_planes(tris, normals, offsets):
+    """ Clip the surface of a closed triangle soup tris of shape (T,3,3) to
+        the intersection of the half-spaces x.normals[i] <= offsets[i].
+        Returns (clipped triangles, cap segments, plane index of each cap
+        segment), where the segments on each plane run counterclockwise
+        around its cap as seen from outside, or None if a cap could not be
+        closed """
+    caps = np.zeros((0, 2, 3))
+    cap_plane = np.zeros(0, dtype=np.int64)
+    for k in range(len(normals)):
+        if len(tris) == 0 and len(caps) == 0:
+            break
+        tris, segs = clip_triangles(tris, normals[k], offsets[k])
+        new_caps = [segs[:, ::-1]]
+
+        # Cut the caps of earlier planes and close each of them along the
+        #   line where its plane meets this one
+        caps, kept_src, points, is_exit, crossing = clip_segments(
+            caps, normals[k], offsets[k])
+        crossing_plane = cap_plane[crossing]
+        cap_plane = cap_plane[kept_src]
+        closing = []
+        closing_plane = []
+        for j in np.unique(crossing_plane):
+            on_j = crossing_plane == j
+            line_dir = np.cross(normals[j], normals[k])
+            close = close_cap(points[on_j], is_exit[on_j], line_dir)
+            if close is None:
+                return None
+            closing.append(close)
+            closing_plane.append(np.full(len(close), j))
+            new_caps.append(close[:, ::-1])
+
+        new_caps = np.concatenate(new_caps)
+        caps = np.concatenate([caps] + closing + [new_caps])
+        cap_plane = np.concatenate([cap_plane] + closing_plane +
+                                   [np.full(len(new_caps), k)])
+    return tris, caps, cap_plane
+
+
+def hull_intersection_volume(verts, tris, hull_points, offset=0.001):
+    """ Return the volume of the intersection of the closed mesh given by
+        verts and tris with the convex hull of hull_points, grown by offset.
+        When the intersection falls apart into several pieces only the
+        largest piece is counted.  Returns None if the hull points span no
+        volume (e.g. a flat PSD) or if the clipped surface could not be
+        closed, e.g. because the mesh is not closed """
+    hull_points = np.asarray(hull_points, dtype=np.float64)
+    hull = convex_hull(hull_points)
+    if hull is None:
+        return None
+    faces, normals, offsets = hull
+    hull_verts = hull_points[np.unique(faces)]
+
+    # Clip to the bounding box of the hull first, which cheaply discards
+    #   most of the mesh before clipping to the hull faces
+    lo = hull_verts.min(axis=0) - 2*offset
+    hi = hull_verts.max(axis=0) + 2*offset
+    normals = np.concatenate((np.eye(3), -np.eye(3), normals))
+    offsets = np.concatenate((hi, -lo, offsets + offset))
+
+    soup = np.asarray(verts, dtype=np.float64)[tris]
+    clipped = clip_to_planes(soup, normals, offsets)
+    if clipped is None:
+        return None
+    soup, caps, cap_plane = clipped
+    if len(soup) == 0 and len(caps) == 0:
+        return 0.0
+
+    # Each cap is a fan from a point on its plane over its boundary
+    origin = hull_verts.mean(axis=0)
+    foot = origin - (normals @ origin - offsets)[:, None]*normals
+    cap_tris = np.concatenate((foot[cap_plane][:, None], caps), axis=1)
+    vols = np.concatenate((signed_volumes(soup, origin),
+                           signed_volumes(cap_tris, origin)))
+
+    # Sum the volume of each connected piece and keep the largest
+    pts, idx = weld(np.concatenate((soup.reshape(-1, 3), caps.reshape(-1, 3))))
+    tri_idx = idx[:3*len(soup)].reshape(-1, 3)
+    seg_idx = idx[3*len(soup):].reshape(-1, 2)
+    edges = np.concatenate((tri_idx[:, [0, 1]], tri_idx[:, [1, 2]], seg_idx))
+    n_pieces, labels = components.label_components(len(pts), edges)
+    piece = labels[np.concatenate((tri_idx[:, 0], seg_idx[:, 0]))]
+    piece_vols = np.bincount(piece, weights=vols, minlength=n_pieces)
+    return float(np.abs(piece_vols).max())
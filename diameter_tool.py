@@ -43,6 +43,7 @@ import numpy as np
 globals()['neuropil_tools'] = importlib.import_module(__package__)
 #import neuropil_tools
 from .. import cellblender
+from . import mesh_arrays
 
 
 # Get spine neck of interest
@@ -122,47 +123,12 @@ class DiameterToolNeckProperty(bpy.types.PropertyGroup):
         reg.select_region_faces(context)
 
     def calculate_diameter(self, context, spine):
-        mesh = context.active_object.data
-        old_to_new_index = dict()
-        selected_vertices = list()
-        selected_faces = list()
-        required_vertices = set()
-
-        for face in mesh.polygons:
-            if face.select:
-                required_vertices.add(face.vertices[0])
-                required_vertices.add(face.vertices[1])
-                required_vertices.add(face.vertices[2])
-        for i, vertex in enumerate(mesh.vertices):
-            if i in required_vertices:
-                old_to_new_index[i] = len(selected_vertices)
-                selected_vertices.append(vertex)
-        for face in mesh.polygons:
-            if face.select:
-                newa = old_to_new_index[face.vertices[0]] + 1
-                newb = old_to_new_index[face.vertices[1]] + 1
-                newc = old_to_new_index[face.vertices[2]] + 1
-                selected_faces.append((newa, newb, newc))
-
-        cwd = bpy.path.abspath(os.path.dirname(__file__))
-        tmp_obj = cwd + "/tmp.obj"
-        exe = bpy.path.abspath(cwd + "/calc_diameter")
-
-        with open(tmp_obj, "w+") as of:
-            for vertex in selected_vertices:
-                of.write("v %f %f %f\n" % (vertex.co.x, vertex.co.y, vertex.co.z))
-            for p1, p2, p3 in selected_faces:
-                of.write("f %d %d %d\n" % (p1, p2, p3))
-
-        subprocess.call([exe, tmp_obj, cwd + "/"])
-
-        # [1:] means ignore the first row "# Segments: N"
-        diam_fn = cwd + "/tmp_diameters.txt"
-
-        metrics = [line.split() for line in open(diam_fn)][1:]
-        max_diameter = -1
-        for metric in metrics:
-            max_diameter = max(max_diameter, float(metric[0]))
+        obj = context.active_object
+        # Read the mesh in Object Mode so it reflects any pending edits
+        if obj.mode == 'EDIT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        reg = obj.mcell.regions.region_list[self.name]
+        max_diameter, min_diameter, median_diameter = mesh_arrays.get_region_diameters(reg, obj.data)
 
         return max_diameter
 
@@ -214,45 +180,10 @@ class DiameterToolObjectProperty(bpy.types.PropertyGroup):
             spn.select_spn(context)
 
     def set_n_components(self, context):
+        # Make sure mesh data is in sync with any edits before labeling
         bpy.ops.object.mode_set(mode='OBJECT')
         obj = context.active_object
-        mesh = obj.data
-
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.reveal()
-        bpy.ops.mesh.select_mode(type='VERT')
-        bpy.ops.mesh.select_all(action='DESELECT')
-
-        # Count total vertices and number of vertices contiguous with vertex 0
-        bpy.ops.object.mode_set(mode='OBJECT')
-        mesh.vertices[0].select = True
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_linked()
-        n_v_tot = len(mesh.vertices)
-        n_v_sel = mesh.total_vert_sel
-        bpy.ops.object.mode_set(mode='OBJECT')
-
-        # Loop over disjoint components
-        n_components = 1
-        while (n_v_sel < n_v_tot):
-            n_components += 1
-            # make list of selected indices
-            vl1 = [v.index for v in mesh.vertices if v.select]
-            # make list of indices of remaining component(s)
-            vl2 = [v.index for v in mesh.vertices if v.select == False]
-            # Grow selection with vertices contiguous with first vertex of
-            # remainder
-            mesh.vertices[vl2[0]].select = True
-            bpy.ops.object.mode_set(mode='EDIT')
-            bpy.ops.mesh.select_linked()
-
-            # Count number of vertices now selected and loop again if necessary
-            n_v_sel = mesh.total_vert_sel
-            bpy.ops.object.mode_set(mode='OBJECT')
-
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_mode(type='FACE')
-        bpy.ops.object.mode_set(mode='OBJECT')
+        n_components, labels = mesh_arrays.get_components(obj)
         self.n_components = n_components
 
     def calculate_diameter(self, context):
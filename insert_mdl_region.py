@@ -1,41 +1,70 @@
 #!/usr/bin/env python
 
+import glob
+import os
 import sys
 
 if (len(sys.argv)<3):
-  sys.stderr.write('\nUsage: %s mdl_geom_filename mdl_region_filename \n' % (sys.argv[0]))
-  sys.stderr.write('           Insert mdl region into mdl geometry\n')
+  sys.stderr.write('\nUsage: %s mdl_geom_filename mdl_region_filename [mdl_region_filename ...]\n' % (sys.argv[0]))
+  sys.stderr.write('           Insert mdl regions into mdl geometry\n')
+  sys.stderr.write('           Region files may also be given as directories or glob patterns\n')
   sys.stderr.write('           Output is written to stdout\n\n')
   exit(1)
 
+CHUNK_SIZE = 1 << 20
+
 mdl_geom_filename = sys.argv[1]
-mdl_region_filename = sys.argv[2]
 
+# Expand directories and glob patterns, keeping the order given
+mdl_region_filenames = []
+for arg in sys.argv[2:]:
+  if os.path.isdir(arg):
+    mdl_region_filenames.extend(sorted(glob.glob(os.path.join(arg, '*.mdl'))))
+  elif os.path.exists(arg):
+    mdl_region_filenames.append(arg)
+  else:
+    mdl_region_filenames.extend(sorted(glob.glob(arg)))
 
-mdl_geom = open(mdl_geom_filename)
 
-# Jump to end of file
-mdl_geom.seek(0, 2)
-pos = mdl_geom.tell()
+def copy_chunks(in_file, out_file, n_bytes=None):
+  while n_bytes == None or n_bytes > 0:
+    size = CHUNK_SIZE if n_bytes == None else min(CHUNK_SIZE, n_bytes)
+    data = in_file.read(size)
+    if not data:
+      break
+    out_file.write(data)
+    if n_bytes != None:
+      n_bytes -= len(data)
 
-# Look for last brace starting at end of file
-while mdl_geom.read(1) != '}':
-  pos -= 1
-  mdl_geom.seek(pos)
 
-# Jump to beginning of file
-mdl_geom.seek(0)
+out = sys.stdout.buffer
+mdl_geom = open(mdl_geom_filename, 'rb')
+
+# Look for last brace, reading the tail of the file a block at a time
+mdl_geom.seek(0, 2)
+end = mdl_geom.tell()
+pos = -1
+while end > 0 and pos < 0:
+  start = max(0, end - 4096)
+  mdl_geom.seek(start)
+  i = mdl_geom.read(end - start).rfind(b'}')
+  if i >= 0:
+    pos = start + i
+  end = start
+if pos < 0:
+  sys.stderr.write('No closing brace found in %s\n' % (mdl_geom_filename))
+  exit(1)
 
 # Write mdl geom file up to last brace
-sys.stdout.write(mdl_geom.read(pos))
+mdl_geom.seek(0)
+copy_chunks(mdl_geom, out, pos)
 mdl_geom.close()
 
-# Insert mdl region file in output 
-mdl_region = open(mdl_region_filename)
-sys.stdout.write(mdl_region.read())
-mdl_region.close()
-
-# Write terminating brace after region
-sys.stdout.write('}\n')
-
+# Insert mdl region files in output 
+for mdl_region_filename in mdl_region_filenames:
+  mdl_region = open(mdl_region_filename, 'rb')
+  copy_chunks(mdl_region, out)
+  mdl_region.close()
 
+# Write terminating brace after regions
+out.write(b'}\n')
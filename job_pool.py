@@ -0,0 +1,129 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""
+This file contains a bounded pool for running external command pipelines.
+
+Each job is a short list of commands run one after another.  Jobs run
+concurrently on worker threads that only wait on their subprocesses, and
+finished jobs are handed back to the caller as they complete so results
+can be consumed (for example imported into Blender) on the main thread.
+Where the platform has os.wait4, the CPU time and peak memory of each
+command are taken from its own resource usage.
+
+"""
+
+# python imports
+
+import concurrent.futures
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+class Job:
+    """ A named list of commands, each an argument list and an optional
+        file that receives its standard output """
+
+    def __init__(self, name, commands):
+        self.name = name
+        self.commands = commands
+        self.returncode = None
+        self.failed_command = None
+        self.error = ''
+        self.step_times = []
+        self.elapsed = 0.0
+        self.cpu = 0.0
+        self.peak_rss_mb = None
+
+    @property
+    def ok(self):
+        return(self.returncode == 0)
+
+    def run(self):
+        t_start = time.time()
+        self.returncode = 0
+        for argv, stdout_path in self.commands:
+            t_step = time.time()
+            try:
+                with tempfile.TemporaryFile() as output_file:
+                    if stdout_path != None:
+                        with open(stdout_path, 'w') as stdout_file:
+                            self.returncode = self.wait(argv, stdout_file, output_file)
+                    else:
+                        self.returncode = self.wait(argv, output_file, subprocess.STDOUT)
+                    output_file.seek(0)
+                    output = output_file.read()
+            except OSError as e:
+                self.returncode = -1
+                output = str(e).encode()
+            self.step_times.append(time.time() - t_step)
+            if self.returncode != 0:
+                self.failed_command = ' '.join(argv)
+                # Keep the tail, which is where tools report what went wrong
+                self.error = output.decode(errors='replace')[-2000:]
+                break
+        self.elapsed = time.time() - t_start
+        return(self)
+
+    def wait(self, argv, stdout, stderr):
+        """ Run one command to completion and add its CPU time and peak
+            memory to the job.  Returns the exit code """
+        proc = subprocess.Popen(argv, stdout=stdout, stderr=stderr)
+        if not hasattr(os, 'wait4'):
+            return(proc.wait())
+        # Reap the child ourselves, since Popen.wait() drops its resource usage
+        pid, status, usage = os.wait4(proc.pid, 0)
+        if os.WIFSIGNALED(status):
+            proc.returncode = -os.WTERMSIG(status)
+        else:
+            proc.returncode = os.WEXITSTATUS(status)
+        self.cpu += usage.ru_utime + usage.ru_stime
+        # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+        scale = 1.0/(1 << 20) if sys.platform == 'darwin' else 1.0/(1 << 10)
+        self.peak_rss_mb = round(max(self.peak_rss_mb or 0.0, usage.ru_maxrss*scale), 1)
+        return(proc.returncode)
+
+    def record(self, stage):
+        """ Return the stage_timer record of the finished job, its CPU
+            time all spent in child processes """
+        return({'stage': stage, 'name': self.name, 'ok': self.ok,
+                'wall': self.elapsed, 'cpu': 0.0, 'child_cpu': self.cpu,
+                'child_peak_rss_mb': self.peak_rss_mb, 'steps': self.step_times})
+
+    def summary(self):
+        steps = ' '.join(['%.2f' % (t) for t in self.step_times])
+        if self.ok:
+            return('%s  ok  %.2f s  %.2f s cpu  (steps: %s)' % (self.name, self.elapsed, self.cpu, steps))
+        return('%s  FAILED (%d)  %.2f s  %.2f s cpu  (steps: %s)  %s\n%s' %
+               (self.name, self.returncode, self.elapsed, self.cpu, steps,
+                self.failed_command, self.error))
+
+
+def run_jobs(jobs, max_workers=None):
+    """ Run jobs on at most max_workers threads (default: number of CPUs)
+        and yield each job as soon as it has finished """
+    if max_workers == None:
+        max_workers = os.cpu_count() or 1
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(job.run) for job in jobs]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
@@ -0,0 +1,371 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""
+This file contains helpers that read Blender mesh data into NumPy arrays.
+
+Mesh data is pulled in bulk with foreach_get rather than by iterating over
+MeshVertex and MeshPolygon objects one at a time, and written back in bulk
+with foreach_set.
+
+"""
+
+# python imports
+
+import hashlib
+import numpy as np
+
+from .core import components
+from .core import diameter
+from .core import geometry
+from .core import regions
+
+
+def get_vertices(mesh):
+    """ Return vertex coordinates of mesh as an (N,3) float array """
+    verts = np.empty(len(mesh.vertices)*3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', verts)
+    return verts.reshape(-1, 3).astype(np.float64)
+
+
+def get_world_vertices(obj):
+    """ Return vertex coordinates of obj transformed by its world matrix """
+    verts = get_vertices(obj.data)
+    t_mat = np.array(obj.matrix_world, dtype=np.float64)
+    return verts @ t_mat[:3, :3].T + t_mat[:3, 3]
+
+
+def get_triangles(mesh):
+    """ Return (tris, tri_face): the (M,3) vertex indices of all triangles
+        of mesh and the index of the polygon each triangle belongs to """
+    n_faces = len(mesh.polygons)
+    loop_total = np.empty(n_faces, dtype=np.int32)
+    mesh.polygons.foreach_get('loop_total', loop_total)
+
+    if np.all(loop_total == 3):
+        # Already triangulated, which is the normal case for our meshes
+        loop_start = np.empty(n_faces, dtype=np.int32)
+        mesh.polygons.foreach_get('loop_start', loop_start)
+        loop_vert = np.empty(len(mesh.loops), dtype=np.int32)
+        mesh.loops.foreach_get('vertex_index', loop_vert)
+        tris = loop_vert[loop_start[:, None] + np.arange(3)]
+        return tris, np.arange(n_faces)
+
+    mesh.calc_loop_triangles()
+    n_tris = len(mesh.loop_triangles)
+    tris = np.empty(n_tris*3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get('vertices', tris)
+    tri_face = np.empty(n_tris, dtype=np.int32)
+    mesh.loop_triangles.foreach_get('polygon_index', tri_face)
+    return tris.reshape(-1, 3), tri_face
+
+
+def get_edges(mesh):
+    """ Return the vertex indices of all edges of mesh as an (E,2) array """
+    edges = np.empty(len(mesh.edges)*2, dtype=np.int32)
+    mesh.edges.foreach_get('vertices', edges)
+    return edges.reshape(-1, 2)
+
+
+def get_polygons(mesh):
+    """ Return (face_verts, face_sizes): the vertex indices of all polygons
+        of mesh as one flat array and the number of vertices of each """
+    face_sizes = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_total', face_sizes)
+    face_verts = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', face_verts)
+    # Loops are stored in polygon order, so no reordering is needed
+    return face_verts, face_sizes
+
+
+def set_triangles(mesh, verts, tris):
+    """ Fill the empty mesh with vertices verts and triangles tris """
+    n_tris = len(tris)
+    mesh.vertices.add(len(verts))
+    mesh.vertices.foreach_set('co', np.asarray(verts, dtype=np.float32).ravel())
+    mesh.loops.add(n_tris*3)
+    mesh.loops.foreach_set('vertex_index', np.asarray(tris, dtype=np.int32).ravel())
+    mesh.polygons.add(n_tris)
+    mesh.polygons.foreach_set('loop_start', np.arange(0, n_tris*3, 3, dtype=np.int32))
+    # Blender 4 derives the loop counts from loop_start
+    if not mesh.polygons.bl_rna.properties['loop_total'].is_readonly:
+        mesh.polygons.foreach_set('loop_total', np.full(n_tris, 3, dtype=np.int32))
+    mesh.update(calc_edges=True)
+    mesh.validate()
+
+
+def topology_hash(n_verts, edges):
+    """ Return a digest identifying the vertex/edge connectivity of a mesh """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.int64(n_verts).tobytes())
+    h.update(np.ascontiguousarray(edges).tobytes())
+    return h.hexdigest()
+
+
+class RegionInputHasher:
+    """ Digests of the mesh data that measurements of regions depend on:
+        the faces of the regions and every triangle whose bounding box meets
+        the bounding box of a region grown by the hull offset, which covers
+        all of the mesh the grown convex hull of the region can intersect.
+        verts should be in the coordinates the volumes are computed in """
+
+    def __init__(self, verts, tris, tri_face, n_faces, offset=0.001):
+        self.verts = verts
+        self.tris = tris
+        self.n_faces = n_faces
+        self.offset = offset
+        self.tri_order, self.tri_starts = regions.face_triangle_index(tri_face, n_faces)
+        # Triangle bounding boxes sorted by their low x, so box queries only
+        #   look at a slab of them
+        tri_verts = verts[tris]
+        self.tri_lo = tri_verts.min(axis=1)
+        self.tri_hi = tri_verts.max(axis=1)
+        self.x_order = np.argsort(self.tri_lo[:, 0], kind='stable')
+        self.x_sorted = self.tri_lo[self.x_order, 0]
+        self.max_width = float((self.tri_hi[:, 0] - self.tri_lo[:, 0]).max()) if len(tris) else 0.0
+
+    def box_triangles(self, lo, hi):
+        """ Return the sorted indices of the triangles whose bounding boxes
+            overlap the box """
+        i0 = np.searchsorted(self.x_sorted, lo[0] - self.max_width, side='left')
+        i1 = np.searchsorted(self.x_sorted, hi[0], side='right')
+        cand = self.x_order[i0:i1]
+        cand = cand[np.all((self.tri_lo[cand] <= hi) & (self.tri_hi[cand] >= lo), axis=1)]
+        return np.sort(cand)
+
+    def digest(self, face_sets, settings=()):
+        """ Return a hex digest of settings (e.g. the object transform and
+            volume options), the faces in face_sets and the triangles and
+            vertex coordinates near each of them """
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr(tuple(settings)).encode())
+        for faces in face_sets:
+            faces = np.unique(np.asarray(faces, dtype=np.int64))
+            faces = faces[(faces >= 0) & (faces < self.n_faces)]
+            h.update(np.int64(len(faces)).tobytes())
+            h.update(faces.tobytes())
+            region_tris = self.tris[regions.face_set_triangles(self.tri_order, self.tri_starts, faces)]
+            if len(region_tris) == 0:
+                continue
+            used = self.verts[np.unique(region_tris)]
+            near = self.tris[self.box_triangles(used.min(axis=0) - self.offset,
+                                                used.max(axis=0) + self.offset)]
+            h.update(near.astype(np.int64).tobytes())
+            h.update(self.verts[near].tobytes())
+        return h.hexdigest()
+
+
+def get_region_hasher(obj):
+    """ Return a RegionInputHasher over the mesh of obj in world
+        coordinates, where hull volumes are computed """
+    mesh = obj.data
+    tris, tri_face = get_triangles(mesh)
+    return RegionInputHasher(get_world_vertices(obj), tris, tri_face, len(mesh.polygons))
+
+
+# Component labels of each object keyed by object name, stored together
+#   with the topology hash of the mesh they were computed from
+_component_cache = {}
+
+
+def get_components(obj):
+    """ Return (n_components, labels) of the mesh of obj, where labels gives
+        the component number of every vertex.  Labels are cached per object
+        and recomputed only when the mesh topology hash changes """
+    mesh = obj.data
+    n_verts = len(mesh.vertices)
+    edges = get_edges(mesh)
+    mesh_hash = topology_hash(n_verts, edges)
+
+    cached = _component_cache.get(obj.name)
+    if (cached != None) and (cached[0] == mesh_hash):
+        return cached[1], cached[2]
+
+    n_components, labels = components.label_components(n_verts, edges)
+    _component_cache[obj.name] = (mesh_hash, n_components, labels)
+    return n_components, labels
+
+
+# Face sets of MCell regions keyed by mesh name and then region name, each
+#   stored with the fingerprint of the region data it was decoded from.
+#   Entries are dropped when the region or the mesh is edited, and the
+#   fingerprint catches region data written behind the cache's back
+_face_set_cache = {}
+
+
+def region_fingerprint(reg, mesh):
+    """ Return a cheap fingerprint of the face data CellBlender stores for
+        region reg (its id and run length encoded face list in the mesh ID
+        properties), or None if the stored data cannot be found """
+    try:
+        stored = mesh['mcell']['regions'].get(str(reg.id))
+    except (KeyError, TypeError, AttributeError):
+        return None
+    if stored == None:
+        return (reg.id, 0, b'')
+    raw = np.asarray(stored.to_list() if hasattr(stored, 'to_list') else stored, dtype=np.int64)
+    return (reg.id, len(raw), hashlib.blake2b(raw.tobytes(), digest_size=8).digest())
+
+
+def get_region_face_set(reg, mesh):
+    """ Return the faces of MCell region reg as a core.FaceSet, decoding the
+        region only once until its stored face data or the mesh changes """
+    n_faces = len(mesh.polygons)
+    if mesh.is_editmode:
+        # Edits made in edit mode are only reported when it is left
+        return regions.FaceSet(n_faces, faces=np.fromiter(reg.get_region_faces(mesh), dtype=np.int64))
+    fingerprint = region_fingerprint(reg, mesh)
+    face_sets = _face_set_cache.setdefault(mesh.name, {})
+    cached = face_sets.get(reg.name)
+    if (cached != None) and (fingerprint != None) and (cached[0] == fingerprint) and \
+            (cached[1].n_faces == n_faces):
+        return cached[1]
+    face_set = regions.FaceSet(n_faces, faces=np.fromiter(reg.get_region_faces(mesh), dtype=np.int64))
+    if fingerprint != None:
+        face_sets[reg.name] = (fingerprint, face_set)
+    return face_set
+
+
+def get_region_faces(reg, mesh):
+    """ Return the face indices of MCell region reg as an integer array """
+    return get_region_face_set(reg, mesh).faces()
+
+
+def get_region_mask(reg, mesh):
+    """ Return the faces of MCell region reg as a boolean mask """
+    return get_region_face_set(reg, mesh).mask()
+
+
+def set_region_faces(reg, mesh, face_set):
+    """ Make the faces of MCell region reg those of face_set (a core.FaceSet
+        or face indices) and keep it in the cache """
+    if not isinstance(face_set, regions.FaceSet):
+        face_set = regions.FaceSet(len(mesh.polygons), faces=face_set)
+    reg.set_region_faces(mesh, set(face_set.faces().tolist()))
+    fingerprint = region_fingerprint(reg, mesh)
+    if fingerprint != None:
+        _face_set_cache.setdefault(mesh.name, {})[reg.name] = (fingerprint, face_set)
+
+
+def invalidate_region_faces(mesh, names=None):
+    """ Drop the cached face sets of the named regions of mesh, or of all
+        its regions """
+    if names == None:
+        _face_set_cache.pop(mesh.name, None)
+    else:
+        face_sets = _face_set_cache.get(mesh.name, {})
+        for name in names:
+            face_sets.pop(name, None)
+
+
+def clear_region_faces():
+    _face_set_cache.clear()
+
+
+def region_faces_update(depsgraph):
+    """ Drop the cached face sets of meshes whose geometry was updated,
+        which includes leaving edit mode after assigning region faces """
+    for update in depsgraph.updates:
+        if update.is_updated_geometry:
+            data = getattr(update.id, 'data', update.id)
+            name = getattr(data, 'name', None)
+            if name != None:
+                _face_set_cache.pop(name, None)
+
+
+def get_all_region_faces(obj, names=None):
+    """ Return {region name: face indices} for the MCell regions of obj,
+        or only for those whose names are in names """
+    mesh = obj.data
+    return {reg.name: get_region_faces(reg, mesh)
+            for reg in obj.mcell.regions.region_list
+            if (names == None) or (reg.name in names)}
+
+
+def sweep_object(obj, face_sets, moments=(), sections=()):
+    """ Read the mesh of obj once and measure the regions in face_sets with
+        core.sweep_regions.  Areas are in world coordinates, locations and
+        cross sections in object coordinates """
+    mesh = obj.data
+    verts = get_vertices(mesh)
+    t_mat = np.array(obj.matrix_world, dtype=np.float64)
+    world_verts = verts @ t_mat[:3, :3].T + t_mat[:3, 3]
+    tris, tri_face = get_triangles(mesh)
+    return regions.sweep_regions(verts, tris, tri_face, face_sets, world_verts,
+                                 moments, sections, len(mesh.polygons))
+
+
+def get_region_triangles(reg, mesh):
+    """ Return (verts, tris): all vertex coordinates of mesh and the
+        triangles belonging to the faces of MCell region reg """
+    verts = get_vertices(mesh)
+    tris, tri_face = get_triangles(mesh)
+    return verts, regions.region_triangles(tris, tri_face, get_region_faces(reg, mesh))
+
+
+def get_region_diameters(reg, mesh):
+    """ Return (max, min, median) diameters of the cross sections of MCell
+        region reg across its principal axis """
+    verts, tris = get_region_triangles(reg, mesh)
+    return diameter.diameter_stats(diameter.slice_diameters(verts, tris))
+
+
+class RegionAreaEngine:
+    """ Areas of all faces of a mesh object in world coordinates, computed in
+        one pass so that the area of any region is a masked sum """
+
+    def __init__(self, obj):
+        self.mesh = obj.data
+        verts = get_world_vertices(obj)
+        tris, tri_face = get_triangles(self.mesh)
+        self.face_areas = geometry.face_areas(
+            verts, tris, tri_face, len(self.mesh.polygons))
+
+    def area(self, faces):
+        return geometry.masked_area(self.face_areas, faces)
+
+    def region_area(self, reg):
+        return self.area(get_region_faces(reg, self.mesh))
+
+
+class RegionMomentEngine:
+    """ Vertex coordinates and triangles of a mesh object read once, so the
+        centroids and principal axes of many regions can be computed without
+        selecting them in edit mode """
+
+    def __init__(self, obj):
+        self.mesh = obj.data
+        self.verts = get_vertices(self.mesh)
+        self.tris, self.tri_face = get_triangles(self.mesh)
+
+    def moments(self, faces):
+        return regions.region_moments(
+            self.verts, regions.region_triangles(self.tris, self.tri_face, faces))
+
+    def region_moments(self, reg):
+        return self.moments(get_region_faces(reg, self.mesh))
+
+    def region_centroids(self, regs):
+        """ Return {region name: centroid} for the MCell regions regs,
+            leaving out empty regions """
+        regs = list(regs)
+        centroids = regions.region_centroids(
+            self.verts, self.tris, self.tri_face,
+            [get_region_faces(reg, self.mesh) for reg in regs], len(self.mesh.polygons))
+        return {reg.name: c for reg, c in zip(regs, centroids) if not np.isnan(c[0])}
@@ -0,0 +1,86 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+
+# <pep8 compliant>
+
+"""
+This file contains readers and writers for the mesh files exchanged with
+the tiling and tagging tools.
+
+The .rawc files written by ContourTilerBin and volFixAll hold a header with
+the vertex and triangle counts, one line per vertex (coordinates followed by
+a color) and one line per triangle with zero-based vertex indices.  They are
+parsed straight into NumPy arrays so meshes can be built without going
+through an intermediate .obj file.  OBJ files for the tagger are formatted
+from arrays in a few bulk calls rather than one write per vertex and face.
+
+"""
+
+# python imports
+
+import numpy as np
+
+
+def read_rawc(file_name):
+    """ Return (verts, tris) of a raw/rawc/rawnc file as an (N,3) float
+        array and an (M,3) int array """
+    with open(file_name, 'r') as f:
+        header = f.readline().split()
+        n_verts = int(header[0])
+        n_tris = int(header[1])
+        lines = f.read().splitlines()
+    if len(lines) < n_verts + n_tris:
+        raise ValueError('Truncated mesh file: %s' % (file_name))
+
+    # Vertex lines may carry normals and colors after the coordinates, so
+    #   the blocks are split by the counts in the header
+    verts = read_block(file_name, lines[:n_verts], n_verts)
+    tris = read_block(file_name, lines[n_verts:n_verts + n_tris], n_tris)
+    return(np.ascontiguousarray(verts), tris.astype(np.int32))
+
+
+def read_block(file_name, lines, n_rows):
+    """ Return the first three columns of n_rows lines of numbers as an
+        (n_rows,3) float array """
+    if n_rows == 0:
+        return(np.zeros((0, 3)))
+    data = np.fromstring(' '.join(lines), dtype=np.float64, sep=' ')
+    n_cols = len(data)//n_rows
+    if n_cols < 3 or n_cols*n_rows != len(data):
+        raise ValueError('Malformed mesh file: %s' % (file_name))
+    return(data.reshape(n_rows, n_cols)[:, :3])
+
+
+def write_obj(file_name, verts, face_verts, face_sizes):
+    """ Write an OBJ file with vertices verts and faces given by the flat
+        array of their vertex indices face_verts and the number of vertices
+        of each face face_sizes """
+    face_verts = np.asarray(face_verts) + 1
+    face_sizes = np.asarray(face_sizes)
+    with open(file_name, 'w', buffering=1 << 20) as f:
+        np.savetxt(f, verts, fmt='v %f %f %f')
+        if len(face_sizes) == 0:
+            return
+        k = int(face_sizes[0])
+        if np.all(face_sizes == k):
+            np.savetxt(f, face_verts.reshape(-1, k), fmt='f' + ' %d'*k)
+        else:
+            # Mixed face sizes, split the formatted indices per face
+            idx = face_verts.astype(str)
+            starts = np.cumsum(face_sizes)[:-1]
+            f.write(''.join(['f %s\n' % (' '.join(face)) for face in np.split(idx, starts)]))
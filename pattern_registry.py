@@ -0,0 +1,117 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+
+# <pep8 compliant>
+
+"""
+This file contains a registry of compiled name patterns.
+
+Each regex is compiled once, and the result of matching it against a name
+is remembered, so UI list filters and processing loops that test the same
+names over and over only pay for a dictionary lookup.  Results are kept
+per regex, so editing a pattern or renaming an object simply produces keys
+that have not been seen yet; forget() drops the results of a regex that is
+no longer in use.
+
+"""
+
+# python imports
+
+import collections
+import functools
+import re
+
+
+# Upper bounds on remembered results per regex and on remembered regexes,
+#   to keep memory in check when every edit of a UI list filter is a new regex
+MAX_NAMES = 1 << 18
+MAX_REGEXES = 256
+
+# Results of the most recently used regexes, least recently used first
+_matches = collections.OrderedDict()
+
+
+@functools.lru_cache(maxsize=256)
+def compile_regex(regex):
+    return(re.compile(regex))
+
+
+def pattern_regex(pattern):
+    """ Convert a name pattern using '#' for a digit and '*' for any
+        characters into a regex """
+    return(pattern.replace('#', '[0-9]').replace('*', '.*'))
+
+
+def fullmatch(regex, name):
+    """ Return True if name fully matches regex """
+    results = _matches.get(regex)
+    if results == None:
+        if len(_matches) >= MAX_REGEXES:
+            _matches.popitem(last=False)
+        results = _matches[regex] = {}
+    else:
+        _matches.move_to_end(regex)
+    hit = results.get(name)
+    if hit == None:
+        if len(results) >= MAX_NAMES:
+            results.clear()
+        hit = results[name] = compile_regex(regex).fullmatch(name) != None
+    return(hit)
+
+
+def match_flags(regex, names):
+    """ Return a list of booleans telling which of names fully match regex """
+    return([fullmatch(regex, name) for name in names])
+
+
+def forget(regex=None):
+    """ Drop the remembered results of regex, or of all regexes """
+    if regex == None:
+        _matches.clear()
+    else:
+        _matches.pop(regex, None)
+
+
+def contact_regex(contact_pattern):
+    """ Return the regex matching the full contact name of a contact pattern """
+    return(contact_pattern.base_name_1_regex + contact_pattern.contact_name_regex +
+           contact_pattern.base_name_2_regex)
+
+
+def is_base(contact_pattern, name):
+    """ Return True if name matches either base name of a contact pattern """
+    return(fullmatch(contact_pattern.base_name_1_regex, name) or
+           fullmatch(contact_pattern.base_name_2_regex, name))
+
+
+def is_contact(contact_pattern, name):
+    return(fullmatch(contact_regex(contact_pattern), name))
+
+
+def contact_part_name(contact_pattern, name, label):
+    """ Return the name of a part of contact name (spine head, whole spine,
+        neck, ...), made by replacing the contact label in the contact part
+        of the name with label.  Returns None if name is not a contact of
+        the pattern """
+    regex = '(' + contact_pattern.base_name_1_regex + ')(' + \
+        contact_pattern.contact_name_regex + ')(' + contact_pattern.base_name_2_regex + ')'
+    c_m = compile_regex(regex).fullmatch(name)
+    if c_m == None:
+        return(None)
+    c_label = re.sub(r'[#*]', '', contact_pattern.contact_name_pattern)
+    return(c_m.group(1) + re.sub(c_label, label, c_m.group(2)) + c_m.group(3))
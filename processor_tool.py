@@ -29,6 +29,7 @@ import subprocess
 import importlib
 import os
 import re
+import time
 
 # blender imports
 import bpy
@@ -49,6 +50,13 @@ import glob
 globals()['neuropil_tools'] = importlib.import_module(__package__)
 #import neuropil_tools
 from .. import cellblender
+from . import contour_index
+from . import contact_tagger
+from . import job_pool
+from . import mesh_arrays
+from . import mesh_io
+from . import pattern_registry
+from . import stage_timer
 
 
 #Define Operators
@@ -69,13 +77,9 @@ def filter_items_by_pattern(self, context, data, propname):
   filt_pat = self.filter_name
   if filt_pat:
     # convert filter patterns to formal regex
-    filt_pat = self.filter_name
-    filt_regex = filt_pat.replace('#','[0-9]')
-    filt_regex = filt_regex.replace('*','.*')
-  
-    filt_recomp = re.compile(filt_regex)
+    filt_regex = pattern_registry.pattern_regex(filt_pat)
           
-    flt_flags = [ self.bitflag_filter_item*((filt_recomp.fullmatch(item.name)!=None)) for item in items ]
+    flt_flags = [ self.bitflag_filter_item*hit for hit in pattern_registry.match_flags(filt_regex, [item.name for item in items]) ]
   else:
     flt_flags = [self.bitflag_filter_item]*len(items)
 
@@ -96,9 +100,11 @@ class NEUROPIL_OT_impser(bpy.types.Operator, ImportHelper):
     filename_ext = ".ser"
     filter_glob: StringProperty(default="*.ser", options={'HIDDEN'})
     filepath: StringProperty(subtype='FILE_PATH')
+    use_cache: BoolProperty(name="Use Contour Index Cache", default=True,
+        description="Only re-read section files changed since the series was last opened")
 
     def execute(self, context):  
-        context.scene.test_tool.generate_contour_list(context,self.filepath)
+        context.scene.test_tool.generate_contour_list(context,self.filepath,self.use_cache)
         return {'FINISHED'}
 
     def invoke(self, context, event):
@@ -254,6 +260,17 @@ class NEUROPIL_OT_smooth_all(bpy.types.Operator):
         return {'FINISHED'}
 
 
+class NEUROPIL_OT_clear_stage_timing(bpy.types.Operator):
+    bl_idname = "processor_tool.clear_stage_timing"
+    bl_label = "Clear Pipeline Timing"
+    bl_description = "Clear the pipeline timing summary (the run log file is kept)"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        stage_timer.log.clear()
+        return {'FINISHED'}
+
+
 class NEUROPIL_OT_tag_contact_single(bpy.types.Operator):
     bl_idname = "processor_tool.tag_contact_single"
     bl_label = "Tag Contact Regions On Single Object Selected in Object List"
@@ -446,13 +463,7 @@ class NEUROPIL_UL_obj_draw_item(bpy.types.UIList):
       flt_neworder = []
 
       if self.use_base_name_filter and contact_pattern:
-        bn1_regex = contact_pattern.base_name_1_regex
-        bn2_regex = contact_pattern.base_name_2_regex
-  
-        bn1_recomp = re.compile(bn1_regex)
-        bn2_recomp = re.compile(bn2_regex)
-          
-        flt_flags = [ self.bitflag_filter_item*((bn1_recomp.fullmatch(obj.name)!=None) or (bn2_recomp.fullmatch(obj.name)!=None)) for obj in objs ]
+        flt_flags = [ self.bitflag_filter_item*pattern_registry.is_base(contact_pattern, obj.name) for obj in objs ]
       else:
         flt_flags = [self.bitflag_filter_item]*len(objs)
 
@@ -478,12 +489,93 @@ def pattern_change_callback(self,context):
   return
 
 
+def set_timing_log(context):
+  """ Append stage timing records to pipeline_timing.jsonl in the output
+      directory of the current series, or Blender's temporary directory """
+  filepath = context.scene.test_tool.filepath
+  out_dir = bpy.app.tempdir
+  if filepath:
+    ser_dir, ser_file = os.path.split(filepath)
+    out_dir = os.path.join(ser_dir, os.path.splitext(ser_file)[0] + '_output')
+  if out_dir and os.path.isdir(out_dir):
+    stage_timer.log.file_name = os.path.join(out_dir, 'pipeline_timing.jsonl')
+  else:
+    stage_timer.log.file_name = None
+
+
+def run_meshalyzer(context):
+  with stage_timer.log.stage('meshalyzer', triangles=len(context.active_object.data.polygons)):
+    bpy.ops.mcell.meshalyzer()
+
+
+# Seconds without further pattern edits before match lists are updated
+MATCH_LIST_DELAY = 0.4
+
+# Contact pattern index -> base name regexes it had before pending edits,
+#   and None -> base name regexes of removed contact patterns
+pending_pattern_changes = {}
+
+
+def schedule_match_list_update(index, old_regexes):
+  pending_pattern_changes.setdefault(index, old_regexes)
+  if bpy.app.timers.is_registered(apply_match_list_updates):
+    bpy.app.timers.unregister(apply_match_list_updates)
+  bpy.app.timers.register(apply_match_list_updates, first_interval=MATCH_LIST_DELAY)
+
+
+def schedule_pattern_removal(index, old_regexes):
+  """ Schedule the match list update for removing the contact pattern at
+      index, whose base name regexes were old_regexes.  Pending edits of
+      the patterns after it move down with them """
+  removed = tuple(old_regexes) + pending_pattern_changes.pop(index, ()) + \
+            pending_pattern_changes.pop(None, ())
+  for i in sorted(i for i in pending_pattern_changes if i > index):
+    pending_pattern_changes[i-1] = pending_pattern_changes.pop(i)
+  schedule_match_list_update(None, removed)
+
+
+def apply_match_list_updates():
+  """ Update the match lists of the objects whose base name match status
+      may have changed under the pending pattern edits """
+  context = bpy.context
+  changes = dict(pending_pattern_changes)
+  pending_pattern_changes.clear()
+  contact_pattern_list = context.scene.test_tool.contact_pattern_list
+  n_updated = 0
+  for obj in context.scene.collection.children[0].objects:
+    name = obj.name
+    for index, old_regexes in changes.items():
+      if (index != None) and (index >= len(contact_pattern_list)):
+        affected = True
+      else:
+        affected = any(pattern_registry.fullmatch(regex, name) for regex in old_regexes) or \
+                   ((index != None) and pattern_registry.is_base(contact_pattern_list[index], name))
+      if affected:
+        if obj.processor.update_contact_pattern_match_list(context, obj):
+          n_updated += 1
+        break
+  print('Updated contact pattern match lists of %d objects' % (n_updated))
+  return None
+
+
 class ContourNameSceneProperty(bpy.types.PropertyGroup):
     name: StringProperty(name= "Contour name", default ="")
+    first_section: IntProperty(name="First Section", default=0)
+    last_section: IntProperty(name="Last Section", default=0)
+    n_sections: IntProperty(name="Number of Sections", default=0)
+    n_traces: IntProperty(name="Number of Traces", default=0)
+    bbox: FloatVectorProperty(name="Bounding Box", size=6, default=(0.0,)*6)
     
     def init_contour(self,context,name):
         self.name = name
 
+    def set_info(self, info):
+        self.first_section = info.sections[0]
+        self.last_section = info.sections[-1]
+        self.n_sections = len(info.sections)
+        self.n_traces = info.n_traces
+        self.bbox = info.bbox
+
 
 class ContactPatternObjectProperty(bpy.types.PropertyGroup):
     name: StringProperty(name= "Contact Object Pattern", default ="")
@@ -510,21 +602,27 @@ class ContactPatternSceneProperty(bpy.types.PropertyGroup):
         self.name = self.base_name_1_pattern + self.contact_name_pattern + self.base_name_2_pattern
         # FIXME:  Check for uniqueness of name here:
 
+        old_regexes = (self.base_name_1_regex, self.base_name_2_regex)
+
+        # drop match results of the regexes being replaced
+        pattern_registry.forget(self.base_name_1_regex)
+        pattern_registry.forget(self.base_name_2_regex)
+        pattern_registry.forget(pattern_registry.contact_regex(self))
+
         # convert patterns to formal regex
-        bn1_regex = self.base_name_1_pattern.replace('#','[0-9]')
-        bn1_regex = bn1_regex.replace('*','.*')
-        bn2_regex = self.base_name_2_pattern.replace('#','[0-9]')
-        bn2_regex = bn2_regex.replace('*','.*')
-        c_regex = self.contact_name_pattern.replace('#','[0-9]')
-        c_regex = c_regex.replace('*','.*')
+        bn1_regex = pattern_registry.pattern_regex(self.base_name_1_pattern)
+        bn2_regex = pattern_registry.pattern_regex(self.base_name_2_pattern)
+        c_regex = pattern_registry.pattern_regex(self.contact_name_pattern)
 
         self.base_name_1_regex = bn1_regex
         self.base_name_2_regex = bn2_regex
         self.contact_name_regex = c_regex
 
-        # update (rebuild) match list for each object
-        for obj in bpy.context.scene.collection.children[0].objects:
-           obj.processor.update_contact_pattern_match_list(context, obj)
+        # update match lists once typing has stopped
+        contact_pattern_list = context.scene.test_tool.contact_pattern_list
+        for index, contact_pattern in enumerate(contact_pattern_list):
+          if contact_pattern.as_pointer() == self.as_pointer():
+            schedule_match_list_update(index, old_regexes)
         return
 
 
@@ -568,29 +666,30 @@ class ProcessorToolObjectProperty(bpy.types.PropertyGroup):
 
 
     def update_contact_pattern_match_list(self, context, obj):
-      # Clear current match list
-      self.contact_pattern_match_list.clear()
-
-      # Rebuild match list
+      """ Bring the match list in line with the scene contact patterns,
+          writing only entries that differ, and return True if any did """
       contact_pattern_list = bpy.context.scene.test_tool.contact_pattern_list
-      for contact_pattern in contact_pattern_list:
-        bn1_regex = contact_pattern.base_name_1_regex
-        bn2_regex = contact_pattern.base_name_2_regex
-
-        bn1_recomp = re.compile(bn1_regex)
-        bn2_recomp = re.compile(bn2_regex)
-
-        if bn1_recomp.fullmatch(obj.name) or bn2_recomp.fullmatch(obj.name):
-          new_match_pattern = self.contact_pattern_match_list.add()
-          new_match_pattern.name = contact_pattern.name
-          new_match_pattern.base_name_1_pattern = contact_pattern.base_name_1_pattern
-          new_match_pattern.base_name_2_pattern = contact_pattern.base_name_2_pattern
-          new_match_pattern.contact_name_pattern = contact_pattern.contact_name_pattern
-          new_match_pattern.base_name_1_regex = contact_pattern.base_name_1_regex
-          new_match_pattern.base_name_2_regex = contact_pattern.base_name_2_regex
-          new_match_pattern.contact_name_regex = contact_pattern.contact_name_regex
+      matches = [ contact_pattern for contact_pattern in contact_pattern_list if pattern_registry.is_base(contact_pattern, obj.name) ]
+
+      match_list = self.contact_pattern_match_list
+      changed = False
+      while len(match_list) > len(matches):
+        match_list.remove(len(match_list)-1)
+        changed = True
+      while len(match_list) < len(matches):
+        match_list.add()
+        changed = True
+
+      fields = ('name', 'base_name_1_pattern', 'base_name_2_pattern', 'contact_name_pattern',
+                'base_name_1_regex', 'base_name_2_regex', 'contact_name_regex')
+      for match_pattern, contact_pattern in zip(match_list, matches):
+        for field in fields:
+          value = getattr(contact_pattern, field)
+          if getattr(match_pattern, field) != value:
+            setattr(match_pattern, field, value)
+            changed = True
         
-      return
+      return(changed)
           
 
     def select_obj(self, context, obj):
@@ -605,44 +704,10 @@ class ProcessorToolObjectProperty(bpy.types.PropertyGroup):
         bpy.ops.object.mode_set(mode = 'OBJECT')
 
     def set_n_components(self,context):
+        # Make sure mesh data is in sync with any edits before labeling
         bpy.ops.object.mode_set(mode='OBJECT')
         obj = context.active_object
-        mesh = obj.data
-
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.reveal()
-        bpy.ops.mesh.select_mode(type='VERT')
-        bpy.ops.mesh.select_all(action='DESELECT')
-
-        # Count total vertices and number of vertices contiguous with vertex 0
-        bpy.ops.object.mode_set(mode='OBJECT')
-        mesh.vertices[0].select = True
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_linked()
-        n_v_tot = len(mesh.vertices)
-        n_v_sel = mesh.total_vert_sel
-        bpy.ops.object.mode_set(mode='OBJECT')
-
-        # Loop over disjoint components
-        n_components = 1
-        while (n_v_sel < n_v_tot):
-            n_components += 1
-            # make list of selected indices
-            vl1 = [v.index for v in mesh.vertices if v.select == True]
-            # make list of indices of remaining component(s)
-            vl2 = [v.index for v in mesh.vertices if v.select == False]
-            # Grow selection with vertices contiguous with first vertex of remainder
-            mesh.vertices[vl2[0]].select = True
-            bpy.ops.object.mode_set(mode='EDIT')
-            bpy.ops.mesh.select_linked()
-
-            # Count number of vertices now selected and loop again if necessary
-            n_v_sel = mesh.total_vert_sel
-            bpy.ops.object.mode_set(mode='OBJECT')
-
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_mode(type='FACE')
-        bpy.ops.object.mode_set(mode='OBJECT')
+        n_components, labels = mesh_arrays.get_components(obj)
         self.n_components = n_components
 
 
@@ -651,51 +716,54 @@ class ProcessorToolObjectProperty(bpy.types.PropertyGroup):
           """ Smooth using GAMer """
           print('Smoothing: %s' % (context.active_object.name))
 
-          gamer_version = context.scene.gamer.gamer_version[1]
-          if gamer_version == '2':
-            # We have found GAMer version 2
-            print('Using GAMer_v2')
-            gamer_smiprops = context.scene.gamer.surfmesh_improvement_properties
-            gamer_smiprops.dense_rate = 2.5
-            gamer_smiprops.dense_iter = 1
-            gamer_smiprops.smooth_iter = 10
-            gamer_smiprops.preserve_ridges = True
-          else:
-            # We have found GAMer version 1
-            print('Using GAMer_v1')
-            gamer_mip = context.scene.gamer.mesh_improve_panel
-            gamer_mip.dense_rate = 2.5
-            gamer_mip.dense_iter = 1
-            gamer_mip.max_min_angle = 20.0
-            gamer_mip.smooth_iter = 10
-            gamer_mip.preserve_ridges = True
+          set_timing_log(context)
+          obj = context.active_object
+          with stage_timer.log.stage('gamer_smooth', object=obj.name, triangles=len(obj.data.polygons)) as record:
+            gamer_version = context.scene.gamer.gamer_version[1]
+            if gamer_version == '2':
+              # We have found GAMer version 2
+              print('Using GAMer_v2')
+              gamer_smiprops = context.scene.gamer.surfmesh_improvement_properties
+              gamer_smiprops.dense_rate = 2.5
+              gamer_smiprops.dense_iter = 1
+              gamer_smiprops.smooth_iter = 10
+              gamer_smiprops.preserve_ridges = True
+            else:
+              # We have found GAMer version 1
+              print('Using GAMer_v1')
+              gamer_mip = context.scene.gamer.mesh_improve_panel
+              gamer_mip.dense_rate = 2.5
+              gamer_mip.dense_iter = 1
+              gamer_mip.max_min_angle = 20.0
+              gamer_mip.smooth_iter = 10
+              gamer_mip.preserve_ridges = True
   
-          bpy.ops.object.mode_set(mode='EDIT')
-          # Note: can create self-intersections:
-          #bpy.ops.mesh.beautify_fill(angle_limit=1.57)
-          #bpy.ops.mesh.subdivide(number_cuts=2)
-          #bpy.ops.mesh.subdivide(number_cuts=1)
-          if gamer_version == '2':
             bpy.ops.object.mode_set(mode='EDIT')
-          else:
+            # Note: can create self-intersections:
+            #bpy.ops.mesh.beautify_fill(angle_limit=1.57)
+            #bpy.ops.mesh.subdivide(number_cuts=2)
+            #bpy.ops.mesh.subdivide(number_cuts=1)
+            if gamer_version == '2':
+              bpy.ops.object.mode_set(mode='EDIT')
+            else:
+              bpy.ops.object.mode_set(mode='OBJECT')
+            bpy.ops.npt_gamer.smooth('INVOKE_DEFAULT')      
+            bpy.ops.npt_gamer.coarse_dense('INVOKE_DEFAULT')
+            bpy.ops.npt_gamer.smooth('INVOKE_DEFAULT')      
+            bpy.ops.npt_gamer.coarse_dense('INVOKE_DEFAULT')
+            bpy.ops.npt_gamer.smooth('INVOKE_DEFAULT')      
+            bpy.ops.npt_gamer.coarse_dense('INVOKE_DEFAULT')
+            bpy.ops.npt_gamer.smooth('INVOKE_DEFAULT')      
+            bpy.ops.npt_gamer.coarse_dense('INVOKE_DEFAULT')
+            bpy.ops.npt_gamer.smooth('INVOKE_DEFAULT')
             bpy.ops.object.mode_set(mode='OBJECT')
-          bpy.ops.npt_gamer.smooth('INVOKE_DEFAULT')      
-          bpy.ops.npt_gamer.coarse_dense('INVOKE_DEFAULT')
-          bpy.ops.npt_gamer.smooth('INVOKE_DEFAULT')      
-          bpy.ops.npt_gamer.coarse_dense('INVOKE_DEFAULT')
-          bpy.ops.npt_gamer.smooth('INVOKE_DEFAULT')      
-          bpy.ops.npt_gamer.coarse_dense('INVOKE_DEFAULT')
-          bpy.ops.npt_gamer.smooth('INVOKE_DEFAULT')      
-          bpy.ops.npt_gamer.coarse_dense('INVOKE_DEFAULT')
-          bpy.ops.npt_gamer.smooth('INVOKE_DEFAULT')
-          bpy.ops.object.mode_set(mode='OBJECT')
-          bpy.ops.npt_gamer.normal_smooth('INVOKE_DEFAULT')
-          bpy.ops.npt_gamer.normal_smooth('INVOKE_DEFAULT')
-          bpy.ops.npt_gamer.normal_smooth('INVOKE_DEFAULT')
-          bpy.ops.npt_gamer.normal_smooth('INVOKE_DEFAULT')
-          self.smoothed = True
-          obj = context.active_object
-          obj.processor.update_contact_pattern_match_list(context, obj)
+            bpy.ops.npt_gamer.normal_smooth('INVOKE_DEFAULT')
+            bpy.ops.npt_gamer.normal_smooth('INVOKE_DEFAULT')
+            bpy.ops.npt_gamer.normal_smooth('INVOKE_DEFAULT')
+            bpy.ops.npt_gamer.normal_smooth('INVOKE_DEFAULT')
+            self.smoothed = True
+            record['triangles_out'] = len(obj.data.polygons)
+            obj.processor.update_contact_pattern_match_list(context, obj)
         else:
           print('Not smoothing object, already smoothed: %s' % (context.active_object.name))
 
@@ -703,26 +771,18 @@ class ProcessorToolObjectProperty(bpy.types.PropertyGroup):
 
 
     # Export object in Wavefront OBJ file format
-    def export_obj(self, context, obj, obj_file_name):
+    def export_obj(self, context, obj, obj_file_name, world=False):
 
         m = obj.data
-        obj_file =  open(obj_file_name, 'w')
-
-        # Export vertices
-        for v in m.vertices:
-          obj_file.write('v %f %f %f\n' % (v.co.x, v.co.y, v.co.z))
-
-#        obj_file.write('s off\n')
-        # Export polygons
-        for p in m.polygons:
-          obj_file.write('f')
-          for idx in p.vertices:
-            obj_file.write(' %d' % (idx+1))
-          obj_file.write('\n')
-        obj_file.close()
+        if world:
+          verts = mesh_arrays.get_world_vertices(obj)
+        else:
+          verts = mesh_arrays.get_vertices(m)
+        face_verts, face_sizes = mesh_arrays.get_polygons(m)
+        mesh_io.write_obj(obj_file_name, verts, face_verts, face_sizes)
 
 
-    def tag_object(self, context, b_obj):
+    def tag_object(self, context, b_obj, index=None):
         """ Assign Contact metadata from Boolean intersection of Contact Object and Base Object """
 
         cwd = bpy.path.abspath(os.path.dirname(__file__))
@@ -737,33 +797,10 @@ class ProcessorToolObjectProperty(bpy.types.PropertyGroup):
         b_obj_name = b_obj.name
         print('Tagging Object: ' + b_obj_name)
 
-        contact_pattern_match_list = self.contact_pattern_match_list
-        c_objs = []
-        for contact_pattern in contact_pattern_match_list:
-          print('Contact Pattern: ' + contact_pattern.name)
-          print('BN1 pat:' + contact_pattern.base_name_1_pattern)
-          print('BN2 pat:' + contact_pattern.base_name_2_pattern)
-
-          bn1_regex = contact_pattern.base_name_1_regex
-          bn2_regex = contact_pattern.base_name_2_regex
-          c_regex = contact_pattern.contact_name_regex
-
-          bn1_recomp = re.compile(bn1_regex)
-          bn2_recomp = re.compile(bn2_regex)
-
-          print('BN1 regex: ' + bn1_regex)
-          print('BN2 regex: ' + bn2_regex)
-
-          if bn1_recomp.fullmatch(b_obj_name):
-            c_obj_regex = b_obj_name + c_regex + bn2_regex
-            c_obj_recomp = re.compile(c_obj_regex)
-            c_objs.extend([ obj.name for obj in objs if c_obj_recomp.fullmatch(obj.name) ])
-
-          if bn2_recomp.fullmatch(b_obj_name):
-            c_obj_regex = bn1_regex + c_regex + b_obj_name
-            c_obj_recomp = re.compile(c_obj_regex)
-            c_objs.extend([ obj.name for obj in objs if c_obj_recomp.fullmatch(obj.name) ])
-          print('Matching Contact Objects: ', c_objs)
+        if index == None:
+          index = contact_tagger.ContactIndex(context, objs)
+        c_objs = index.contacts_for(b_obj_name, scn.test_tool.tag_distance)
+        print('Matching Contact Objects: ', c_objs)
  
         if len(c_objs) > 0:
 
@@ -777,6 +814,18 @@ class ProcessorToolObjectProperty(bpy.types.PropertyGroup):
           print("Clearing all regions from object")
           bpy.ops.mcell.region_remove_all()
 
+          if scn.test_tool.tag_engine == 'INTERNAL':
+            # Tag all contacts in one pass, keeping the existing mesh
+            set_timing_log(context)
+            with stage_timer.log.stage('tag', object=b_obj_name, contacts=len(c_objs), triangles=len(b_obj.data.polygons)):
+              counts = contact_tagger.tag_contacts(context, b_obj, c_objs, scn.test_tool.tag_distance)
+            for c_obj_name, n_faces in counts.items():
+              print('Tagged %d faces of %s for %s' % (n_faces, b_obj_name, c_obj_name))
+            b_obj.processor.smoothed = True
+            b_obj.processor.newton = True
+            b_obj.processor.update_contact_pattern_match_list(context, b_obj)
+            return
+
           b_obj_file_name = cwd + '/' + b_obj_name + ".obj"
           b_mdl_file_name = cwd + '/' + b_obj_name + ".mdl"
           b_mdl_with_tags_file_name = cwd + '/' + b_obj_name + "_tagged.mdl"
@@ -794,18 +843,24 @@ class ProcessorToolObjectProperty(bpy.types.PropertyGroup):
             bpy.context.view_layer.objects.active = c_obj
             c_obj.select_set(True)
             c_obj_file_name = cwd + '/' + c_obj.name + ".obj"
-            bpy.ops.export_scene.obj(filepath=c_obj_file_name, axis_forward='Y', axis_up="Z", use_selection=True, use_edges=False, use_normals=False, use_uvs=False, use_materials=False, use_blen_objects=False) 
+            c_obj.processor.export_obj(context, c_obj, c_obj_file_name, world=True)
 
             tag_cmd = tag_bin + " %s %s > %s" % (b_obj_file_name, cwd + '/' + c_obj_name + ".obj", cwd + '/' + c_obj_name + "_regions.mdl")
-            subprocess.check_output([tag_cmd],shell=True)
-            append_cmd = python_cmd + " " + append_bin + " %s %s > %s" % (b_mdl_file_name, cwd + '/' + c_obj_name + "_regions.mdl", b_mdl_with_tags_file_name)
-            subprocess.check_output([append_cmd],shell=True)
-            shutil.copyfile(b_mdl_with_tags_file_name, b_mdl_file_name)
+            with stage_timer.log.stage('obj_tag_region', object=b_obj_name, contact=c_obj_name):
+              subprocess.check_output([tag_cmd],shell=True)
+
+          # Splice the regions of all contacts into the MDL in one rewrite
+          region_file_names = [cwd + '/' + c_obj_name + "_regions.mdl" for c_obj_name in dict.fromkeys(c_objs)]
+          append_cmd = [python_cmd, append_bin, b_mdl_file_name] + region_file_names
+          with stage_timer.log.stage('insert_mdl_region', object=b_obj_name, contacts=len(region_file_names)):
+            with open(b_mdl_with_tags_file_name, 'w') as b_mdl_with_tags_file:
+              subprocess.check_call(append_cmd, stdout=b_mdl_with_tags_file)
 
           bpy.ops.object.select_all(action='DESELECT')
           b_obj.select_set(True)
           b_mesh = b_obj.data
-          bpy.ops.import_mdl_mesh.mdl('EXEC_DEFAULT', filepath=b_mdl_with_tags_file_name)
+          with stage_timer.log.stage('import_mdl', object=b_obj_name):
+            bpy.ops.import_mdl_mesh.mdl('EXEC_DEFAULT', filepath=b_mdl_with_tags_file_name)
           bpy.data.meshes.remove(b_mesh)
           b_obj = scn.objects[b_obj_name]
           b_obj.processor.smoothed = True
@@ -832,6 +887,12 @@ class ProcessorToolSceneProperty(bpy.types.PropertyGroup):
     min_sample_interval: FloatProperty(name="Minimum Sample Interval", description='Minimum interpolation interval in microns', default=0.01, precision=4)
     max_sample_interval: FloatProperty(name="Maximum Sample Interval", description='Maximum interpolation interval in microns', default=0.05, precision=4)
     filt: StringProperty(name = "Filter for Object list", default = "d[0-9][0-9]sp[0-9][0-9]")
+    tag_engine: EnumProperty(
+        name="Tagging Engine",
+        items=[('INTERNAL', "In Process", "Tag faces near each contact with KD and BVH trees in Blender"),
+               ('BINARY', "obj_tag_region", "Tag with obj_tag_region and re-import the object from MDL")],
+        default='INTERNAL')
+    tag_distance: FloatProperty(name="Tagging Distance", description='Maximum distance in microns from a contact surface to a tagged face', default=0.005, precision=4)
 
 
     '''
@@ -865,78 +926,29 @@ class ProcessorToolSceneProperty(bpy.types.PropertyGroup):
         return(new_contour)
 
 
-    def generate_contour_list(self, context, filepath):
+    def generate_contour_list(self, context, filepath, use_cache=True):
 
         # Begin by clearing the current contour list
         self.remove_contour_all(context)
 
         self.filepath = filepath
-        ser_file = self.filepath
-        ser_prefix = os.path.splitext(self.filepath)[0]
 
         print('SER filepath: ', filepath)
-        print('SER prefix: ', ser_prefix)
-
-        first_re = re.compile('first3Dsection="(\d*)"')
-        last_re = re.compile('last3Dsection="(\d*)"')
-        default_thick_re = re.compile('defaultThickness="(.*)"')
-
-        ser_data = open(ser_file, "r").read()
-#        self.min_section = first_re.search(ser_data).group(1)
-#        self.min_section = str(int(self.min_section) +1)
-#        self.max_section = last_re.search(ser_data).group(1)
-#        self.max_section = str(int(self.max_section)- 1)
-        self.section_thickness = default_thick_re.search(ser_data).group(1)
-
-        trace_file_glob = sorted(glob.glob(ser_prefix + os.path.extsep + '[0-9]*'))
-        pat = ser_prefix + '\\' + os.path.extsep + '[0-9]+'
-        patc = re.compile(pat)
-        trace_file_list = [patc.fullmatch(item).string for item in trace_file_glob if patc.fullmatch(item)]
-        trace_num_list = sorted([int(os.path.splitext(fn)[1][1:]) for fn in trace_file_list])
-
-        # create list of contiguous runs of section file numbers
-        r_list = []
-        cur_r = [0,1]
-        r_next = trace_num_list[cur_r[0]]+1
-
-        for i in range(1,len(trace_num_list)):
-          if trace_num_list[i] == r_next:
-            r_next += 1
-            cur_r[1] += 1
-            if i == len(trace_num_list)-1:
-              r_list.append(cur_r)
-          else:
-            r_list.append(cur_r)
-            cur_r = [i,1]
-            r_next = trace_num_list[cur_r[0]]+1
 
-        r_list = np.array(r_list)
-#        print('')
-#        print(trace_num_list)
-#        print('')
-#        print(r_list)
-#        print('')
+        # Scan all section files once, collecting per-contour metadata
+        index = contour_index.build_index(self.filepath, use_cache=use_cache)
+        self.section_thickness = index.thickness
+        if index.min_section == None:
+            print('No section files found for %s' % (filepath))
+            return(self.contour_list)
 
         # set min and max section numbers of longest contiguous run found
-        r_max = r_list[np.argmax(r_list[:, 1])]
-        self.min_section = str(trace_num_list[r_max[0]])
-        self.max_section = str(trace_num_list[r_max[0]+r_max[1]-1])
-
-        contour_re = re.compile('Contour\ name=\"(.*?)\"')
-
-        all_names = []
-        for i in range(int(self.min_section), int(self.max_section)):
-            trace_file_name = '%s%s%d' % (ser_prefix, os.path.extsep, i)
-            print('Reading contour names in trace file: %s' % (trace_file_name))
-#            all_names += contour_re.findall(open(ser_prefix[:-3] + str(i)).read())
-            all_names += contour_re.findall(open(trace_file_name).read())
-         # Now you would put each item in this python list into a Blender collection property
-        contour_names = sorted(list(set(all_names))) 
-       
-        for name in contour_names:
-            self.add_contour(context, name,"contour")
-#        for item in self.contour_list:
-#            print(item)
+        self.min_section = str(index.min_section)
+        self.max_section = str(index.max_section)
+
+        for name in index.names():
+            new_contour = self.add_contour(context, name, "contour")
+            new_contour.set_info(index.contours[name])
         return(self.contour_list)
     
     
@@ -951,12 +963,8 @@ class ProcessorToolSceneProperty(bpy.types.PropertyGroup):
     def include_filter_contour(self,context):
       if contour_filter_pattern:
         # convert contour filter pattern to formal regex
-        filt_pat = contour_filter_pattern
-        filt_regex = filt_pat.replace('#','[0-9]')
-        filt_regex = filt_regex.replace('*','.*')
-    
-        filt_recomp = re.compile(filt_regex)
-        filt_contour_list = [ item for item in self.contour_list if filt_recomp.fullmatch(item.name) != None and item.name not in self.include_list ]
+        filt_regex = pattern_registry.pattern_regex(contour_filter_pattern)
+        filt_contour_list = [ item for item in self.contour_list if pattern_registry.fullmatch(filt_regex, item.name) and item.name not in self.include_list ]
       else:
         filt_contour_list = [ item for item in self.contour_list if item.name not in self.include_list ]
 
@@ -1027,14 +1035,13 @@ class ProcessorToolSceneProperty(bpy.types.PropertyGroup):
         ser_file = os.path.split(self.filepath)[-1]
         bin_dir = os.path.join(os.path.dirname(__file__), 'bin') 
         interpolate_bin = os.path.join(bin_dir, 'reconstruct_interpolate') 
-        tile_bin = os.path.join(bin_dir, 'ContourTilerBin') 
-        rawc2obj_bin = os.path.join(bin_dir, 'rawc2obj.py')
 
         ser_prefix = os.path.splitext(ser_file)[0]
         out_file = ser_dir + '/' + ser_prefix + "_output"
         if os.path.exists(out_file) == False:
             os.mkdir(out_file)
         interp_file = ser_prefix + "_interp" 
+        set_timing_log(context)
         
         #interpolate traces
         contour_names = '' 
@@ -1048,31 +1055,85 @@ class ProcessorToolSceneProperty(bpy.types.PropertyGroup):
         if contour_names != '':
           interpolate_cmd = interpolate_bin + " -i %s -f %s -o %s --min_section=%s --max_section=%s --section_thickness %s  --min_sample_interval %.4g --max_sample_interval %.4g --curvature_gain=1E2 --proximity_gain=3 --min_point_per_contour=4 --deviation_threshold=0.005 %s -w %s" % (ser_dir, ser_prefix, out_file, self.min_section, self.max_section, self.section_thickness, self.min_sample_interval, self.max_sample_interval, contour_names, interp_file)
           print('\nInterpolating Series: \n%s\n' % (interpolate_cmd))
-          subprocess.check_output([interpolate_cmd],shell=True)
+          with stage_timer.log.stage('interpolate', contours=contour_names.count('-I '), sections=self.section_count()):
+            subprocess.check_output([interpolate_cmd],shell=True)
 
-        #tile traces
+        #tile traces and convert to obj, many contours at a time
+        jobs = []
         for item in self.include_list:
             if self.include_list[str(item.name)].generated == True:
               continue
             contour_name = str(item.name)
-            print('\nGenerating Mesh for: %s\n' % (contour_name))
             if bpy.data.objects.get(contour_name) is None:
-                tile_cmd = tile_bin + " -f ser -n %s -d %s -c %s -s  %s %s -z %s -C 0.001 -e 1e-15 -o raw -r %s" % (out_file, out_file, contour_name, self.min_section, self.max_section, self.section_thickness, interp_file)
-                print('\nTiling Object: \n%s\n' % (tile_cmd))
-                subprocess.check_output([tile_cmd],shell=True)
-            #make obj
-                rawc2obj_cmd = python_cmd + " " + rawc2obj_bin + " %s > %s" % (out_file + '/'+ contour_name + '_tiles.rawc', out_file + '/'+  contour_name + ".obj")
-                subprocess.check_output([rawc2obj_cmd],shell=True)
-            #import obj
-                bpy.ops.import_scene.obj(filepath=out_file + '/' + contour_name  + ".obj", axis_forward='Y', axis_up="Z")
-                obj = bpy.data.objects.get(contour_name)
-                if obj != None:
-                    self.include_list[str(contour_name)].generated = True
-                    obj.select_set(True)
-                    context.view_layer.objects.active = obj
-                    obj.processor.update_contact_pattern_match_list(context, obj)
-                if item.multi_component == True:
-                    print("Multiple Components: %s" % (str(self.include_list[contour_name])))
+                jobs.append(self.tile_job(contour_name, out_file, interp_file))
+
+        # Start the contours with the most traces first so a long one does
+        #   not end up running alone at the tail of the pool
+        n_traces = {}
+        for item in self.contour_list:
+            n_traces[item.name] = item.n_traces
+        jobs.sort(key=lambda job: n_traces.get(job.name, 0), reverse=True)
+
+        print('\nTiling %d Objects on %d workers\n' % (len(jobs), os.cpu_count() or 1))
+        t_start = time.time()
+        n_failed = 0
+        log_file = open(os.path.join(out_file, 'tile_jobs.log'), 'a')
+        with stage_timer.log.stage('tile_pool', contours=len(jobs)):
+          for job in job_pool.run_jobs(jobs):
+              log_file.write(job.summary() + '\n')
+              log_file.flush()
+              stage_timer.log.add(job.record('tile'))
+              if not job.ok:
+                  n_failed += 1
+                  print('\nFailed to generate mesh for: %s\n%s' % (job.name, job.summary()))
+                  continue
+              #load mesh
+              contour_name = job.name
+              print('\nLoading Mesh for: %s  (%.2f s)\n' % (contour_name, job.elapsed))
+              try:
+                  obj = self.load_rawc_object(context, contour_name, out_file + '/' + contour_name + '_tiles.rawc')
+              except (OSError, ValueError) as e:
+                  n_failed += 1
+                  print('\nFailed to load mesh for: %s\n%s' % (contour_name, e))
+                  continue
+              if obj != None:
+                  self.include_list[str(contour_name)].generated = True
+                  obj.select_set(True)
+                  context.view_layer.objects.active = obj
+                  obj.processor.update_contact_pattern_match_list(context, obj)
+              if self.include_list[contour_name].multi_component == True:
+                  print("Multiple Components: %s" % (str(self.include_list[contour_name])))
+        log_file.close()
+        print('\nGenerated %d of %d Objects in %.2f s\n' % (len(jobs) - n_failed, len(jobs), time.time() - t_start))
+
+
+    def section_count(self):
+        """ Return the number of sections in the range to interpolate, or
+            None while the range is not set """
+        try:
+            return(int(self.max_section) - int(self.min_section) + 1)
+        except ValueError:
+            return(None)
+
+
+    def tile_job(self, contour_name, out_file, interp_file):
+        """ Return the job that tiles a contour into out_file/<name>_tiles.rawc """
+        bin_dir = os.path.join(os.path.dirname(__file__), 'bin') 
+        tile_bin = os.path.join(bin_dir, 'ContourTilerBin') 
+        tile_cmd = [tile_bin, '-f', 'ser', '-n', out_file, '-d', out_file, '-c', contour_name, '-s', self.min_section, self.max_section, '-z', self.section_thickness, '-C', '0.001', '-e', '1e-15', '-o', 'raw', '-r', interp_file]
+        return(job_pool.Job(contour_name, [(tile_cmd, None)]))
+
+
+    def load_rawc_object(self, context, name, file_name):
+        """ Build a new object named name from the tiler output file_name """
+        with stage_timer.log.stage('load_rawc', contour=name) as record:
+            verts, tris = mesh_io.read_rawc(file_name)
+            mesh = bpy.data.meshes.new(name)
+            mesh_arrays.set_triangles(mesh, verts, tris)
+            record['triangles'] = len(tris)
+        obj = bpy.data.objects.new(name, mesh)
+        context.collection.objects.link(obj)
+        return(obj)
 
   
     def generate_mesh_object_single(self,context): 
@@ -1082,8 +1143,6 @@ class ProcessorToolSceneProperty(bpy.types.PropertyGroup):
         out_file = ser_dir + '/' + ser_prefix + "_output"
         bin_dir = os.path.join(os.path.dirname(__file__), 'bin') 
         interpolate_bin = os.path.join(bin_dir, 'reconstruct_interpolate') 
-        tile_bin = os.path.join(bin_dir, 'ContourTilerBin') 
-        rawc2obj_bin = os.path.join(bin_dir, 'rawc2obj.py')
 
         if os.path.exists(out_file) == False:
             os.mkdir(out_file)
@@ -1096,19 +1155,19 @@ class ProcessorToolSceneProperty(bpy.types.PropertyGroup):
           return
 
         interpolate_cmd = interpolate_bin + " -i %s -f %s -o %s --min_section=%s --max_section=%s --section_thickness %s --min_sample_interval %.4g --max_sample_interval %.4g --curvature_gain=1E2 --proximity_gain=3 --min_point_per_contour=4 --deviation_threshold=0.005 -I %s -w %s" % (ser_dir, ser_prefix, out_file, self.min_section, self.max_section, self.section_thickness, self.min_sample_interval, self.max_sample_interval, contour_name, interp_file)
+        set_timing_log(context)
         print('\nInterpolating Series: \n%s\n' % (interpolate_cmd))
-        subprocess.check_output([interpolate_cmd],shell=True)
+        with stage_timer.log.stage('interpolate', contours=1, sections=self.section_count()):
+            subprocess.check_output([interpolate_cmd],shell=True)
 
         if bpy.data.objects.get(contour_name) is None:
-            tile_cmd = tile_bin + " -f ser -n %s -d %s -c %s -s  %s %s -z %s -C 0.001 -e 1e-15 -o raw -r %s" % (out_file, out_file, contour_name, self.min_section, self.max_section, self.section_thickness, interp_file)
-            print('\nTiling Object: \n%s\n' % (tile_cmd))
-            subprocess.check_output([tile_cmd],shell=True)
-            #make obj
-            rawc2obj_cmd = python_cmd + " " + rawc2obj_bin + " %s > %s" % (out_file + '/'+ contour_name + '_tiles.rawc', out_file + '/'+  contour_name + ".obj")
-            subprocess.check_output([rawc2obj_cmd],shell=True)
-            #import obj
-            bpy.ops.wm.obj_import(filepath=out_file + '/' + contour_name  + ".obj", forward_axis='Y', up_axis="Z")
-            obj = bpy.data.objects.get(contour_name)
+            job = self.tile_job(contour_name, out_file, interp_file).run()
+            stage_timer.log.add(job.record('tile'))
+            print('\nTiling Object: \n%s\n' % (job.summary()))
+            if not job.ok:
+                return
+            #load mesh
+            obj = self.load_rawc_object(context, contour_name, out_file + '/' + contour_name + '_tiles.rawc')
             if obj != None:
                 self.include_list[str(contour_name)].generated = True
                 obj.select_set(True)
@@ -1127,13 +1186,13 @@ class ProcessorToolSceneProperty(bpy.types.PropertyGroup):
         ser_prefix = os.path.splitext(ser_file)[0]
         out_file = ser_dir + '/' + ser_prefix + "_output"
         bin_dir = os.path.join(os.path.dirname(__file__), 'bin') 
-        rawc2obj_bin = os.path.join(bin_dir, 'rawc2obj.py')
         fix_all_bin = os.path.join(bin_dir, 'volFixAll')
 
         print("Fix Mesh Out_file:", out_file)
 
         if os.path.exists(out_file) == False:
             os.mkdir(out_file)
+        set_timing_log(context)
 
         #for i in self.include_list:
         #    #print(include_name)
@@ -1151,7 +1210,7 @@ class ProcessorToolSceneProperty(bpy.types.PropertyGroup):
             obj.select_set(True)
             bpy.context.view_layer.objects.active = obj 
             bpy.ops.object.mode_set(mode = 'OBJECT')
-            bpy.ops.mcell.meshalyzer()
+            run_meshalyzer(context)
             mesh_props = bpy.context.scene.mcell.meshalyzer
             name = obj.name
             if mesh_props.disjoint_components > 1:           
@@ -1175,21 +1234,18 @@ class ProcessorToolSceneProperty(bpy.types.PropertyGroup):
 
                 #fix mesh
                 fix_all_cmd = fix_all_bin + " %s %s" % (out_file + '/' + name + "_tiles.rawc", out_file + '/'+ name + "_fix.rawc")  
-                subprocess.check_output([fix_all_cmd], shell=True)
-
-                #make obj
-                rawc2obj_cmd = python_cmd + " " + rawc2obj_bin + " %s > %s" % (out_file + '/'+ name + '_fix.rawc', out_file + '/'+  name + ".obj")
-                subprocess.check_output([rawc2obj_cmd],shell=True)
+                with stage_timer.log.stage('volFixAll', contour=name):
+                    subprocess.check_output([fix_all_cmd], shell=True)
 
-                #import obj
-                bpy.ops.import_scene.obj(filepath=out_file + '/' + name  + ".obj", axis_forward='Y', axis_up="Z") 
+                #load fixed mesh
+                self.load_rawc_object(context, name, out_file + '/' + name + '_fix.rawc')
                 self.include_list[name].generated = True
                 bpy.ops.object.select_all(action='DESELECT')
                 obj = scn.objects[contour_name]
                 obj.select_set(True)
                 bpy.context.view_layer.objects.active = obj 
                 bpy.ops.object.mode_set(mode = 'OBJECT')
-                bpy.ops.mcell.meshalyzer()
+                run_meshalyzer(context)
                 mesh_props = bpy.context.scene.mcell.meshalyzer
                 if (mesh_props.manifold == False) or (mesh_props.watertight == False) or (mesh_props.normal_status == 'Inconsistent Normals'):
                     print('\nMesh Still Flawed: %s\n' % (contour_name))
@@ -1213,7 +1269,7 @@ class ProcessorToolSceneProperty(bpy.types.PropertyGroup):
                 obj.select_set(True)
                 bpy.context.view_layer.objects.active = obj 
                 bpy.ops.object.mode_set(mode = 'OBJECT')
-                bpy.ops.mcell.meshalyzer()
+                run_meshalyzer(context)
                 mesh_props = bpy.context.scene.mcell.meshalyzer
                 name = obj.name
                 if mesh_props.components >1:
@@ -1231,21 +1287,18 @@ class ProcessorToolSceneProperty(bpy.types.PropertyGroup):
 
                     #fix mesh
                     fix_all_cmd = fix_all_bin + " %s %s" % (out_file + '/' + name + "_tiles.rawc", out_file + '/'+ name + "_fix.rawc")  
-                    subprocess.check_output([fix_all_cmd], shell=True)
+                    with stage_timer.log.stage('volFixAll', contour=name):
+                        subprocess.check_output([fix_all_cmd], shell=True)
 
-                    #make obj
-                    rawc2obj_cmd = python_cmd + " " + rawc2obj_bin + " %s > %s" % (out_file + '/'+ name + '_fix.rawc', out_file + '/'+  name + ".obj")
-                    subprocess.check_output([rawc2obj_cmd],shell=True)
-
-                    #import obj
-                    bpy.ops.import_scene.obj(filepath=out_file + '/' + name  + ".obj", axis_forward='Y', axis_up="Z") 
+                    #load fixed mesh
+                    self.load_rawc_object(context, name, out_file + '/' + name + '_fix.rawc')
                     self.include_list[name].generated = True
                     bpy.ops.object.select_all(action='DESELECT')
                     obj = scn.objects[name]
                     obj.select_set(True)
                     bpy.context.view_layer.objects.active = obj 
                     bpy.ops.object.mode_set(mode = 'OBJECT')
-                    bpy.ops.mcell.meshalyzer()
+                    run_meshalyzer(context)
                     mesh_props = bpy.context.scene.mcell.meshalyzer
                     if (mesh_props.manifold == False) or (mesh_props.watertight == False) or (mesh_props.normal_status == 'Inconsistent Normals'):
                         print('\nMesh Still Flawed: %s\n' % (name))
@@ -1307,16 +1360,21 @@ class ProcessorToolSceneProperty(bpy.types.PropertyGroup):
 
 
     def remove_contact_pattern(self,context):
-      if self.active_contact_pattern_index == 0:
-        self.contact_pattern_list.remove(self.active_contact_pattern_index)
+      index = self.active_contact_pattern_index
+      if (len(self.contact_pattern_list) == 0) or \
+         (index not in (0, len(self.contact_pattern_list)-1)):
+        return
+      contact_pattern = self.contact_pattern_list[index]
+      old_regexes = (contact_pattern.base_name_1_regex, contact_pattern.base_name_2_regex)
+      self.contact_pattern_list.remove(index)
+      if index == 0:
         self.active_contact_pattern_index = 0
-      elif self.active_contact_pattern_index == (len(self.contact_pattern_list)-1):
-        self.contact_pattern_list.remove(self.active_contact_pattern_index)
+      else:
         self.active_contact_pattern_index = len(self.contact_pattern_list)-1
 
-      # update (rebuild) match list for each object
-      for obj in bpy.context.scene.collection.children[0].objects:
-         obj.processor.update_contact_pattern_match_list(context, obj)
+      # update the match lists of the objects that matched the removed
+      #   pattern, together with any pending pattern edits
+      schedule_pattern_removal(index, old_regexes)
       return
 
 
@@ -1351,20 +1409,11 @@ class ProcessorToolSceneProperty(bpy.types.PropertyGroup):
 
           b_obj.processor.tag_object(context, b_obj)
         else:
-          b_objs = []
-          for contact_pattern in self.contact_pattern_list:
-            bn1_regex = contact_pattern.base_name_1_regex
-            bn2_regex = contact_pattern.base_name_2_regex
-
-            bn1_recomp = re.compile(bn1_regex)
-            bn2_recomp = re.compile(bn2_regex)
- 
-            b_objs.extend([ obj.name for obj in objs if bn1_recomp.fullmatch(obj.name) or bn2_recomp.fullmatch(obj.name) ])
-        
-          b_objs = set(b_objs)
-          for b_obj_name in b_objs:
+          # Match contacts to their bases once for the whole scene
+          index = contact_tagger.ContactIndex(context, objs)
+          for b_obj_name in index.bases():
             b_obj = scn.objects[b_obj_name]
-            b_obj.processor.tag_object(context, b_obj)
+            b_obj.processor.tag_object(context, b_obj, index)
 
         return
 
@@ -1374,14 +1423,7 @@ class ProcessorToolSceneProperty(bpy.types.PropertyGroup):
       contact_pattern_list = scn.test_tool.contact_pattern_list
       c_object_list = []
       for contact_pattern in contact_pattern_list:
-        bn1_regex = contact_pattern.base_name_1_regex
-        bn2_regex = contact_pattern.base_name_2_regex
-        c_regex = contact_pattern.contact_name_regex
-        full_regex = bn1_regex + c_regex + bn2_regex
-
-        full_recomp = re.compile(full_regex)
-
-        c_object_list.extend([obj.name for obj in scn.objects if full_recomp.fullmatch(obj.name)!= None])
+        c_object_list.extend([obj.name for obj in scn.objects if pattern_registry.is_contact(contact_pattern, obj.name)])
 
       obj_name_list = sorted([obj.name for obj in scn.objects if obj.name not in c_object_list and obj.type == 'MESH'])
 
@@ -1489,12 +1531,30 @@ class ProcessorToolSceneProperty(bpy.types.PropertyGroup):
         col.label(text='', icon='BLANK1')
         col.operator('processor_tool.tag_contact_single', icon='PIVOT_MEDIAN', text='')
         col.operator('processor_tool.tag_contacts', icon='POSE_HLT', text='')
+        row = layout.row()
+        row.prop(self, "tag_engine")
+        if self.tag_engine == 'INTERNAL':
+          row.prop(self, "tag_distance")
 
         row = layout.row()
         row.label(text= "Merge central object with associated objects: ")
         row = layout.row()
         row.operator("processor_tool.merge_objs", text="Merge Objects")
 
+        summary = stage_timer.log.summary()
+        if summary:
+          box = layout.box()
+          row = box.row()
+          row.label(text="Pipeline Timing:", icon='TIME')
+          row.operator("processor_tool.clear_stage_timing", icon='X', text='')
+          for stage, count, wall, cpu, peak_rise_mb in summary:
+            row = box.row()
+            row.label(text=stage)
+            row.label(text='%d x' % (count))
+            row.label(text='%.2f s wall' % (wall))
+            row.label(text='%.2f s cpu' % (cpu))
+            row.label(text='+%.0f MB peak' % (peak_rise_mb))
+
 
 classes = ( 
             NEUROPIL_OT_impser,
@@ -1514,6 +1574,7 @@ classes = (
             NEUROPIL_OT_tag_contact_single,
             NEUROPIL_OT_tag_contacts,
             NEUROPIL_OT_merge_objs,
+            NEUROPIL_OT_clear_stage_timing,
             NEUROPIL_OT_gamer_coarse_dense,
             NEUROPIL_OT_gamer_coarse_flat,
             NEUROPIL_OT_gamer_smooth,
@@ -1536,6 +1597,8 @@ def register():
       bpy.utils.register_class(cls)
 
 def unregister():
+    if bpy.app.timers.is_registered(apply_match_list_updates):
+      bpy.app.timers.unregister(apply_match_list_updates)
     for cls in reversed(classes):
       bpy.utils.unregister_class(cls)
 
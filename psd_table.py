@@ -0,0 +1,209 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""
+This file contains a columnar exporter for the measurements of contacts.
+
+Each PSD is one row with one typed column per property, and vector
+properties are split into _x, _y and _z columns.  Tables are written as
+CSV, NumPy .npz or Parquet (which needs pyarrow), with the format taken
+from the file extension.  CSV has no column types, so they are kept in a
+JSON sidecar file next to it (contacts.csv.types) and a CSV without one is
+read back as text.  In append mode the rows are added to an existing table
+with the same columns and types, so the results of many .blend files can be
+gathered into one dataset and read back without parsing text.
+
+"""
+
+# python imports
+
+import csv
+import json
+import os
+
+import numpy as np
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    # Parquet output is only offered when pyarrow is installed
+    pyarrow = None
+
+
+FORMATS = {'CSV': '.csv', 'NPZ': '.npz', 'PARQUET': '.parquet'}
+
+
+def flatten(record):
+    """ Return a copy of record with list values of length 3 split into
+        name_x, name_y and name_z """
+    flat = {}
+    for key, value in record.items():
+        if isinstance(value, (list, tuple)) and len(value) == 3:
+            for axis, v in zip('xyz', value):
+                flat[key + '_' + axis] = v
+        else:
+            flat[key] = value
+    return(flat)
+
+
+def column_array(values):
+    """ Return values as a bool, int64, float64 or str array """
+    if all(isinstance(v, (bool, np.bool_)) for v in values):
+        return(np.array(values, dtype=bool))
+    if all(isinstance(v, (int, np.integer)) and not isinstance(v, bool) for v in values):
+        return(np.array(values, dtype=np.int64))
+    if all(isinstance(v, (int, float, np.number)) for v in values):
+        return(np.array(values, dtype=np.float64))
+    return(np.array([str(v) for v in values], dtype=str))
+
+
+def to_columns(records):
+    """ Return {column name: array} for a list of records (dicts), keeping
+        the column order of the first record """
+    records = [flatten(record) for record in records]
+    if len(records) == 0:
+        return({})
+    names = list(records[0])
+    for record in records[1:]:
+        names.extend([key for key in record if key not in names])
+    return({name: column_array([record.get(name, '') for record in records])
+            for name in names})
+
+
+def table_format(file_name):
+    ext = os.path.splitext(file_name)[1].lower()
+    for fmt, fmt_ext in FORMATS.items():
+        if ext == fmt_ext:
+            return(fmt)
+    raise ValueError('Unknown table format: %s' % (file_name))
+
+
+def column_type(column):
+    """ Return the type name of a column: bool, int64, float64 or str """
+    kind = np.asarray(column).dtype.kind
+    return({'b': 'bool', 'i': 'int64', 'u': 'int64', 'f': 'float64'}.get(kind, 'str'))
+
+
+def types_file_name(file_name):
+    return(file_name + '.types')
+
+
+def read_csv_types(file_name):
+    """ Return {column name: type name} from the sidecar of a CSV table,
+        or None if it has none """
+    try:
+        with open(types_file_name(file_name)) as f:
+            return(json.load(f))
+    except FileNotFoundError:
+        return(None)
+
+
+def parse_csv_column(values, type_name):
+    """ Convert a column of CSV strings back to its type """
+    if type_name == 'bool':
+        return(np.array([v == 'True' for v in values], dtype=bool))
+    if type_name in ('int64', 'float64'):
+        return(np.array(values, dtype=type_name))
+    return(np.array(values, dtype=str))
+
+
+def read_table(file_name):
+    """ Return {column name: array} of a table written by write_table """
+    fmt = table_format(file_name)
+    if fmt == 'NPZ':
+        with np.load(file_name, allow_pickle=False) as data:
+            return({name: data[name] for name in data.files})
+    if fmt == 'PARQUET':
+        if pyarrow == None:
+            raise ImportError('Reading Parquet tables needs pyarrow')
+        table = pyarrow.parquet.read_table(file_name)
+        return({name: table.column(name).to_numpy() for name in table.column_names})
+    with open(file_name, 'r', newline='') as f:
+        rows = list(csv.reader(f))
+    if len(rows) == 0:
+        return({})
+    types = read_csv_types(file_name) or {}
+    return({name: parse_csv_column([row[i] for row in rows[1:]], types.get(name, 'str'))
+            for i, name in enumerate(rows[0])})
+
+
+def csv_header(file_name):
+    with open(file_name, 'r', newline='') as f:
+        return(next(csv.reader(f), []))
+
+
+def check_columns(file_name, old_types, types):
+    """ Raise ValueError unless the rows to append have the columns and
+        types ({column name: type name}) of the table in file_name """
+    if list(old_types) != list(types):
+        raise ValueError('Columns of %s do not match the rows to append' % (file_name))
+    changed = [name for name in types if old_types[name] != types[name]]
+    if changed:
+        raise ValueError('Types of columns %s of %s do not match the rows to append' %
+                         (', '.join(changed), file_name))
+
+
+def write_table(file_name, columns, append=False):
+    """ Write {column name: array} to file_name, or add the rows to the
+        table already in file_name if append is set """
+    fmt = table_format(file_name)
+    if fmt == 'PARQUET' and pyarrow == None:
+        raise ImportError('Writing Parquet tables needs pyarrow')
+    exists = append and os.path.exists(file_name)
+    names = list(columns)
+    n_rows = len(columns[names[0]]) if names else 0
+    types = {name: column_type(columns[name]) for name in names}
+
+    if fmt == 'CSV':
+        if exists:
+            old_types = read_csv_types(file_name)
+            if old_types == None:
+                raise ValueError('%s has no column types (%s), so typed rows cannot be appended' %
+                                 (file_name, types_file_name(file_name)))
+            if csv_header(file_name) != list(old_types):
+                raise ValueError('Column types %s do not match the columns of %s' %
+                                 (types_file_name(file_name), file_name))
+            check_columns(file_name, old_types, types)
+        else:
+            with open(types_file_name(file_name), 'w') as f:
+                json.dump(types, f)
+        with open(file_name, 'a' if exists else 'w', newline='') as f:
+            writer = csv.writer(f)
+            if not exists:
+                writer.writerow(names)
+            cols = [columns[name].tolist() for name in names]
+            writer.writerows([[repr(v) if isinstance(v, float) else v for v in row]
+                              for row in zip(*cols)])
+        return(n_rows)
+
+    if exists:
+        old = read_table(file_name)
+        check_columns(file_name, {name: column_type(old[name]) for name in old}, types)
+        columns = {name: np.concatenate((old[name], columns[name])) for name in names}
+
+    # Rewrite through a temporary file so an interrupted append keeps the old table
+    tmp_file_name = file_name + '.tmp'
+    if fmt == 'NPZ':
+        with open(tmp_file_name, 'wb') as f:
+            np.savez(f, **columns)
+    else:
+        pyarrow.parquet.write_table(pyarrow.table(columns), tmp_file_name)
+    os.replace(tmp_file_name, file_name)
+    return(n_rows)
@@ -45,6 +45,10 @@ import numpy as np
 globals()['neuropil_tools'] = importlib.import_module(__package__)
 #import neuropil_tools
 from .. import cellblender
+from . import core
+from . import mesh_arrays
+from . import pattern_registry
+from . import psd_table
 
 
 # Spine Head Analyzer Operators:
@@ -195,7 +199,10 @@ class NEUROPIL_OT_compute_volume(bpy.types.Operator):
     bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
-        context.object.spine_head_ana.compute_volume(context,'head')
+        failed = context.object.spine_head_ana.compute_volume(context,'head')
+        if failed != None:
+            self.report({'ERROR'}, "Contact %s does not match the contact pattern" % (failed))
+            return {'CANCELLED'}
         return {'FINISHED'}
 
 
@@ -206,7 +213,10 @@ class NEUROPIL_OT_compute_volume_spine(bpy.types.Operator):
     bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
-        context.object.spine_head_ana.compute_volume(context,'spine')
+        failed = context.object.spine_head_ana.compute_volume(context,'spine')
+        if failed != None:
+            self.report({'ERROR'}, "Contact %s does not match the contact pattern" % (failed))
+            return {'CANCELLED'}
         return {'FINISHED'}
 
 
@@ -239,41 +249,50 @@ class NEUROPIL_OT_recompute_volumes(bpy.types.Operator):
     bl_description = "Recompute volumes of all spines, heads, and necks on object"
     bl_options = {'REGISTER', 'UNDO'}
 
+    force: BoolProperty(
+        name="Force",
+        description="Recompute all spines, including those whose regions and mesh are unchanged",
+        default=False)
+
     def execute(self, context):
         report_file = open('spine_data_report.txt','w')
-        dends = bpy.context.scene.test_tool.spine_namestruct_name.replace('#', '[0-9]')
-        dend_filter = dends
-        #dend_filter = 'd[0-9]{2}$'
-        dend_objs = [obj.name for obj in context.scene.collection.children[0].objects if re.match(dend_filter,obj.name) != None]
-        
-        dend_objs.sort()
-        orig_obj = context.active_object
-        orig_obj.select_set(False)
-        orig_obj.hide_viewport = False
-        bpy.context.view_layer.objects.active = None
-        bpy.context.view_layer.update()
-        for dend in dend_objs:
-            obj = context.scene.collection.children[0].objects[dend]
-            obj.hide_viewport = False
-            obj.select_set(True)
-            bpy.context.view_layer.objects.active = obj  
-            bpy.context.view_layer.update()
-            obj.spine_head_ana.recompute_volumes(context,report_file)
-            obj.select_set(False)
-            obj.hide_viewport = True
-            bpy.context.view_layer.objects.active = None
-            bpy.context.view_layer.update()
-         
-        orig_obj.hide_viewport = False
-        orig_obj.select_set(True)
-        bpy.context.view_layer.objects.active = orig_obj
-
+        volume_analyzer = context.scene.volume_analyzer
+        dend_objs = volume_analyzer.get_dendrite_names(context)
+        volume_analyzer.recompute_volumes(context, dend_objs, report_file, self.force)
 #        context.object.spine_head_ana.recompute_volumes(context,context.active_object)
         report_file.close()
 
         return {'FINISHED'}
 
 
+class NEUROPIL_OT_analyze_object(bpy.types.Operator):
+    bl_idname = "spine_head_analyzer.analyze_object"
+    bl_label = "Compute areas, locations and neck cross sections of all contacts on object"
+    bl_description = "Compute areas, locations and neck cross sections of all contacts on object in one pass"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        n_measured = context.object.spine_head_ana.analyze_object(context)
+        self.report({'INFO'}, "Analyzed %d contacts" % (n_measured))
+
+        return {'FINISHED'}
+
+
+class NEUROPIL_OT_compare_volume_engines(bpy.types.Operator):
+    bl_idname = "spine_head_analyzer.compare_volume_engines"
+    bl_label = "Compare NumPy and operator volumes of all heads and spines on object"
+    bl_description = "Compare NumPy and operator volumes of all heads and spines on object"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        report_file = open('volume_engine_parity.txt','w')
+        max_rel_diff = context.object.spine_head_ana.compare_volume_engines(context, report_file)
+        report_file.close()
+        self.report({'INFO'}, "Largest relative volume difference: %g" % (max_rel_diff))
+
+        return {'FINISHED'}
+
+
 class NEUROPIL_OT_output(bpy.types.Operator):
     bl_idname = "spine_head_analyzer.output"
     bl_label = "Output Data"
@@ -282,40 +301,60 @@ class NEUROPIL_OT_output(bpy.types.Operator):
 
     def execute(self, context):
      
+        volume_analyzer = context.scene.volume_analyzer
         date = time.ctime().split()
         day = date[1] + '_' + date[2] + '_' + date[4]
         filepath = bpy.data.filepath
         blendfilename = filepath.split('/')[-1]  
         blendfilename2 = blendfilename[:-6]
         path = filepath[:-len(blendfilename)]
-        outfilename = path + blendfilename2 + '_' + day + '.txt'
-        if bpy.data.filepath != None:
-            dend_outFile = open(outfilename, 'wt')
-            dend_outFile.write('# sy pre_post head_vol spine_vol neck_vol computed_area region_area dia_head_max dia_head_min dia_neck_max dia_neck_min\n')
-            dends = bpy.context.scene.test_tool.spine_namestruct_name.replace('#', '[0-9]')
-            dend_filter = dends
-            dend_objs = [obj for obj in context.scene.collection.children[0].objects if re.match(dend_filter,obj.name) != None]   
-            #dend_filter = 'd[0-9][0-9]*sp[0-9]'
-            #dend_objs = [obj for obj in context.scene.collection.children[0].objects]
-            #print(dend_objs)
+        dends = bpy.context.scene.test_tool.spine_namestruct_name.replace('#', '[0-9]')
+        dend_filter = dends
+        dend_objs = [obj for obj in context.scene.collection.children[0].objects if re.match(dend_filter,obj.name) != None]   
+        #dend_filter = 'd[0-9][0-9]*sp[0-9]'
+        #dend_objs = [obj for obj in context.scene.collection.children[0].objects]
+        #print(dend_objs)
+
+        if volume_analyzer.output_format != 'TEXT':
+            # One typed column per PSD property, one row per PSD
+            records = []
             for obj in dend_objs:
-                #dend_outFile.write('%s \n' % obj.name)
-                obj.spine_head_ana.output(context, obj, dend_outFile)
-
-            dend_outFile.close()
+                for psd in obj.spine_head_ana.psd_list:
+                    record = {'blend': blendfilename, 'object': obj.name}
+                    record.update(psd.to_dict())
+                    records.append(record)
+            if volume_analyzer.output_file:
+                outfilename = bpy.path.abspath(volume_analyzer.output_file)
+                try:
+                    file_format = psd_table.table_format(outfilename)
+                except ValueError as e:
+                    self.report({'ERROR'}, str(e))
+                    return {'CANCELLED'}
+                if file_format != volume_analyzer.output_format:
+                    self.report({'ERROR'}, "Output file %s does not match the output format %s (expected a %s file)" %
+                                (outfilename, volume_analyzer.output_format, psd_table.FORMATS[volume_analyzer.output_format]))
+                    return {'CANCELLED'}
+            else:
+                outfilename = path + blendfilename2 + '_' + day + psd_table.FORMATS[volume_analyzer.output_format]
+            if len(records) == 0:
+                self.report({'WARNING'}, "No contacts to output")
+                return {'CANCELLED'}
+            try:
+                n_rows = psd_table.write_table(outfilename, psd_table.to_columns(records), volume_analyzer.output_append)
+            except (ImportError, ValueError, OSError) as e:
+                self.report({'ERROR'}, str(e))
+                return {'CANCELLED'}
+            self.report({'INFO'}, "Wrote %d contacts to %s" % (n_rows, outfilename))
+            return {'FINISHED'}
 
-        else:
-            dend_outFile = open(outfilename, 'wt')
-            dend_outFile.write('# sy pre_post head_vol spine_vol neck_vol computed_area region_area\n')
-            dends = bpy.context.scene.test_tool.spine_namestruct_name.replace('#', '[0-9]')
-            dend_filter = dends
-            dend_objs = [obj for obj in context.scene.collection.children[0].objects if re.match(dend_filter,obj.name) != None]
-            #print(dend_objs)
-            for obj in dend_objs:
-                #dend_outFile.write('%s \n' % obj.name)
-                obj.spine_head_ana.output(context, obj, dend_outFile)
+        outfilename = path + blendfilename2 + '_' + day + '.txt'
+        dend_outFile = open(outfilename, 'wt')
+        dend_outFile.write('# sy pre_post head_vol spine_vol neck_vol head_area psd_area dia_head_max dia_head_min dia_neck_max dia_neck_min\n')
+        for obj in dend_objs:
+            #dend_outFile.write('%s \n' % obj.name)
+            obj.spine_head_ana.output(context, obj, dend_outFile)
 
-            dend_outFile.close()
+        dend_outFile.close()
             
         #xon_outFile = open('spine_head_analysis_output.axons.txt', 'wt')
         #axon_outFile.write('# sy pre_post spine_vol head_vol neck_vol spine_area head_area neck_area psd_az_area psd_az_loc_x psd_az_loc_y psd_az_loc_z neck_base_loc_x neck_base_loc_y neck_base_loc_z mito h_hooked h_concave h_flatface h_bulbous h_skinny n_short n_long n_stubby n_thin n_tapered n_branched n_twotiered glia_spicule glia_ensheathed glia_adjacent glia_distant exclude\n')
@@ -384,14 +423,8 @@ class NEUROPIL_UL_check_psd(bpy.types.UIList):
       flt_neworder = []
 
       if self.use_contact_filter and contact_pattern:
-        bn1_regex = contact_pattern.base_name_1_regex
-        bn2_regex = contact_pattern.base_name_2_regex
-        c_regex = contact_pattern.contact_name_regex
-        c_reg_regex = bn1_regex + c_regex + bn2_regex
- 
-        c_reg_recomp = re.compile(c_reg_regex)
-    
-        flt_flags = [ self.bitflag_filter_item*((c_reg_recomp.fullmatch(reg.name)!=None)) for reg in regs ]
+        c_reg_regex = pattern_registry.contact_regex(contact_pattern)
+        flt_flags = [ self.bitflag_filter_item*hit for hit in pattern_registry.match_flags(c_reg_regex, [reg.name for reg in regs]) ]
 
       else:
         flt_flags = [self.bitflag_filter_item]*len(regs)
@@ -425,6 +458,25 @@ class SpineHeadAnalyzerSceneProperty(bpy.types.PropertyGroup):
     protrusion_label: StringProperty("Protrusion Label", default = 'sp')
     head_label: StringProperty("Head Label", default = 'sph')
     neck_label: StringProperty("Neck Label", default = 'spn')
+    volume_engine: EnumProperty(
+        name="Volume Engine",
+        items=[('NUMPY', "NumPy", "Intersect the region hull with the mesh arrays directly"),
+               ('OPERATORS', "Operators", "Intersect with a Boolean modifier and measure with meshalyzer")],
+        default='NUMPY')
+    output_format: EnumProperty(
+        name="Output Format",
+        items=[('TEXT', "Text", "Space separated text with the main measurements"),
+               ('CSV', "CSV", "All contact properties as CSV columns"),
+               ('NPZ', "NumPy", "All contact properties as typed arrays in a .npz file"),
+               ('PARQUET', "Parquet", "All contact properties as a Parquet table (needs pyarrow)")],
+        default='TEXT')
+    output_append: BoolProperty(
+        name="Append",
+        description="Add the contacts to the rows already in the output table, to gather many .blend files in one dataset",
+        default=False)
+    output_file: StringProperty(
+        name="Table File", subtype='FILE_PATH', default="",
+        description="Output table (CSV, NumPy or Parquet); empty for a dated file next to the .blend file")
 
     '''
     inner_namestruct_name: StringProperty("Set Inner Region Name", default = "d##sph##")
@@ -446,6 +498,44 @@ class SpineHeadAnalyzerSceneProperty(bpy.types.PropertyGroup):
     def inner_namestruct(self, context, inner_namestruct_name):
         self.inner_namestruct_name = inner_namestruct_name
     '''
+
+
+    def get_dendrite_names(self, context):
+        """ Return sorted names of objects matching the spine naming pattern """
+        dends = bpy.context.scene.test_tool.spine_namestruct_name.replace('#', '[0-9]')
+        dend_filter = dends
+        #dend_filter = 'd[0-9]{2}$'
+        dend_objs = [obj.name for obj in context.scene.collection.children[0].objects if re.match(dend_filter,obj.name) != None]
+        dend_objs.sort()
+        return(dend_objs)
+
+
+    def recompute_volumes(self, context, dend_names, report_file, force=False):
+        """ Recompute volumes of all spines on each of the named dendrites.
+            Spines whose regions and nearby mesh are unchanged since their
+            last recompute are skipped unless force is set """
+        orig_obj = context.active_object
+        if orig_obj != None:
+            orig_obj.select_set(False)
+            orig_obj.hide_viewport = False
+        bpy.context.view_layer.objects.active = None
+        bpy.context.view_layer.update()
+        for dend in dend_names:
+            obj = context.scene.collection.children[0].objects[dend]
+            obj.hide_viewport = False
+            obj.select_set(True)
+            bpy.context.view_layer.objects.active = obj  
+            bpy.context.view_layer.update()
+            obj.spine_head_ana.recompute_volumes(context,report_file,force)
+            obj.select_set(False)
+            obj.hide_viewport = True
+            bpy.context.view_layer.objects.active = None
+            bpy.context.view_layer.update()
+
+        if orig_obj != None:
+            orig_obj.hide_viewport = False
+            orig_obj.select_set(True)
+            bpy.context.view_layer.objects.active = orig_obj
      
 # Spine Head Analyzer Properties:
 # Properties of the PSDs:
@@ -467,11 +557,13 @@ class SpineHeadAnalyzerPSDProperty(bpy.types.PropertyGroup):
     area_psd_az: FloatProperty(name="Area of PSD or AZ",default=0.0)
     diameter_neck_max: FloatProperty(name="Diameter of Neck",default=0.0)
     diameter_neck_min: FloatProperty(name="Diameter of Neck",default=0.0)
+    diameter_neck_median: FloatProperty(name="Median Diameter of Neck",default=0.0)
     diameter_neck_lbt: FloatProperty(name="Diameter of Neck based on area_neck_cross_section_lbt",default=0.0)
     length_neck: FloatProperty(name="Length of Neck based on volume_neck/area_neck_cross_section",default=0.0)
     length_neck_lbt: FloatProperty(name="Length of Neck based on distance from base to top",default=0.0)
     diameter_head_max: FloatProperty(name="Diameter of Head",default=0.0)
     diameter_head_min: FloatProperty(name="Diameter of Head",default=0.0)
+    diameter_head_median: FloatProperty(name="Median Diameter of Head",default=0.0)
     diameter_head_lbt: FloatProperty(name="Diameter of Head based on area_neck_cross_section_lbt",default=0.0)
     length_head: FloatProperty(name="Length of Head based on volume_neck/area_neck_cross_section",default=0.0)
     length_head_lbt: FloatProperty(name="Length of Head based on distance from base to top",default=0.0)
@@ -480,6 +572,7 @@ class SpineHeadAnalyzerPSDProperty(bpy.types.PropertyGroup):
     neck_base_location: FloatVectorProperty(name="Location of Base of Spine Neck",default=(0.0,0.0,0.0))
     char_mito: BoolProperty(name="Mitochondrion in Bouton",default=False)
     exclude: BoolProperty(name="Exclude this spine?", default=False)
+    input_hash: StringProperty(name="Digest of the regions and mesh data this PSD was last recomputed from", default="")
     contact_type_enum = [
         ('PLAIN', 'Plain (surface only)', ''),
         ('PROTRUSION', 'Protrusion (head, neck)', ''),
@@ -500,6 +593,27 @@ class SpineHeadAnalyzerPSDProperty(bpy.types.PropertyGroup):
 
     
 
+    def to_dict(self):
+        """ Return all properties of this PSD as a plain (JSON-able) dict """
+        psd_data = {}
+        for prop in self.bl_rna.properties:
+            key = prop.identifier
+            if key == 'rna_type':
+                continue
+            value = getattr(self, key)
+            if prop.type == 'FLOAT' and prop.is_array:
+                value = list(value)
+            psd_data[key] = value
+        return(psd_data)
+
+
+    def from_dict(self, psd_data):
+        """ Set properties of this PSD from a dict made by to_dict """
+        for key, value in psd_data.items():
+            if key in self.bl_rna.properties:
+                setattr(self, key, value)
+
+
     def init_psd(self,context,name):
         obj_name = context.active_object.name
 
@@ -533,11 +647,13 @@ class SpineHeadAnalyzerPSDProperty(bpy.types.PropertyGroup):
         self.area_psd_az = self.compute_region_area(context,self.name)
         self.diameter_neck_max = 0.0
         self.diameter_neck_min = 0.0
+        self.diameter_neck_median = 0.0
         self.diameter_neck_lbt = 0.0
         self.length_neck = 0.0
         self.length_neck_lbt = 0.0
         self.diameter_head_max = 0.0
         self.diameter_head_min = 0.0
+        self.diameter_head_median = 0.0
         self.diameter_head_lbt = 0.0
         self.length_head = 0.0
         self.length_head_lbt = 0.0
@@ -547,6 +663,7 @@ class SpineHeadAnalyzerPSDProperty(bpy.types.PropertyGroup):
         self.char_mito = False
         self.exclude = False
         self.ensheathment = 'Distant'
+        self.input_hash = ""
 
 
     def select_psd(self,context):
@@ -569,70 +686,79 @@ class SpineHeadAnalyzerPSDProperty(bpy.types.PropertyGroup):
         return(reg_index)
 
 
-    def compute_region_area(self,context,region_name):
+    def compute_region_area(self,context,region_name,area_engine=None):
         obj = context.active_object
-        mesh = obj.data
         reg = obj.mcell.regions.region_list[region_name]
-        reg_faces = list(reg.get_region_faces(mesh))
-        t_mat = obj.matrix_world
-        area = 0.0
-        for face_index in reg_faces:
-            face = mesh.polygons[face_index]
-            tv0 = mesh.vertices[face.vertices[0]].co * t_mat
-            tv1 = mesh.vertices[face.vertices[1]].co * t_mat
-            tv2 = mesh.vertices[face.vertices[2]].co * t_mat
-            area += mathutils.geometry.area_tri(tv0, tv1, tv2)
-
-#        print("    Area of %s with %d faces is %g" % (region_name,len(reg_faces),area))
+        # Face areas of the whole mesh are computed once per engine,
+        #   so reuse the engine when computing several regions
+        if area_engine == None:
+            area_engine = mesh_arrays.RegionAreaEngine(obj)
+        area = area_engine.region_area(reg)
+
+#        print("    Area of %s is %g" % (region_name,area))
         return(area)
 
 
-    def compute_areas(self,context):
-        self.area_psd_az = self.compute_region_area(context,self.name)
-        name = self.name
+    def part_region_names(self, context):
+        """ Return {'head', 'spine', 'neck': region name} for this contact,
+            each named after the contact with its contact label replaced by
+            the label of the part, or None if the contact name does not
+            match the active contact pattern """
+        obj = context.active_object
+        scn = context.scene
+        match_list = obj.processor.contact_pattern_match_list
+        index = obj.spine_head_ana.active_contact_pattern_index
+        if not (0 <= index < len(match_list)):
+            return(None)
+        contact_pattern = match_list[index]
+        if self.contact_type == 'VARICOSITY':
+            head_label = scn.volume_analyzer.varicosity_label
+        else:
+            head_label = scn.volume_analyzer.head_label
+        labels = {'head': head_label,
+                  'spine': scn.volume_analyzer.protrusion_label,
+                  'neck': scn.volume_analyzer.neck_label}
+        names = {part: pattern_registry.contact_part_name(contact_pattern, self.name, label)
+                 for part, label in labels.items()}
+        if None in names.values():
+            return(None)
+        return(names)
+
 
+    def compute_areas(self,context):
         obj = context.active_object
         reg_list = obj.mcell.regions.region_list
+        area_engine = mesh_arrays.RegionAreaEngine(obj)
 
-        region_name = self.name.replace(name, name + '_sph')
-        if reg_list.get(region_name) != None:
-            self.area_head = self.compute_region_area(context,region_name)
-
-        region_name = self.name.replace(name, name + '_sp')
-        if reg_list.get(region_name) != None:
-            self.area_spine = self.compute_region_area(context,region_name)
+        self.area_psd_az = self.compute_region_area(context,self.name,area_engine)
 
-        region_name = self.name.replace(name, name + '_spn')
-        if reg_list.get(region_name) != None:
-            self.area_neck = self.compute_region_area(context,region_name)
+        part_names = self.part_region_names(context) or {}
+        for part, prop in (('head', 'area_head'), ('spine', 'area_spine'), ('neck', 'area_neck')):
+            region_name = part_names.get(part)
+            if (region_name != None) and (reg_list.get(region_name) != None):
+                setattr(self, prop, self.compute_region_area(context,region_name,area_engine))
 
-        region_name = self.name.replace('cs','axb')
-        if reg_list.get(region_name) != None:
-            self.area_head = self.compute_region_area(context,region_name)
+        # Axonal bouton of a contact, only contacts have 'cs' in their name
+        if 'cs' in self.name:
+            region_name = self.name.replace('cs','axb')
+            if reg_list.get(region_name) != None:
+                self.area_head = self.compute_region_area(context,region_name,area_engine)
 
 
-    def compute_psd_az_location(self,context):
+    def compute_psd_az_location(self,context,moment_engine=None):
+        """ Set psd_az_location to the centroid of the vertices of the PSD
+            region and return (centroid, area_centroid, axes), or None if
+            the region has no faces """
         obj = context.active_object
-        mesh = obj.data
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_mode(type='VERT')
-        self.select_psd(context)
-        bpy.ops.object.mode_set(mode='OBJECT')
-
-        psd_az_verts = [v.co for v in mesh.vertices if v.select == True]
-        av = [0,0,0]
-        for v in psd_az_verts:
-            av[0] += v[0]
-            av[1] += v[1]
-            av[2] += v[2]
-        av[0] = av[0]/len(psd_az_verts)
-        av[1] = av[1]/len(psd_az_verts)
-        av[2] = av[2]/len(psd_az_verts)
-        self.psd_az_location = av.copy()
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_all(action='DESELECT')
-        bpy.ops.mesh.select_mode(type='FACE')
-        bpy.ops.object.mode_set(mode='OBJECT')
+        reg = obj.mcell.regions.region_list[self.name]
+        # Mesh arrays are read once per engine,
+        #   so reuse the engine when computing several PSDs
+        if moment_engine == None:
+            moment_engine = mesh_arrays.RegionMomentEngine(obj)
+        moments = moment_engine.region_moments(reg)
+        if moments != None:
+            self.psd_az_location = moments[0]
+        return(moments)
 
 
     def select_spn(self, context):
@@ -654,134 +780,41 @@ class SpineHeadAnalyzerPSDProperty(bpy.types.PropertyGroup):
         reg.select_region_faces(context)
       
 
+    def compute_region_diameters(self, context, region_name):
+        """ Return (max, min, median) cross section diameters of a region """
+        obj = context.active_object
+        # Read the mesh in Object Mode so it reflects any pending edits
+        if obj.mode == 'EDIT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        reg = obj.mcell.regions.region_list[region_name]
+        return(mesh_arrays.get_region_diameters(reg, obj.data))
+
+
     def calculate_diameter(self, context):
-        self.select_spn(context)
-        mesh = context.active_object.data
-        old_to_new_index = dict()
-        selected_vertices = list()
-        selected_faces = list()
-        required_vertices = set()
-
-        for face in mesh.polygons:
-            if face.select:
-                required_vertices.add(face.vertices[0])
-                required_vertices.add(face.vertices[1])
-                required_vertices.add(face.vertices[2])
-        for i, vertex in enumerate(mesh.vertices):
-            if i in required_vertices:
-                old_to_new_index[i] = len(selected_vertices)
-                selected_vertices.append(vertex)
-        for face in mesh.polygons:
-            if face.select:
-                newa = old_to_new_index[face.vertices[0]] + 1
-                newb = old_to_new_index[face.vertices[1]] + 1
-                newc = old_to_new_index[face.vertices[2]] + 1
-                selected_faces.append((newa, newb, newc))
-
-        cwd = bpy.path.abspath(os.path.dirname(__file__))
-        tmp_obj = cwd + "/tmp.obj"
-#        exe = bpy.path.abspath(cwd + "/calc_diameter")
-        cmd = os.path.join(os.path.dirname(__file__), 'bin', 'calc_diameter')
-
-        with open(tmp_obj, "w+") as of:
-            for vertex in selected_vertices:
-                of.write("v %f %f %f\n" % (vertex.co.x, vertex.co.y, vertex.co.z))
-            for p1, p2, p3 in selected_faces:
-                of.write("f %d %d %d\n" % (p1, p2, p3))
-
-        subprocess.call([cmd, tmp_obj, cwd + "/"])
-
-        # [1:] means ignore the first row "# Segments: N"
-        diam_fn = cwd + "/tmp_diameters.txt"
-
-        #metrics = [line.split() for line in open(diam_fn)][1:]
-        sort = []
-        for line in open(diam_fn):
-            metrics = line.strip()
-            sort.append(metrics)
-
-        sort = sort[1:]
-        len_sort = len(sort)
-        #val = (len_sort/2)-1
-    
-        sort.sort(reverse=True)
-        max_diameter = sort[0]
-        min_diameter = sort[-1]
-        #middle_seg = sort[int(val)]
-        #print(middle_seg)
-        self.diameter_neck_max = float(max_diameter)
-        self.diameter_neck_min = float(min_diameter)
+        max_diameter, min_diameter, median_diameter = self.compute_region_diameters(context, self.neck_name)
+        self.diameter_neck_max = max_diameter
+        self.diameter_neck_min = min_diameter
+        self.diameter_neck_median = median_diameter
 
     def calculate_diameter_head(self, context):
-        self.select_sph(context)
-        mesh = context.active_object.data
-        old_to_new_index = dict()
-        selected_vertices = list()
-        selected_faces = list()
-        required_vertices = set()
-
-        for face in mesh.polygons:
-            if face.select:
-                required_vertices.add(face.vertices[0])
-                required_vertices.add(face.vertices[1])
-                required_vertices.add(face.vertices[2])
-        for i, vertex in enumerate(mesh.vertices):
-            if i in required_vertices:
-                old_to_new_index[i] = len(selected_vertices)
-                selected_vertices.append(vertex)
-        for face in mesh.polygons:
-            if face.select:
-                newa = old_to_new_index[face.vertices[0]] + 1
-                newb = old_to_new_index[face.vertices[1]] + 1
-                newc = old_to_new_index[face.vertices[2]] + 1
-                selected_faces.append((newa, newb, newc))
-
-        cwd = bpy.path.abspath(os.path.dirname(__file__))
-        tmp_obj = cwd + "/tmp.obj"
-#        exe = bpy.path.abspath(cwd + "/calc_diameter")
-        cmd = os.path.join(os.path.dirname(__file__), 'bin', 'calc_diameter')
-
-        with open(tmp_obj, "w+") as of:
-            for vertex in selected_vertices:
-                of.write("v %f %f %f\n" % (vertex.co.x, vertex.co.y, vertex.co.z))
-            for p1, p2, p3 in selected_faces:
-                of.write("f %d %d %d\n" % (p1, p2, p3))
-
-        subprocess.call([cmd, tmp_obj, cwd + "/"])
-
-        # [1:] means ignore the first row "# Segments: N"
-        diam_fn = cwd + "/tmp_diameters.txt"
-
-        #metrics = [line.split() for line in open(diam_fn)][1:]
-        sort = []
-        for line in open(diam_fn):
-            metrics = line.strip()
-            sort.append(metrics)
-
-        sort = sort[1:]
-        len_sort = len(sort)
-        #val = (len_sort/2)-1
-    
-        sort.sort(reverse=True)
-        max_diameter = sort[0]
-        min_diameter = sort[-1]
-        #middle_seg = sort[int(val)]
-        #print(middle_seg)
-        self.diameter_head_max = float(max_diameter)
-        self.diameter_head_min = float(min_diameter)
+        max_diameter, min_diameter, median_diameter = self.compute_region_diameters(context, self.head_name)
+        self.diameter_head_max = max_diameter
+        self.diameter_head_min = min_diameter
+        self.diameter_head_median = median_diameter
 
 
 
     def compute_neck_stats(self, context):
 
       obj = context.active_object
+      part_names = self.part_region_names(context)
+      if part_names == None:
+        print("  ***** %s does not match the contact pattern, no neck stats" % (self.name))
+        return
       if self.volume_neck > 0.0:
-        name = self.name
-
+        spine_name = part_names['spine']
+        head_name = part_names['head']
 
-        spine_name = self.name.replace(name, name + '_sp')
-        head_name = self.name.replace(name, name + '_sph')
-        
         # Estimate neck length and diameter from neck volume and neck cross section areas
         neck_top_loc, area_spine_neck_boundary = self.compute_neck_boundary_area(context,spine_name)
         neck_base_loc, area_head_neck_boundary  = self.compute_neck_boundary_area(context,head_name)
@@ -808,105 +841,21 @@ class SpineHeadAnalyzerPSDProperty(bpy.types.PropertyGroup):
 
     def compute_neck_boundary_area(self, context, reg_name):
 
-      orig_obj = context.active_object
-      reg = orig_obj.mcell.regions.region_list[reg_name]
-      # Enter edit mode and unhide and deselect mesh
-      bpy.ops.object.mode_set(mode='EDIT')
-      bpy.ops.mesh.reveal()
-      bpy.ops.mesh.select_all(action='DESELECT')
-      # Select the region
-      reg.select_region_faces(context)
-      
-      #duplicate region as new object
-      bpy.ops.mesh.duplicate()
-      #separate object from original
-      bpy.ops.mesh.separate(type = 'SELECTED')
-      # Unhide and deselect mesh and exit edit mode
-      bpy.ops.mesh.reveal()
-      bpy.ops.mesh.select_mode(type='EDGE')
-      bpy.ops.mesh.select_all(action='DESELECT')
-      bpy.ops.object.mode_set(mode='OBJECT')
-      
-      #deselect original object
-      orig_obj.select_set(False)
-      #define and name duplicated object
-      dup_obj = bpy.context.selected_objects[0]
-      dup_obj.name = reg_name + '_tmp_boundary'
-      dup_obj.data.name = dup_obj.name
-      #make dup_obj active
-      scn = bpy.context.scene
-      bpy.context.view_layer.objects.active = dup_obj
-      
-      #extract non-manifold boundary of dup_obj
-      bpy.ops.object.mode_set(mode='EDIT')
-      bpy.ops.mesh.select_mode(type='EDGE')
-      bpy.ops.mesh.select_all(action='DESELECT')
-      bpy.ops.mesh.select_non_manifold()
-      bpy.ops.mesh.select_all(action='INVERT')
-      bpy.ops.mesh.delete(type='EDGE')
-      bpy.ops.mesh.select_mode(type='VERT')
-      bpy.ops.mesh.select_all(action='SELECT')
-      bpy.ops.object.mode_set(mode='OBJECT')
-      
-      # Now project the boundary onto its principle plane
-      
-      # Get the mesh vertices
-      mesh = dup_obj.data
-      verts = mesh.vertices
-      bnd_verts = np.array([v.co for v in verts])
-      
-      # Do PCA on the vertices
-      covm = np.cov(bnd_verts,rowvar=0)
-      eigval, eigvec = np.linalg.eig(covm)
-      
-      # Take the top to two principle component vectors
-      r = np.sqrt(eigval)
-      r = sorted(list(enumerate(r)),key=lambda l: l[1], reverse=True)
-      pcv = []
-      for i in range(len(r)-1):
-        pcv.append(r[i][1]*eigvec[:,r[i][0]])
-        
-      # Define the normal vector of the principle plane as
-      #   the cross product of the two principle vectors
-      nvec = np.cross(pcv[0],pcv[1])
-      nvec = nvec/np.linalg.norm(nvec)
-
-      # Project the boundary vertices onto the principle plane
-      bnd_centroid = bnd_verts.mean(axis=0)
-      for i in range(len(bnd_verts)):
-          p = bnd_verts[i]
-          v = p - bnd_centroid
-          p_proj = p - np.dot(v,nvec)*nvec
-          verts[i].co.x = p_proj[0]
-          verts[i].co.y = p_proj[1]
-          verts[i].co.z = p_proj[2]
-    #      verts.add(1)
-    #      verts[-1].co = p_proj
-
-      # Make planar polygon out of the projected boundary
-      bpy.ops.object.mode_set(mode='EDIT')
-      bpy.ops.mesh.edge_face_add()
-      bpy.ops.object.mode_set(mode='OBJECT')
-      
-      # Extract the boundary vertices in polygonal order
-      pverts = []
-      poly = mesh.polygons[0]
-      for vi in poly.vertices:
-          pverts.append(verts[vi].co)
-          
-      # measure the area of the boundary cross section polygon
-      area = abs(self.area_3D_polygon(pverts, nvec))
-      
-      # We're done so now delete boundary object and mesh  
-      dup_obj.select_set(False)
-      bpy.context.scene.collection.children[0].objects.unlink(dup_obj)
-      bpy.data.objects.remove(dup_obj)
-      bpy.data.meshes.remove(mesh)
-      
-      #reselect original object
-      bpy.context.view_layer.objects.active = orig_obj
-      orig_obj.select_set(True)
-      
+      # Return the center of the boundary of the region and the area of
+      #   the cross section it encloses, projected onto its principal plane
+      obj = context.active_object
+      reg = obj.mcell.regions.region_list[reg_name]
+      verts, tris = mesh_arrays.get_region_triangles(reg, obj.data)
+      try:
+        section = core.boundary_cross_section(verts, tris)
+      except ValueError as e:
+        print('Region %s: %s' % (reg_name, e))
+        return([0.0, 0.0, 0.0], 0.0)
+      if section == None:
+        print('Region %s has no boundary' % (reg_name))
+        return([0.0, 0.0, 0.0], 0.0)
+      bnd_centroid, nvec, area = section
+
       return(list(bnd_centroid), area)
       
 
@@ -915,171 +864,34 @@ class SpineHeadAnalyzerPSDProperty(bpy.types.PropertyGroup):
       # an object, compute the normal vector of the best principle plane
       # passing through the boundary of the region
 
-      orig_obj = context.active_object
-
-      bpy.ops.object.mode_set(mode='EDIT')
-      bpy.ops.mesh.reveal()
-      bpy.ops.mesh.select_all(action='DESELECT')
-
+      obj = context.active_object
+      mesh = obj.data
       if reg_name:
-        reg = orig_obj.mcell.regions.region_list[reg_name]
-        # Enter edit mode and unhide and deselect mesh
-        # Select the region
-        reg.select_region_faces(context)
-        tmp_obj_name = reg_name + '_tmp_boundary'
+        reg = obj.mcell.regions.region_list[reg_name]
+        verts, tris = mesh_arrays.get_region_triangles(reg, mesh)
       else:
-        bpy.ops.mesh.select_all(action='SELECT')
-        tmp_obj_name = orig_obj.name + '_tmp_boundary'
-      
-      #duplicate region as new object
-      bpy.ops.mesh.duplicate()
-      #separate object from original
-      bpy.ops.mesh.separate(type = 'SELECTED')
-      # Unhide and deselect mesh and exit edit mode
-      bpy.ops.mesh.reveal()
-      bpy.ops.mesh.select_mode(type='EDGE')
-      bpy.ops.mesh.select_all(action='DESELECT')
-      bpy.ops.object.mode_set(mode='OBJECT')
-      
-      #deselect original object
-      orig_obj.select_set(False)
-      #define and name duplicated object
-      dup_obj = bpy.context.selected_objects[0]
-      dup_obj.name = tmp_obj_name
-      dup_obj.data.name = dup_obj.name
-      #make dup_obj active
-      scn = bpy.context.scene
-      bpy.context.view_layer.objects.active = dup_obj
-
-      # Compute centroid of object
-      mesh = dup_obj.data
-      verts = mesh.vertices
-      v_array = np.array([v.co for v in verts])
-      v_centroid = v_array.mean(axis=0)
-      
-      #extract non-manifold boundary of dup_obj
-      bpy.ops.object.mode_set(mode='EDIT')
-      bpy.ops.mesh.select_mode(type='EDGE')
-      bpy.ops.mesh.select_all(action='DESELECT')
-      bpy.ops.mesh.select_non_manifold()
-      bpy.ops.mesh.select_all(action='INVERT')
-      bpy.ops.mesh.delete(type='EDGE')
-      bpy.ops.mesh.select_mode(type='VERT')
-      bpy.ops.mesh.select_all(action='SELECT')
-      bpy.ops.object.mode_set(mode='OBJECT')
-
-      # Now find the principle plane of the boundary
-      
-      # Get the boundary vertices and compute centroid
-      mesh = dup_obj.data
-      verts = mesh.vertices
-      bnd_verts = np.array([v.co for v in verts])
-      bnd_centroid = bnd_verts.mean(axis=0)
-      
-      # Do PCA on the vertices
-      covm = np.cov(bnd_verts,rowvar=0)
-      eigval, eigvec = np.linalg.eig(covm)
-      
-      # Take the top to two principle component vectors
-      r = np.sqrt(eigval)
-      r = sorted(list(enumerate(r)),key=lambda l: l[1], reverse=True)
-      pcv = []
-      for i in range(len(r)-1):
-        pcv.append(r[i][1]*eigvec[:,r[i][0]])
-
-      # Define the normal vector of the principle plane as
-      # the cross product of the two principle vectors
-      # Orient the vector to point toward the centroid of the object
-      nvec = np.cross(pcv[0],pcv[1])
-      nvec = nvec/np.linalg.norm(nvec)
+        verts = mesh_arrays.get_vertices(mesh)
+        tris, tri_face = mesh_arrays.get_triangles(mesh)
+
+      # Compute centroid of the region
+      v_centroid = verts[np.unique(tris)].mean(axis=0)
+
+      # Find the principle plane of the boundary
+      bnd_verts = verts[np.unique(core.boundary_edges(tris))]
+      bnd_centroid, nvec = core.plane_fit(bnd_verts)
+
+      # Orient the normal vector to point toward the centroid of the object
       objvec = v_centroid - bnd_centroid
       objvec = objvec/np.linalg.norm(objvec)
       nvec = np.sign(nvec.dot(objvec))*nvec
 
-      # Convert nvec and bnd_centroid to list
-      nvec = list(nvec)
-      bnd_centroid = list(bnd_centroid)
-
-      # We're done so now delete boundary object and mesh  
-      dup_obj.select_set(False)
-      bpy.context.scene.collection.children[0].objects.unlink(dup_obj)
-      bpy.data.objects.remove(dup_obj)
-      bpy.data.meshes.remove(mesh)
-      
-      #reselect original object
-      bpy.context.view_layer.objects.active = orig_obj
-      orig_obj.select_set(True)
-      
-      return(bnd_centroid, nvec)
+      return(list(bnd_centroid), list(nvec))
 
       
     def area_3D_polygon(self, verts, nvec):
-        
-        '''
-        # make test triangle to validate area computation: area = 0.0074489
-        print('verts: ', verts)
-        verts = []
-        verts.append([5.543,5.581,5.878])
-        verts.append([5.559,5.576,5.753])
-        verts.append([5.450,5.648,5.843])
-        v1 = np.array(verts[1]) - np.array(verts[0])
-        v2 = np.array(verts[2]) - np.array(verts[0])
-        nvec = np.cross(v1,v2)
-        nvec = nvec/np.linalg.norm(nvec)
-        '''
-        
-        n = len(verts)
-        verts = verts.copy()
-        verts.append(verts[0])
-        
-        # select largest abs coordinate to ignore for projection
-        ax = abs(nvec[0])   # abs x-coord
-        ay = abs(nvec[1])   # abs y-coord
-        az = abs(nvec[2])   # abs z-coord
-            
-        coord = 3          # ignore z-coord
-        if (ax > ay):
-            if (ax > az):
-                coord = 1   # ignore x-coord
-        elif (ay > az):
-             coord = 2      # ignore y-coord
-
-        # compute area of the 2D projection
-        area = 0.0
-        j=2
-        k=0
-        if coord == 1:
-            for i in range(1,n):
-                area += (verts[i][1] * (verts[j][2] - verts[k][2]))
-                j+=1
-                k+=1
-        elif coord == 2:
-            for i in range(1,n):
-                area += (verts[i][2] * (verts[j][0] - verts[k][0]))
-                j+=1
-                k+=1
-        elif coord == 3:
-            for i in range(1,n):
-                area += (verts[i][0] * (verts[j][1] - verts[k][1]))
-                j+=1
-                k+=1
-                
-        if coord == 1:   # wrap-around term
-            area += (verts[n][1] * (verts[1][2] - verts[n-1][2]))
-        elif coord == 2:
-            area += (verts[n][2] * (verts[1][0] - verts[n-1][0]))
-        elif coord == 3:
-            area += (verts[n][0] * (verts[1][1] - verts[n-1][1]))
-
-        # scale to get area before projection
-        if coord == 1:
-            area /= 2*nvec[0]
-        elif coord == 2:
-            area /= 2*nvec[1]
-        elif coord == 3:
-            area /= 2*nvec[2]
-            
-        return area
+        # Signed area of the polygon verts projected onto the plane with
+        #   unit normal nvec
+        return core.polygon_area(np.asarray(verts, dtype=np.float64), np.asarray(nvec))
 
 
 
@@ -1091,23 +903,19 @@ class SpineHeadAnalyzerPSDProperty(bpy.types.PropertyGroup):
 #            (self.psd_az_location[2] == 0.0):
 #              self.compute_psd_az_location(context)
         #file.write('%s'  % (obj.name))
-        file.write('%s' % (self.name))
-        file.write(' %s' % (self.char_postsynaptic))
-        file.write(' %g' % (self.volume))
-        file.write(' %g' % (self.volume_spine))
-        file.write(' %g' % (self.volume_neck))
-        file.write(' %g' % (self.area_head))
-        file.write(' %g' % (self.area_psd_az))
-        file.write(' %g' % (self.diameter_head_max))
-        file.write(' %g' % (self.diameter_head_min))
-        file.write(' %g' % (self.diameter_neck_max))
-        file.write(' %g' % (self.diameter_neck_min))
-        file.write('\n')
+        file.write('%s %s %g %g %g %g %g %g %g %g %g\n' %
+                   (self.name, self.char_postsynaptic, self.volume,
+                    self.volume_spine, self.volume_neck, self.area_head,
+                    self.area_psd_az, self.diameter_head_max,
+                    self.diameter_head_min, self.diameter_neck_max,
+                    self.diameter_neck_min))
 
 
 
 
     def compute_volume(self,context,mode,n_components,make_shell_opt=False,make_jaccard_opt=False):
+        # Returns False without touching any region if the contact name does
+        #   not match the contact pattern the part names are made from
         # Now make a new region for spine head and name it
           # Generate the name for the spine head
         
@@ -1200,25 +1008,17 @@ class SpineHeadAnalyzerPSDProperty(bpy.types.PropertyGroup):
         orig_obj = context.active_object
         mesh = orig_obj.data
         reg_list = orig_obj.mcell.regions.region_list  
-        contact_pattern = orig_obj.processor.contact_pattern_match_list[orig_obj.spine_head_ana.active_contact_pattern_index]
 
 #        print("Computing volumed of %s on %s..." % (self.name, orig_obj.name))
-        bn1_grp_regex = '(' + contact_pattern.base_name_1_regex + ')'
-        bn2_grp_regex = '(' + contact_pattern.base_name_2_regex + ')'
-        c_grp_regex = '(' + contact_pattern.contact_name_regex + ')'
-        c_regex = bn1_grp_regex + c_grp_regex + bn2_grp_regex
-        c_m = re.fullmatch(c_regex,self.name)
-        c_pat = contact_pattern.contact_name_pattern
-        c_label = re.sub('[\#\*]', '', c_pat)
+        part_names = self.part_region_names(context)
+        if part_names == None:
+            print("  ***** %s does not match the contact pattern, no %s region made" % (self.name, mode))
+            return(False)
         if mode == 'head':
-            if self.contact_type=='PROTRUSION':
-                head_part = re.sub(c_label, scn.volume_analyzer.head_label, c_m.groups()[1])
-            elif self.contact_type=='VARICOSITY':
-                head_part = re.sub(c_label, scn.volume_analyzer.varicosity_label, c_m.groups()[1])
-            reg_name = c_m.groups()[0] + head_part + c_m.groups()[2]
+            reg_name = part_names['head']
             self.head_name = reg_name
         else: 
-            reg_name = self.name.replace(name, outer_obj_name)
+            reg_name = part_names['spine']
             self.spine_name = reg_name
 
         reg = orig_obj.mcell.regions.region_list.get(reg_name)
@@ -1231,6 +1031,7 @@ class SpineHeadAnalyzerPSDProperty(bpy.types.PropertyGroup):
             reg.reset_region(mesh)
 #        print("  Assigning faces to region %s" % (reg_name))
         reg.assign_region_faces(context)
+        mesh_arrays.invalidate_region_faces(mesh, [reg_name])
     
         # Compute area of region
 #        print("  Computing area of %s" % (reg_name))
@@ -1239,6 +1040,113 @@ class SpineHeadAnalyzerPSDProperty(bpy.types.PropertyGroup):
         else:
             self.area_spine = self.compute_region_area(context,reg_name)
 
+        if (scn.volume_analyzer.volume_engine == 'NUMPY') and \
+            not (make_shell_opt or make_jaccard_opt):
+            # Compute location of top or base of neck:
+            if mode == 'head':
+                nloc, nvec = self.compute_normal_from_boundary(context, reg_name)
+                self.neck_top_location = nloc.copy()
+                self.head_base_normal = nvec.copy()
+            else:
+                self.neck_base_location = self.compute_region_boundary_center(context, reg_name)
+            volume = self.compute_hull_volume(context, reg_name, n_components)
+        else:
+            # Shells are objects in the scene so only the operators make them
+            volume = self.compute_volume_operators(context, mode, n_components, make_shell_opt, make_jaccard_opt)
+
+        if volume != None:
+            if mode == 'head':
+                self.volume = volume
+            else:
+                self.volume_spine = volume
+
+        # Make neck
+        if (self.volume != 0.0) and (self.volume_spine != 0.0):
+            #reselect original dendrite
+            orig_obj.select_set(True)
+            bpy.context.view_layer.objects.active = orig_obj
+            bpy.context.view_layer.update()
+            mesh = orig_obj.data
+            bpy.ops.object.mode_set(mode='OBJECT')
+	
+            # Make Neck Region
+            sp_name = part_names['spine']
+            sph_name = part_names['head']
+            spn_name = part_names['neck']
+
+            spine_reg = reg_list.get(sp_name)
+            head_reg = reg_list.get(sph_name)
+            if (spine_reg == None) or (head_reg == None):
+                print("  ***** Missing %s or %s, no neck region made for %s" % (sp_name, sph_name, self.name))
+            else:
+                neck_reg = reg_list.get(spn_name)
+                if neck_reg == None:
+                    orig_obj.mcell.regions.add_region_by_name(context,spn_name)
+                    neck_reg = reg_list[spn_name]
+
+                # The neck is the whole spine minus the head
+                neck_faces = mesh_arrays.get_region_face_set(spine_reg, mesh) - \
+                             mesh_arrays.get_region_face_set(head_reg, mesh)
+                mesh_arrays.set_region_faces(neck_reg, mesh, neck_faces)
+                self.neck_name = spn_name
+                self.area_neck = self.compute_region_area(context,spn_name)
+
+                # Calculate Neck Volume
+                self.volume_neck = self.volume_spine - self.volume
+
+
+        # RETURN TO ORIGINAL VIEW
+        #reselect original dendrite
+        orig_obj.select_set(True)
+        bpy.context.view_layer.objects.active = orig_obj	
+        #re-enter editmode
+        bpy.ops.object.mode_set(mode='EDIT')
+        #unhide original
+        bpy.ops.mesh.reveal()
+        bpy.ops.mesh.select_all(action='DESELECT')
+        bpy.ops.mesh.select_mode(type='FACE')
+        return(True)
+
+
+    def compute_region_boundary_center(self, context, reg_name):
+        """ Return the centroid of the boundary vertices of a region """
+        obj = context.active_object
+        if obj.mode == 'EDIT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        reg = obj.mcell.regions.region_list[reg_name]
+        verts, tris = mesh_arrays.get_region_triangles(reg, obj.data)
+        center = core.boundary_center(verts, tris)
+        if center is None:
+            return([0.0, 0.0, 0.0])
+        return(list(center))
+
+
+    def compute_hull_volume(self, context, reg_name, n_components):
+        """ Return the volume of the intersection of the object with the
+            convex hull of a region, computed from mesh arrays """
+        obj = context.active_object
+        if obj.mode == 'EDIT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        mesh = obj.data
+        reg = obj.mcell.regions.region_list[reg_name]
+        verts = mesh_arrays.get_world_vertices(obj)
+        tris, tri_face = mesh_arrays.get_triangles(mesh)
+        region_tris = core.region_triangles(tris, tri_face, mesh_arrays.get_region_faces(reg, mesh))
+
+        labels = None
+        if (n_components > 1):
+            # Only intersect with the piece of the object containing the region
+            n_components, labels = mesh_arrays.get_components(obj)
+
+        return(core.hull_volume(verts, tris, region_tris, labels))
+
+
+    def compute_volume_operators(self, context, mode, n_components, make_shell_opt=False, make_jaccard_opt=False):
+        """ Compute the volume of the selected faces with the Boolean
+            modifier and meshalyzer, returning None if meshalyzer fails """
+        scn = bpy.context.scene
+        orig_obj = context.active_object
+
         # DUPLICATE SELECTION AND SEPARATE
         #editmode
         bpy.ops.object.mode_set(mode='EDIT')
@@ -1531,24 +1439,21 @@ class SpineHeadAnalyzerPSDProperty(bpy.types.PropertyGroup):
                 bpy.ops.object.mode_set(mode='OBJECT')
                 bpy.ops.mcell.meshalyzer()
                 volume = scn.mcell.meshalyzer.volume
-            if mode == 'head':
-                self.volume = volume
-            else:
-                self.volume_spine = volume
         else:
+            volume = None
             print("%s failed meshalyzer test:  %s" % (hull.name, scn.mcell.meshalyzer.status))
 
         # Make shell object from hull/head/spine
         if make_shell_opt:
             if mode == 'head': 
                 #self.char_postsynaptic:
-                shell_name = self.name.replace(name, 'in_sh_'+ inner_obj_name)
+                shell_name = 'in_sh_' + self.head_name
                 offset = -0.005
                 #else:
                 #    shell_name = self.name.replace(name, name + '_axbs')
                 #    offset = -0.005
             else:
-                shell_name = self.name.replace(name, 'out_sh_' + outer_obj_name)
+                shell_name = 'out_sh_' + self.spine_name
                 offset = -0.010
 #                offset = -0.050
             #remove regions from shell
@@ -1572,7 +1477,7 @@ class SpineHeadAnalyzerPSDProperty(bpy.types.PropertyGroup):
             hull.select_set(False)
             hull.hide_viewport = True
         elif make_jaccard_opt:
-            shell_name = self.name.replace(name, inner_obj_name) + '_tmp_jaccard'
+            shell_name = self.head_name + '_tmp_jaccard'
             #remove regions from shell
             hull.mcell.regions.remove_all_regions(context)
             #rename the shell
@@ -1591,56 +1496,7 @@ class SpineHeadAnalyzerPSDProperty(bpy.types.PropertyGroup):
         else:
             bpy.ops.object.delete()
 
-
-        # Make neck
-        if (self.volume != 0.0) and (self.volume_spine != 0.0):
-            #reselect original dendrite
-            orig_obj.select_set(True)
-            bpy.context.view_layer.objects.active = orig_obj
-            #unhide and unselect original mesh
-            bpy.context.view_layer.update()
-            mesh = orig_obj.data
-            bpy.ops.object.mode_set(mode='EDIT')
-            bpy.ops.mesh.reveal()
-            bpy.ops.mesh.select_mode(type='FACE')
-            bpy.ops.mesh.select_all(action='DESELECT')
-	
-            # Make Neck Region
-            sp_name = self.name.replace(name, outer_obj_name)
-            sph_name = self.name.replace(name, inner_obj_name)
-            spn_name = self.name.replace(name, inter_obj_name)
-
-            neck_reg = orig_obj.mcell.regions.region_list.get(spn_name)
-            if neck_reg == None:
-                orig_obj.mcell.regions.add_region_by_name(context,spn_name)
-                neck_reg = orig_obj.mcell.regions.region_list[spn_name]
-            else:
-                neck_reg.reset_region(mesh)
-            spine_reg = orig_obj.mcell.regions.region_list[sp_name]
-            head_reg = orig_obj.mcell.regions.region_list[sph_name]
-
-            spine_reg.select_region_faces(context)
-            head_reg.deselect_region_faces(context)
-
-            neck_reg.assign_region_faces(context)
-            self.neck_name = spn_name
-            self.area_neck = self.compute_region_area(context,spn_name)
-
-            # Calculate Neck Volume
-            self.volume_neck = self.volume_spine - self.volume
-            bpy.ops.object.mode_set(mode='OBJECT')
-
-
-        # RETURN TO ORIGINAL VIEW
-        #reselect original dendrite
-        orig_obj.select_set(True)
-        bpy.context.view_layer.objects.active = orig_obj	
-        #re-enter editmode
-        bpy.ops.object.mode_set(mode='EDIT')
-        #unhide original
-        bpy.ops.mesh.reveal()
-        bpy.ops.mesh.select_all(action='DESELECT')
-        bpy.ops.mesh.select_mode(type='FACE')
+        return(volume)
 
 
 class SpineHeadAnalyzerObjectProperty(bpy.types.PropertyGroup):
@@ -1657,6 +1513,13 @@ class SpineHeadAnalyzerObjectProperty(bpy.types.PropertyGroup):
     initialized: BoolProperty(name = "Full Object Region", default = False)
 
 
+    # Properties of each PSD read and written by analyze_object
+    sweep_scalars = ('area_psd_az', 'area_head', 'area_spine', 'area_neck',
+                     'volume_neck', 'area_neck_cross_section_abt',
+                     'area_neck_cross_section_lbt', 'length_neck',
+                     'length_neck_lbt', 'diameter_neck_lbt')
+    sweep_vectors = ('psd_az_location', 'neck_top_location', 'neck_base_location')
+
     def get_active_psd(self,context):
         obj = context.active_object
         reg_list = obj.mcell.regions.region_list  
@@ -1793,6 +1656,7 @@ class SpineHeadAnalyzerObjectProperty(bpy.types.PropertyGroup):
         reg = obj.mcell.regions.add_region_by_name(context,psd_region_name) 
         reg = obj.mcell.regions.region_list[psd_region_name]
         reg.assign_region_faces(context)
+        mesh_arrays.invalidate_region_faces(obj.data, [psd_region_name])
         bpy.ops.mesh.select_all(action='DESELECT')
         #reg.select_region_faces(context)
         self.initialized = True 
@@ -1812,48 +1676,96 @@ class SpineHeadAnalyzerObjectProperty(bpy.types.PropertyGroup):
 
 
     def set_n_components(self,context):
+        # Make sure mesh data is in sync with any edits before labeling
         bpy.ops.object.mode_set(mode='OBJECT')
         obj = context.active_object
-        mesh = obj.data
-
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.reveal()
-        bpy.ops.mesh.select_mode(type='VERT')
-        bpy.ops.mesh.select_all(action='DESELECT')
-
-        # Count total vertices and number of vertices contiguous with vertex 0
-        bpy.ops.object.mode_set(mode='OBJECT')
-        mesh.vertices[0].select = True
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_linked()
-        n_v_tot = len(mesh.vertices)
-        n_v_sel = mesh.total_vert_sel
-        bpy.ops.object.mode_set(mode='OBJECT')
-
-        # Loop over disjoint components
-        n_components = 1
-        while (n_v_sel < n_v_tot):
-            n_components += 1
-            # make list of selected indices
-            vl1 = [v.index for v in mesh.vertices if v.select == True]
-            # make list of indices of remaining component(s)
-            vl2 = [v.index for v in mesh.vertices if v.select == False]
-            # Grow selection with vertices contiguous with first vertex of remainder
-            mesh.vertices[vl2[0]].select = True
-            bpy.ops.object.mode_set(mode='EDIT')
-            bpy.ops.mesh.select_linked()
-
-            # Count number of vertices now selected and loop again if necessary
-            n_v_sel = mesh.total_vert_sel
-            bpy.ops.object.mode_set(mode='OBJECT')
-
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_mode(type='FACE')
-        bpy.ops.object.mode_set(mode='OBJECT')
+        n_components, labels = mesh_arrays.get_components(obj)
         self.n_components = n_components
 
 
-    def recompute_volumes(self,context,report_file):
+    def analyze_object(self,context):
+        """ Compute the areas, location and neck cross sections of every PSD
+            in psd_list from one read of the mesh and its regions, and write
+            them back to psd_list.  Return the number of PSDs measured """
+        obj = context.active_object
+        bpy.ops.object.mode_set(mode='OBJECT')
+        psd_list = self.psd_list
+        n = len(psd_list)
+
+        def get_values(key, size=1):
+            values = np.zeros(n*size, dtype=np.float32)
+            psd_list.foreach_get(key, values)
+            return(values.reshape(n, size) if size > 1 else values)
+
+        values = {key: get_values(key) for key in self.sweep_scalars}
+        values.update({key: get_values(key, 3) for key in self.sweep_vectors})
+
+        # Region names of the head, spine, neck and axonal bouton of each PSD
+        #   (the same names compute_volume labels them with)
+        psd_names = [psd.name for psd in psd_list]
+        region_names = []
+        for psd in psd_list:
+            regs = psd.part_region_names(context)
+            if regs == None:
+                print('PSD %s does not match the contact pattern, only its own area is measured' % (psd.name))
+                regs = {}
+            if 'cs' in psd.name:
+                regs['bouton'] = psd.name.replace('cs', 'axb')
+            region_names.append(regs)
+        wanted = set(psd_names)
+        for regs in region_names:
+            wanted.update(regs.values())
+        sections = [regs[key] for regs, volume_neck in zip(region_names, values['volume_neck'])
+                    if volume_neck > 0.0 for key in ('head', 'spine') if key in regs]
+
+        face_sets = mesh_arrays.get_all_region_faces(obj, wanted)
+        sweep = mesh_arrays.sweep_object(obj, face_sets, psd_names, sections)
+
+        n_measured = 0
+        for i, (name, regs) in enumerate(zip(psd_names, region_names)):
+            result = sweep.get(name)
+            if result == None:
+                continue
+            n_measured += 1
+            values['area_psd_az'][i] = result['area']
+            if result['moments'] != None:
+                values['psd_az_location'][i] = result['moments'][0]
+            for key, prop in (('head', 'area_head'), ('spine', 'area_spine'),
+                              ('neck', 'area_neck'), ('bouton', 'area_head')):
+                reg_name = regs.get(key)
+                if reg_name in sweep:
+                    values[prop][i] = sweep[reg_name]['area']
+
+            # Neck cross sections where the spine and head meet, as in compute_neck_stats
+            volume_neck = values['volume_neck'][i]
+            top = sweep.get(regs.get('spine'), {}).get('section')
+            base = sweep.get(regs.get('head'), {}).get('section')
+            for key in ('spine', 'head'):
+                error = sweep.get(regs.get(key), {}).get('error')
+                if error != None:
+                    print('Region %s: %s' % (regs[key], error))
+            if (volume_neck <= 0.0) or (top == None) or (base == None):
+                continue
+            values['neck_top_location'][i] = top[0]
+            values['neck_base_location'][i] = base[0]
+            area_abt = (top[2] + base[2])/2.0
+            values['area_neck_cross_section_abt'][i] = area_abt
+            if area_abt > 0.0:
+                values['length_neck'][i] = volume_neck/area_abt
+            length_lbt = np.linalg.norm(base[0] - top[0])
+            values['length_neck_lbt'][i] = length_lbt
+            if length_lbt > 0.0:
+                area_lbt = volume_neck/length_lbt
+                values['area_neck_cross_section_lbt'][i] = area_lbt
+                values['diameter_neck_lbt'][i] = 2*np.sqrt(area_lbt/np.pi)
+
+        for key, value in values.items():
+            if key != 'volume_neck':
+                psd_list.foreach_set(key, value.ravel())
+        return(n_measured)
+
+
+    def recompute_volumes(self,context,report_file,force=False):
         if self.n_components == 0:
           self.set_n_components(context)
         c_name_struct_full = bpy.context.scene.test_tool.PSD_namestruct_name.replace('#','[0-9]')
@@ -1862,13 +1774,26 @@ class SpineHeadAnalyzerObjectProperty(bpy.types.PropertyGroup):
         bpy.ops.object.mode_set(mode='OBJECT')
         reg_list = obj.mcell.regions.region_list
         sy_list = [reg.name for reg in reg_list if re.search(c_name_struct_full, reg.name)]
+        sweep = mesh_arrays.sweep_object(obj, mesh_arrays.get_all_region_faces(obj, set(sy_list)), sy_list)
+        hasher = mesh_arrays.get_region_hasher(obj)
+        volume_engine = context.scene.volume_analyzer.volume_engine
+
+        def psd_digest(psd):
+            # Digest of the PSD, head, whole spine and neck regions, the mesh
+            #   near them and the settings the volumes were computed with
+            part_names = psd.part_region_names(context) or {}
+            reg_names = (psd.name,) + tuple(part_names.get(part) for part in ('head', 'spine', 'neck'))
+            settings = (tuple(tuple(row) for row in obj.matrix_world), volume_engine,
+                        self.n_components, reg_names)
+            return(hasher.digest([mesh_arrays.get_region_faces(reg_list[r], obj.data)
+                                  for r in reg_names if (r != None) and (reg_list.get(r) != None)], settings))
+
         psd = None
         psd_region_name = None
         for psd_region_name in sy_list:
             print("Checking %s..." % (psd_region_name))
             report_file.write("Checking %s...\n" % (psd_region_name))
             psd = self.psd_list.get(psd_region_name)
-            name = psd.name
             if psd == None:
                 print("  Automatically added and excluded PSD: %s" % (psd_region_name))
                 report_file.write("  Automatically added and excluded PSD: %s\n" % (psd_region_name))
@@ -1878,19 +1803,37 @@ class SpineHeadAnalyzerObjectProperty(bpy.types.PropertyGroup):
                 print("  Skipping excluded PSD: %s" % (psd_region_name))
                 report_file.write("  Skipping excluded PSD: %s\n" % (psd_region_name))
             else:
+                digest = psd_digest(psd)
+                if (not force) and (psd.input_hash != "") and (psd.input_hash == digest):
+                    print("  Skipping unchanged PSD: %s" % (psd_region_name))
+                    report_file.write("  Skipping unchanged PSD: %s\n" % (psd_region_name))
+                    continue
+                if force or (psd.input_hash != ""):
+                    # Regions or mesh changed since the last recompute, so
+                    #   none of the stored results can be trusted
+                    psd.psd_az_location = (0.0,0.0,0.0)
+                    psd.area_psd_az = 0.0
+                    psd.area_head = 0.0
+                    psd.area_spine = 0.0
                 if (psd.psd_az_location[0] == 0.0) and \
                     (psd.psd_az_location[1] == 0.0) and \
                     (psd.psd_az_location[2] == 0.0):
-                        psd.compute_psd_az_location(context)
+                        moments = sweep[psd_region_name]['moments']
+                        if moments != None:
+                            psd.psd_az_location = moments[0]
                         print("  Updated PSD location: <%g, %g, %g>" % (psd.psd_az_location[0],psd.psd_az_location[1],psd.psd_az_location[2]))
                         report_file.write("  Updated PSD location: <%g, %g, %g>\n" % (psd.psd_az_location[0],psd.psd_az_location[1],psd.psd_az_location[2]))
                 if (psd.area_psd_az == 0.0):
-                    psd.area_psd_az = psd.compute_region_area(context,psd_region_name)
+                    psd.area_psd_az = sweep[psd_region_name]['area']
                     print("  Updated PSD area: %g" % (psd.area_psd_az))
                     report_file.write("  Updated PSD area: %g\n" % (psd.area_psd_az))
-                if ((psd.area_head == 0.0) or (psd.area_spine == 0.0)):
-                    head_region_name = psd_region_name.replace(name, inner_obj_name)
-                    spine_region_name = psd_region_name.replace(name, outer_obj_name)
+                part_names = psd.part_region_names(context)
+                if part_names == None:
+                    print("  ***** PSD %s does not match the contact pattern, no head or spine" % (psd_region_name))
+                    report_file.write("  ***** PSD %s does not match the contact pattern, no head or spine\n" % (psd_region_name))
+                elif ((psd.area_head == 0.0) or (psd.area_spine == 0.0)):
+                    head_region_name = part_names['head']
+                    spine_region_name = part_names['spine']
                     bpy.ops.object.mode_set(mode='EDIT')
                     bpy.ops.mesh.select_mode(type='FACE')
                     if psd.area_head == 0.0:
@@ -1906,9 +1849,8 @@ class SpineHeadAnalyzerObjectProperty(bpy.types.PropertyGroup):
                             psd.compute_volume(context,mode,self.n_components,self.make_shell_head_opt)
                             print('  Updated volume of %s  head: %g' % (head_region_name, psd.volume))
                             report_file.write('  Updated volume of %s  head: %g\n' % (head_region_name, psd.volume))
-                            psd.calculate_head_diameter(context)
-                            head_region_name = psd_region_name.replace(name, inner_obj_name)
-                            report_file.write('  Updated diameter and length of head %s  max diameter: %g  min diameter: %g  length: %g\n' % (head_region_name, psd.diameter_head_max, psd.diameter_head_min, psd.length_head))
+                            psd.calculate_diameter_head(context)
+                            report_file.write('  Updated diameter and length of head %s  max diameter: %g  min diameter: %g  median diameter: %g  length: %g\n' % (head_region_name, psd.diameter_head_max, psd.diameter_head_min, psd.diameter_head_median, psd.length_head))
 
 
                     if psd.area_spine == 0.0:
@@ -1935,8 +1877,11 @@ class SpineHeadAnalyzerObjectProperty(bpy.types.PropertyGroup):
                 if (psd.volume_neck > 0.0):
                     #psd.compute_neck_stats(context)
                     psd.calculate_diameter(context)
-                    neck_region_name = psd_region_name.replace(name, inner_obj_name)
-                    report_file.write('  Updated diameter and length of neck %s  max diameter: %g  min diameter: %g  length: %g\n' % (neck_region_name, psd.diameter_neck_max, psd.diameter_neck_min, psd.length_neck))
+                    neck_region_name = psd.neck_name
+                    report_file.write('  Updated diameter and length of neck %s  max diameter: %g  min diameter: %g  median diameter: %g  length: %g\n' % (neck_region_name, psd.diameter_neck_max, psd.diameter_neck_min, psd.diameter_neck_median, psd.length_neck))
+                bpy.ops.object.mode_set(mode='OBJECT')
+                # Computing volumes may have labeled head and spine regions
+                psd.input_hash = psd_digest(psd)
                   
             bpy.ops.object.mode_set(mode='OBJECT')
 
@@ -1944,11 +1889,50 @@ class SpineHeadAnalyzerObjectProperty(bpy.types.PropertyGroup):
     def compute_volume(self,context,mode):
         psd, psd_region_name = self.get_active_psd(context)
         if psd != None:
-            if mode == 'head':
-                psd.compute_volume(context,mode,self.n_components)
-            else:
-                psd.compute_volume(context,mode,self.n_components)
+            if not psd.compute_volume(context,mode,self.n_components):
+                return(psd.name)
             self.active_psd_region_index = psd.get_region_index(context)
+        return(None)
+
+
+    def compare_volume_engines(self, context, report_file):
+        """ Compute the volume of every head and whole spine with both volume
+            engines, report the differences and return the largest relative
+            difference """
+        if self.n_components == 0:
+          self.set_n_components(context)
+        obj = context.active_object
+        reg_list = obj.mcell.regions.region_list
+        max_rel_diff = 0.0
+        for psd in self.psd_list:
+            for mode, reg_name in (('head', psd.head_name), ('spine', psd.spine_name)):
+                if (reg_name == '') or (reg_list.get(reg_name) == None):
+                    continue
+                t_start = time.time()
+                vol_numpy = psd.compute_hull_volume(context, reg_name, self.n_components)
+                t_numpy = time.time() - t_start
+
+                bpy.ops.object.mode_set(mode='EDIT')
+                bpy.ops.mesh.reveal()
+                bpy.ops.mesh.select_mode(type='FACE')
+                bpy.ops.mesh.select_all(action='DESELECT')
+                reg_list[reg_name].select_region_faces(context)
+                t_start = time.time()
+                vol_ops = psd.compute_volume_operators(context, mode, self.n_components)
+                t_ops = time.time() - t_start
+                obj.select_set(True)
+                bpy.context.view_layer.objects.active = obj
+
+                if (vol_numpy == None) or (vol_ops == None):
+                    report_file.write('%s  numpy: %s  operators: %s  ***** failed\n' % (reg_name, vol_numpy, vol_ops))
+                    continue
+                rel_diff = abs(vol_numpy - vol_ops)/max(abs(vol_ops), 1e-30)
+                max_rel_diff = max(max_rel_diff, rel_diff)
+                report_file.write('%s  numpy: %g  operators: %g  relative difference: %g  time: %.3f s / %.3f s\n' % (reg_name, vol_numpy, vol_ops, rel_diff, t_numpy, t_ops))
+
+        bpy.ops.object.mode_set(mode='OBJECT')
+        report_file.write('Largest relative difference: %g\n' % (max_rel_diff))
+        return(max_rel_diff)
 
 
     def calculate_diameter(self, context):
@@ -2079,6 +2063,9 @@ class SpineHeadAnalyzerObjectProperty(bpy.types.PropertyGroup):
 #                    row.prop(psd,"exclude",text="Exclude this contact")
                     mesh = active_obj.data
                     row = layout.row()
+                    row.prop(scn.volume_analyzer,"volume_engine")
+                    row.operator("spine_head_analyzer.compare_volume_engines", text="Compare Engines")
+                    row = layout.row()
                     row.enabled = (mesh.total_face_sel > 0)
                     row = layout.row()
                     row.operator("spine_head_analyzer.compute_volume", text="Compute Head Volume")
@@ -2099,6 +2086,8 @@ class SpineHeadAnalyzerObjectProperty(bpy.types.PropertyGroup):
                             row.label(text="      Max Head Diameter: %.5f um" % (psd.diameter_head_max))
                             row = layout.row()
                             row.label(text="      Min Head Diameter: %.5f um" % (psd.diameter_head_min))
+                            row = layout.row()
+                            row.label(text="      Median Head Diameter: %.5f um" % (psd.diameter_head_median))
                     if (psd.volume_neck != 0.0):                    
                         row = layout.row()
                         row.label(text="Neck Volume: %.4g um^3" % (psd.volume_neck))
@@ -2109,6 +2098,8 @@ class SpineHeadAnalyzerObjectProperty(bpy.types.PropertyGroup):
                             row.label(text="      Max Neck Diameter: %.5f um" % (psd.diameter_neck_max))
                             row = layout.row()
                             row.label(text="      Min Neck Diameter: %.5f um" % (psd.diameter_neck_min))
+                            row = layout.row()
+                            row.label(text="      Median Neck Diameter: %.5f um" % (psd.diameter_neck_median))
                     if (psd.volume_spine != 0.0):                    
                         row = layout.row()
                         row.label(text="Whole Protrusion Volume: %.4g um^3" % (psd.volume_spine))
@@ -2126,6 +2117,14 @@ class SpineHeadAnalyzerObjectProperty(bpy.types.PropertyGroup):
                         row = layout.row()
                         row.label(text ="Varicosity Surface Area: %.4g um^3" % (psd.area_head))
             row = layout.row()
+            row.operator("spine_head_analyzer.analyze_object", text="Analyze All Contacts")
+            row = layout.row()
+            row.prop(scn.volume_analyzer, "output_format")
+            if scn.volume_analyzer.output_format != 'TEXT':
+                row.prop(scn.volume_analyzer, "output_append")
+                row = layout.row()
+                row.prop(scn.volume_analyzer, "output_file")
+            row = layout.row()
             row.operator("spine_head_analyzer.output", text="Output")
 
 
@@ -2144,6 +2143,8 @@ classes = (
             NEUROPIL_OT_calculate_diameter,
             NEUROPIL_OT_calculate_diameter_head,
             NEUROPIL_OT_recompute_volumes,
+            NEUROPIL_OT_analyze_object,
+            NEUROPIL_OT_compare_volume_engines,
             NEUROPIL_OT_output,
             NEUROPIL_UL_check_psd,
             NEUROPIL_UL_contact_patterns,
@@ -2153,11 +2154,35 @@ classes = (
             SpineHeadAnalyzerObjectProperty,
           )
 
+@bpy.app.handlers.persistent
+def region_faces_depsgraph_handler(scene, depsgraph):
+    mesh_arrays.region_faces_update(depsgraph)
+
+
+@bpy.app.handlers.persistent
+def region_faces_reset_handler(*args):
+    # Loading a file or undoing replaces the meshes the cache refers to
+    mesh_arrays.clear_region_faces()
+
+
+region_faces_handlers = (
+    (bpy.app.handlers.depsgraph_update_post, region_faces_depsgraph_handler),
+    (bpy.app.handlers.load_post, region_faces_reset_handler),
+    (bpy.app.handlers.undo_post, region_faces_reset_handler),
+    (bpy.app.handlers.redo_post, region_faces_reset_handler),
+  )
+
 def register():
     for cls in classes:
       bpy.utils.register_class(cls)
+    for handlers, handler in region_faces_handlers:
+      if handler not in handlers:
+        handlers.append(handler)
 
 def unregister():
+    for handlers, handler in region_faces_handlers:
+      if handler in handlers:
+        handlers.remove(handler)
     for cls in reversed(classes):
       bpy.utils.unregister_class(cls)
 
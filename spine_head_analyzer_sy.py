@@ -38,6 +38,8 @@ import re
 import numpy as np
 import neuropil_tools
 import cellblender
+from neuropil_tools import mesh_arrays
+from neuropil_tools import core
 
 # register and unregister are required for Blender Addons
 # We use per module class registration/unregistration
@@ -239,6 +241,7 @@ class SpineHeadAnalyzerPSDProperty(bpy.types.PropertyGroup):
     area_psd_az = FloatProperty(name="Area of PSD or AZ",default=0.0)
     diameter_neck_max = FloatProperty(name="Diameter of Neck",default=0.0)
     diameter_neck_min = FloatProperty(name="Diameter of Neck",default=0.0)
+    diameter_neck_median = FloatProperty(name="Median Diameter of Neck",default=0.0)
     diameter_neck_lbt = FloatProperty(name="Diameter of Neck based on area_neck_cross_section_lbt",default=0.0)
     length_neck = FloatProperty(name="Length of Neck based on volume_neck/area_neck_cross_section",default=0.0)
     length_neck_lbt = FloatProperty(name="Length of Neck based on distance from base to top",default=0.0)
@@ -277,6 +280,7 @@ class SpineHeadAnalyzerPSDProperty(bpy.types.PropertyGroup):
         self.area_psd_az = self.compute_region_area(context,self.name)
         self.diameter_neck_max = 0.0
         self.diameter_neck_min = 0.0
+        self.diameter_neck_median = 0.0
         self.diameter_neck_lbt = 0.0
         self.length_neck = 0.0
         self.length_neck_lbt = 0.0
@@ -306,69 +310,59 @@ class SpineHeadAnalyzerPSDProperty(bpy.types.PropertyGroup):
         return(reg_index)
 
 
-    def compute_region_area(self,context,region_name):
+    def compute_region_area(self,context,region_name,area_engine=None):
         obj = context.active_object
-        mesh = obj.data
         reg = obj.mcell.regions.region_list[region_name]
-        reg_faces = list(reg.get_region_faces(mesh))
-        t_mat = obj.matrix_world
-        area = 0.0
-        for face_index in reg_faces:
-            face = mesh.polygons[face_index]
-            tv0 = mesh.vertices[face.vertices[0]].co * t_mat
-            tv1 = mesh.vertices[face.vertices[1]].co * t_mat
-            tv2 = mesh.vertices[face.vertices[2]].co * t_mat
-            area += mathutils.geometry.area_tri(tv0, tv1, tv2)
-
-#        print("    Area of %s with %d faces is %g" % (region_name,len(reg_faces),area))
+        # Face areas of the whole mesh are computed once per engine,
+        #   so reuse the engine when computing several regions
+        if area_engine == None:
+            area_engine = mesh_arrays.RegionAreaEngine(obj)
+        area = area_engine.region_area(reg)
+
+#        print("    Area of %s is %g" % (region_name,area))
         return(area)
 
 
     def compute_areas(self,context):
-        self.area_psd_az = self.compute_region_area(context,self.name)
-
         obj = context.active_object
         reg_list = obj.mcell.regions.region_list
+        area_engine = mesh_arrays.RegionAreaEngine(obj)
+
+        self.area_psd_az = self.compute_region_area(context,self.name,area_engine)
 
         region_name = self.name.replace('sy','sph')
         if reg_list.get(region_name) != None:
-            self.area_head = self.compute_region_area(context,region_name)
+            self.area_head = self.compute_region_area(context,region_name,area_engine)
 
         region_name = self.name.replace('sy','sp')
         if reg_list.get(region_name) != None:
-            self.area_spine = self.compute_region_area(context,region_name)
+            self.area_spine = self.compute_region_area(context,region_name,area_engine)
 
         region_name = self.name.replace('sy','spn')
         if reg_list.get(region_name) != None:
-            self.area_neck = self.compute_region_area(context,region_name)
+            self.area_neck = self.compute_region_area(context,region_name,area_engine)
 
-        region_name = self.name.replace('cs','axb')
-        if reg_list.get(region_name) != None:
-            self.area_head = self.compute_region_area(context,region_name)
+        # Axonal bouton of a contact, only contacts have 'cs' in their name
+        if 'cs' in self.name:
+            region_name = self.name.replace('cs','axb')
+            if reg_list.get(region_name) != None:
+                self.area_head = self.compute_region_area(context,region_name,area_engine)
 
 
-    def compute_psd_az_location(self,context):
+    def compute_psd_az_location(self,context,moment_engine=None):
+        """ Set psd_az_location to the centroid of the vertices of the PSD
+            region and return (centroid, area_centroid, axes), or None if
+            the region has no faces """
         obj = context.active_object
-        mesh = obj.data
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_mode(type='VERT')
-        self.select_psd(context)
-        bpy.ops.object.mode_set(mode='OBJECT')
-
-        psd_az_verts = [v.co for v in mesh.vertices if v.select == True]
-        av = [0,0,0]
-        for v in psd_az_verts:
-            av[0] += v[0]
-            av[1] += v[1]
-            av[2] += v[2]
-        av[0] = av[0]/len(psd_az_verts)
-        av[1] = av[1]/len(psd_az_verts)
-        av[2] = av[2]/len(psd_az_verts)
-        self.psd_az_location = av.copy()
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_all(action='DESELECT')
-        bpy.ops.mesh.select_mode(type='FACE')
-        bpy.ops.object.mode_set(mode='OBJECT')
+        reg = obj.mcell.regions.region_list[self.name]
+        # Mesh arrays are read once per engine,
+        #   so reuse the engine when computing several PSDs
+        if moment_engine == None:
+            moment_engine = mesh_arrays.RegionMomentEngine(obj)
+        moments = moment_engine.region_moments(reg)
+        if moments != None:
+            self.psd_az_location = moments[0]
+        return(moments)
 
 
     def select_spn(self, context):
@@ -382,61 +376,15 @@ class SpineHeadAnalyzerPSDProperty(bpy.types.PropertyGroup):
       
 
     def calculate_diameter(self, context):
-        self.select_spn(context)
-        mesh = context.active_object.data
-        old_to_new_index = dict()
-        selected_vertices = list()
-        selected_faces = list()
-        required_vertices = set()
-
-        for face in mesh.polygons:
-            if face.select:
-                required_vertices.add(face.vertices[0])
-                required_vertices.add(face.vertices[1])
-                required_vertices.add(face.vertices[2])
-        for i, vertex in enumerate(mesh.vertices):
-            if i in required_vertices:
-                old_to_new_index[i] = len(selected_vertices)
-                selected_vertices.append(vertex)
-        for face in mesh.polygons:
-            if face.select:
-                newa = old_to_new_index[face.vertices[0]] + 1
-                newb = old_to_new_index[face.vertices[1]] + 1
-                newc = old_to_new_index[face.vertices[2]] + 1
-                selected_faces.append((newa, newb, newc))
-
-        cwd = bpy.path.abspath(os.path.dirname(__file__))
-        tmp_obj = cwd + "/tmp.obj"
-        exe = bpy.path.abspath(cwd + "/calc_diameter")
-
-        with open(tmp_obj, "w+") as of:
-            for vertex in selected_vertices:
-                of.write("v %f %f %f\n" % (vertex.co.x, vertex.co.y, vertex.co.z))
-            for p1, p2, p3 in selected_faces:
-                of.write("f %d %d %d\n" % (p1, p2, p3))
-
-        subprocess.call([exe, tmp_obj, cwd + "/"])
-
-        # [1:] means ignore the first row "# Segments: N"
-        diam_fn = cwd + "/tmp_diameters.txt"
-
-        #metrics = [line.split() for line in open(diam_fn)][1:]
-        sort = []
-        for line in open(diam_fn):
-            metrics = line.strip()
-            sort.append(metrics)
-
-        sort = sort[1:]
-        len_sort = len(sort)
-        #val = (len_sort/2)-1
-    
-        sort.sort(reverse=True)
-        max_diameter = sort[0]
-        min_diameter = sort[-1]
-        #middle_seg = sort[int(val)]
-        #print(middle_seg)
-        self.diameter_neck_max = float(max_diameter)
-        self.diameter_neck_min = float(min_diameter)
+        obj = context.active_object
+        # Read the mesh in Object Mode so it reflects any pending edits
+        if obj.mode == 'EDIT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        reg = obj.mcell.regions.region_list[self.neck_name]
+        max_diameter, min_diameter, median_diameter = mesh_arrays.get_region_diameters(reg, obj.data)
+        self.diameter_neck_max = max_diameter
+        self.diameter_neck_min = min_diameter
+        self.diameter_neck_median = median_diameter
 
 
     def compute_neck_stats(self, context):
@@ -474,105 +422,21 @@ class SpineHeadAnalyzerPSDProperty(bpy.types.PropertyGroup):
 
     def compute_neck_boundary_area(self, context, reg_name):
 
-      orig_obj = context.active_object
-      reg = orig_obj.mcell.regions.region_list[reg_name]
-      # Enter edit mode and unhide and deselect mesh
-      bpy.ops.object.mode_set(mode='EDIT')
-      bpy.ops.mesh.reveal()
-      bpy.ops.mesh.select_all(action='DESELECT')
-      # Select the region
-      reg.select_region_faces(context)
-      
-      #duplicate region as new object
-      bpy.ops.mesh.duplicate()
-      #separate object from original
-      bpy.ops.mesh.separate(type = 'SELECTED')
-      # Unhide and deselect mesh and exit edit mode
-      bpy.ops.mesh.reveal()
-      bpy.ops.mesh.select_mode(type='EDGE')
-      bpy.ops.mesh.select_all(action='DESELECT')
-      bpy.ops.object.mode_set(mode='OBJECT')
-      
-      #deselect original object
-      orig_obj.select = False
-      #define and name duplicated object
-      dup_obj = bpy.context.selected_objects[0]
-      dup_obj.name = reg_name + '_tmp_boundary'
-      dup_obj.data.name = dup_obj.name
-      #make dup_obj active
-      scn = bpy.context.scene
-      scn.objects.active = dup_obj
-      
-      #extract non-manifold boundary of dup_obj
-      bpy.ops.object.mode_set(mode='EDIT')
-      bpy.ops.mesh.select_mode(type='EDGE')
-      bpy.ops.mesh.select_all(action='DESELECT')
-      bpy.ops.mesh.select_non_manifold()
-      bpy.ops.mesh.select_all(action='INVERT')
-      bpy.ops.mesh.delete(type='EDGE')
-      bpy.ops.mesh.select_mode(type='VERT')
-      bpy.ops.mesh.select_all(action='SELECT')
-      bpy.ops.object.mode_set(mode='OBJECT')
-      
-      # Now project the boundary onto its principle plane
-      
-      # Get the mesh vertices
-      mesh = dup_obj.data
-      verts = mesh.vertices
-      bnd_verts = np.array([v.co for v in verts])
-      
-      # Do PCA on the vertices
-      covm = np.cov(bnd_verts,rowvar=0)
-      eigval, eigvec = np.linalg.eig(covm)
-      
-      # Take the top to two principle component vectors
-      r = np.sqrt(eigval)
-      r = sorted(list(enumerate(r)),key=lambda l: l[1], reverse=True)
-      pcv = []
-      for i in range(len(r)-1):
-        pcv.append(r[i][1]*eigvec[:,r[i][0]])
-        
-      # Define the normal vector of the principle plane as
-      #   the cross product of the two principle vectors
-      nvec = np.cross(pcv[0],pcv[1])
-      nvec = nvec/np.linalg.norm(nvec)
-
-      # Project the boundary vertices onto the principle plane
-      bnd_centroid = bnd_verts.mean(axis=0)
-      for i in range(len(bnd_verts)):
-          p = bnd_verts[i]
-          v = p - bnd_centroid
-          p_proj = p - np.dot(v,nvec)*nvec
-          verts[i].co.x = p_proj[0]
-          verts[i].co.y = p_proj[1]
-          verts[i].co.z = p_proj[2]
-    #      verts.add(1)
-    #      verts[-1].co = p_proj
-
-      # Make planar polygon out of the projected boundary
-      bpy.ops.object.mode_set(mode='EDIT')
-      bpy.ops.mesh.edge_face_add()
-      bpy.ops.object.mode_set(mode='OBJECT')
-      
-      # Extract the boundary vertices in polygonal order
-      pverts = []
-      poly = mesh.polygons[0]
-      for vi in poly.vertices:
-          pverts.append(verts[vi].co)
-          
-      # measure the area of the boundary cross section polygon
-      area = abs(self.area_3D_polygon(pverts, nvec))
-      
-      # We're done so now delete boundary object and mesh  
-      dup_obj.select = False
-      scn.objects.unlink(dup_obj)
-      bpy.data.objects.remove(dup_obj)
-      bpy.data.meshes.remove(mesh)
-      
-      #reselect original object
-      scn.objects.active = orig_obj
-      orig_obj.select = True
-      
+      # Return the center of the boundary of the region and the area of
+      #   the cross section it encloses, projected onto its principal plane
+      obj = context.active_object
+      reg = obj.mcell.regions.region_list[reg_name]
+      verts, tris = mesh_arrays.get_region_triangles(reg, obj.data)
+      try:
+        section = core.boundary_cross_section(verts, tris)
+      except ValueError as e:
+        print('Region %s: %s' % (reg_name, e))
+        return([0.0, 0.0, 0.0], 0.0)
+      if section == None:
+        print('Region %s has no boundary' % (reg_name))
+        return([0.0, 0.0, 0.0], 0.0)
+      bnd_centroid, nvec, area = section
+
       return(list(bnd_centroid), area)
       
 
@@ -581,171 +445,34 @@ class SpineHeadAnalyzerPSDProperty(bpy.types.PropertyGroup):
       # an object, compute the normal vector of the best principle plane
       # passing through the boundary of the region
 
-      orig_obj = context.active_object
-
-      bpy.ops.object.mode_set(mode='EDIT')
-      bpy.ops.mesh.reveal()
-      bpy.ops.mesh.select_all(action='DESELECT')
-
+      obj = context.active_object
+      mesh = obj.data
       if reg_name:
-        reg = orig_obj.mcell.regions.region_list[reg_name]
-        # Enter edit mode and unhide and deselect mesh
-        # Select the region
-        reg.select_region_faces(context)
-        tmp_obj_name = reg_name + '_tmp_boundary'
+        reg = obj.mcell.regions.region_list[reg_name]
+        verts, tris = mesh_arrays.get_region_triangles(reg, mesh)
       else:
-        bpy.ops.mesh.select_all(action='SELECT')
-        tmp_obj_name = orig_obj.name + '_tmp_boundary'
-      
-      #duplicate region as new object
-      bpy.ops.mesh.duplicate()
-      #separate object from original
-      bpy.ops.mesh.separate(type = 'SELECTED')
-      # Unhide and deselect mesh and exit edit mode
-      bpy.ops.mesh.reveal()
-      bpy.ops.mesh.select_mode(type='EDGE')
-      bpy.ops.mesh.select_all(action='DESELECT')
-      bpy.ops.object.mode_set(mode='OBJECT')
-      
-      #deselect original object
-      orig_obj.select = False
-      #define and name duplicated object
-      dup_obj = bpy.context.selected_objects[0]
-      dup_obj.name = tmp_obj_name
-      dup_obj.data.name = dup_obj.name
-      #make dup_obj active
-      scn = bpy.context.scene
-      scn.objects.active = dup_obj
-
-      # Compute centroid of object
-      mesh = dup_obj.data
-      verts = mesh.vertices
-      v_array = np.array([v.co for v in verts])
-      v_centroid = v_array.mean(axis=0)
-      
-      #extract non-manifold boundary of dup_obj
-      bpy.ops.object.mode_set(mode='EDIT')
-      bpy.ops.mesh.select_mode(type='EDGE')
-      bpy.ops.mesh.select_all(action='DESELECT')
-      bpy.ops.mesh.select_non_manifold()
-      bpy.ops.mesh.select_all(action='INVERT')
-      bpy.ops.mesh.delete(type='EDGE')
-      bpy.ops.mesh.select_mode(type='VERT')
-      bpy.ops.mesh.select_all(action='SELECT')
-      bpy.ops.object.mode_set(mode='OBJECT')
-
-      # Now find the principle plane of the boundary
-      
-      # Get the boundary vertices and compute centroid
-      mesh = dup_obj.data
-      verts = mesh.vertices
-      bnd_verts = np.array([v.co for v in verts])
-      bnd_centroid = bnd_verts.mean(axis=0)
-      
-      # Do PCA on the vertices
-      covm = np.cov(bnd_verts,rowvar=0)
-      eigval, eigvec = np.linalg.eig(covm)
-      
-      # Take the top to two principle component vectors
-      r = np.sqrt(eigval)
-      r = sorted(list(enumerate(r)),key=lambda l: l[1], reverse=True)
-      pcv = []
-      for i in range(len(r)-1):
-        pcv.append(r[i][1]*eigvec[:,r[i][0]])
-
-      # Define the normal vector of the principle plane as
-      # the cross product of the two principle vectors
-      # Orient the vector to point toward the centroid of the object
-      nvec = np.cross(pcv[0],pcv[1])
-      nvec = nvec/np.linalg.norm(nvec)
+        verts = mesh_arrays.get_vertices(mesh)
+        tris, tri_face = mesh_arrays.get_triangles(mesh)
+
+      # Compute centroid of the region
+      v_centroid = verts[np.unique(tris)].mean(axis=0)
+
+      # Find the principle plane of the boundary
+      bnd_verts = verts[np.unique(core.boundary_edges(tris))]
+      bnd_centroid, nvec = core.plane_fit(bnd_verts)
+
+      # Orient the normal vector to point toward the centroid of the object
       objvec = v_centroid - bnd_centroid
       objvec = objvec/np.linalg.norm(objvec)
       nvec = np.sign(nvec.dot(objvec))*nvec
 
-      # Convert nvec and bnd_centroid to list
-      nvec = list(nvec)
-      bnd_centroid = list(bnd_centroid)
-
-      # We're done so now delete boundary object and mesh  
-      dup_obj.select = False
-      scn.objects.unlink(dup_obj)
-      bpy.data.objects.remove(dup_obj)
-      bpy.data.meshes.remove(mesh)
-      
-      #reselect original object
-      scn.objects.active = orig_obj
-      orig_obj.select = True
-      
-      return(bnd_centroid, nvec)
+      return(list(bnd_centroid), list(nvec))
 
       
     def area_3D_polygon(self, verts, nvec):
-        
-        '''
-        # make test triangle to validate area computation: area = 0.0074489
-        print('verts: ', verts)
-        verts = []
-        verts.append([5.543,5.581,5.878])
-        verts.append([5.559,5.576,5.753])
-        verts.append([5.450,5.648,5.843])
-        v1 = np.array(verts[1]) - np.array(verts[0])
-        v2 = np.array(verts[2]) - np.array(verts[0])
-        nvec = np.cross(v1,v2)
-        nvec = nvec/np.linalg.norm(nvec)
-        '''
-        
-        n = len(verts)
-        verts = verts.copy()
-        verts.append(verts[0])
-        
-        # select largest abs coordinate to ignore for projection
-        ax = abs(nvec[0])   # abs x-coord
-        ay = abs(nvec[1])   # abs y-coord
-        az = abs(nvec[2])   # abs z-coord
-            
-        coord = 3          # ignore z-coord
-        if (ax > ay):
-            if (ax > az):
-                coord = 1   # ignore x-coord
-        elif (ay > az):
-             coord = 2      # ignore y-coord
-
-        # compute area of the 2D projection
-        area = 0.0
-        j=2
-        k=0
-        if coord == 1:
-            for i in range(1,n):
-                area += (verts[i][1] * (verts[j][2] - verts[k][2]))
-                j+=1
-                k+=1
-        elif coord == 2:
-            for i in range(1,n):
-                area += (verts[i][2] * (verts[j][0] - verts[k][0]))
-                j+=1
-                k+=1
-        elif coord == 3:
-            for i in range(1,n):
-                area += (verts[i][0] * (verts[j][1] - verts[k][1]))
-                j+=1
-                k+=1
-                
-        if coord == 1:   # wrap-around term
-            area += (verts[n][1] * (verts[1][2] - verts[n-1][2]))
-        elif coord == 2:
-            area += (verts[n][2] * (verts[1][0] - verts[n-1][0]))
-        elif coord == 3:
-            area += (verts[n][0] * (verts[1][1] - verts[n-1][1]))
-
-        # scale to get area before projection
-        if coord == 1:
-            area /= 2*nvec[0]
-        elif coord == 2:
-            area /= 2*nvec[1]
-        elif coord == 3:
-            area /= 2*nvec[2]
-            
-        return area
+        # Signed area of the polygon verts projected onto the plane with
+        #   unit normal nvec
+        return core.polygon_area(np.asarray(verts, dtype=np.float64), np.asarray(nvec))
 
 
 
@@ -1251,45 +978,27 @@ class SpineHeadAnalyzerObjectProperty(bpy.types.PropertyGroup):
 
 
     def set_n_components(self,context):
+        # Make sure mesh data is in sync with any edits before labeling
         bpy.ops.object.mode_set(mode='OBJECT')
         obj = context.active_object
-        mesh = obj.data
-
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.reveal()
-        bpy.ops.mesh.select_mode(type='VERT')
-        bpy.ops.mesh.select_all(action='DESELECT')
-
-        # Count total vertices and number of vertices contiguous with vertex 0
-        bpy.ops.object.mode_set(mode='OBJECT')
-        mesh.vertices[0].select = True
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_linked()
-        n_v_tot = len(mesh.vertices)
-        n_v_sel = mesh.total_vert_sel
-        bpy.ops.object.mode_set(mode='OBJECT')
-
-        # Loop over disjoint components
-        n_components = 1
-        while (n_v_sel < n_v_tot):
-            n_components += 1
-            # make list of selected indices
-            vl1 = [v.index for v in mesh.vertices if v.select == True]
-            # make list of indices of remaining component(s)
-            vl2 = [v.index for v in mesh.vertices if v.select == False]
-            # Grow selection with vertices contiguous with first vertex of remainder
-            mesh.vertices[vl2[0]].select = True
-            bpy.ops.object.mode_set(mode='EDIT')
-            bpy.ops.mesh.select_linked()
+        n_components, labels = mesh_arrays.get_components(obj)
+        self.n_components = n_components
 
-            # Count number of vertices now selected and loop again if necessary
-            n_v_sel = mesh.total_vert_sel
-            bpy.ops.object.mode_set(mode='OBJECT')
 
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_mode(type='FACE')
-        bpy.ops.object.mode_set(mode='OBJECT')
-        self.n_components = n_components
+    def compute_psd_az_locations(self,context,names=None):
+        """ Set the location of every PSD in psd_list, or of the PSDs in
+            names, from one read of the mesh and return {PSD name: centroid} """
+        obj = context.active_object
+        reg_list = obj.mcell.regions.region_list
+        if names == None:
+            names = [psd.name for psd in self.psd_list]
+        regs = [reg_list[name] for name in names if reg_list.get(name) != None]
+        if len(regs) == 0:
+            return({})
+        centroids = mesh_arrays.RegionMomentEngine(obj).region_centroids(regs)
+        for name, centroid in centroids.items():
+            self.psd_list[name].psd_az_location = centroid
+        return(centroids)
 
 
     def recompute_volumes(self,context,report_file):
@@ -1302,6 +1011,11 @@ class SpineHeadAnalyzerObjectProperty(bpy.types.PropertyGroup):
         sy_list = [reg.name for reg in reg_list if reg.name.rfind('sy') > -1]
         psd = None
         psd_region_name = None
+        # Locate every PSD still without a location from one read of the mesh
+        unlocated = [psd.name for psd in self.psd_list
+                     if (psd.name in sy_list) and (not psd.exclude) and
+                     (tuple(psd.psd_az_location) == (0.0,0.0,0.0))]
+        located = self.compute_psd_az_locations(context,unlocated)
         for psd_region_name in sy_list:
             print("Checking %s..." % (psd_region_name))
             report_file.write("Checking %s...\n" % (psd_region_name))
@@ -1315,12 +1029,9 @@ class SpineHeadAnalyzerObjectProperty(bpy.types.PropertyGroup):
                 print("  Skipping excluded PSD: %s" % (psd_region_name))
                 report_file.write("  Skipping excluded PSD: %s\n" % (psd_region_name))
             else:
-                if (psd.psd_az_location[0] == 0.0) and \
-                    (psd.psd_az_location[1] == 0.0) and \
-                    (psd.psd_az_location[2] == 0.0):
-                        psd.compute_psd_az_location(context)
-                        print("  Updated PSD location: <%g, %g, %g>" % (psd.psd_az_location[0],psd.psd_az_location[1],psd.psd_az_location[2]))
-                        report_file.write("  Updated PSD location: <%g, %g, %g>\n" % (psd.psd_az_location[0],psd.psd_az_location[1],psd.psd_az_location[2]))
+                if psd_region_name in located:
+                    print("  Updated PSD location: <%g, %g, %g>" % (psd.psd_az_location[0],psd.psd_az_location[1],psd.psd_az_location[2]))
+                    report_file.write("  Updated PSD location: <%g, %g, %g>\n" % (psd.psd_az_location[0],psd.psd_az_location[1],psd.psd_az_location[2]))
                 if (psd.area_psd_az == 0.0):
                     psd.area_psd_az = psd.compute_region_area(context,psd_region_name)
                     print("  Updated PSD area: %g" % (psd.area_psd_az))
@@ -1368,7 +1079,7 @@ class SpineHeadAnalyzerObjectProperty(bpy.types.PropertyGroup):
                 if (psd.volume_neck > 0.0):
                     psd.compute_neck_stats(context)
                     neck_region_name = psd_region_name.replace('sy','spn')
-                    report_file.write('  Updated diameter and length of neck %s  max diameter: %g  min diameter: %g  length: %g\n' % (neck_region_name, psd.diameter_neck_max, psd.diameter_neck_min, psd.length_neck))
+                    report_file.write('  Updated diameter and length of neck %s  max diameter: %g  min diameter: %g  median diameter: %g  length: %g\n' % (neck_region_name, psd.diameter_neck_max, psd.diameter_neck_min, psd.diameter_neck_median, psd.length_neck))
                   
             bpy.ops.object.mode_set(mode='OBJECT')
 
@@ -1453,6 +1164,8 @@ class SpineHeadAnalyzerObjectProperty(bpy.types.PropertyGroup):
                         row.label(text="Max Diameter: %.5f um" % (psd.diameter_neck_max))
                         row = layout.row()
                         row.label(text="Max Diameter: %.5f um" % (psd.diameter_neck_min))
+                        row = layout.row()
+                        row.label(text="Median Diameter: %.5f um" % (psd.diameter_neck_median))
                 #else:
                 #    row = layout.row()
                 #    row.prop(psd,"exclude",text="Exclude this bouton")
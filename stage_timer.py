@@ -0,0 +1,137 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+
+# <pep8 compliant>
+
+"""
+This file contains timing instrumentation for the processing pipeline.
+
+Each stage (interpolation, tiling, mesh loading, fixing, tagging,
+smoothing) is wrapped in log.stage(), which records wall time, CPU time of
+this process and of its finished child processes, memory and any input
+sizes the caller attaches.  The operating system only keeps the peak
+resident memory of the whole session, so each record holds that session
+high-water mark and how far the stage raised it.  Records are kept for the
+summary in the UI and appended as JSON lines to the run log file.
+
+"""
+
+# python imports
+
+import contextlib
+import functools
+import json
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where peak memory is not recorded
+    resource = None
+
+
+def peak_rss_mb():
+    """ Return the peak resident memory of this process and of its waited
+        for children in MB since the session started, or None where it
+        cannot be measured """
+    if resource == None:
+        return(None)
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    scale = 1.0/(1 << 20) if sys.platform == 'darwin' else 1.0/(1 << 10)
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss*scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss*scale
+    return(round(max(own, children), 1))
+
+
+def child_cpu_time():
+    t = os.times()
+    return(t.children_user + t.children_system)
+
+
+class StageLog:
+    """ Timing records of pipeline stages """
+
+    def __init__(self):
+        self.records = []
+        self.file_name = None
+
+    @contextlib.contextmanager
+    def stage(self, name, **sizes):
+        """ Time the enclosed block as stage name.  The yielded record can
+            be given more sizes (e.g. triangles) before the block ends """
+        record = {'stage': name, 'start': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        record.update(sizes)
+        t_wall = time.perf_counter()
+        t_cpu = time.process_time()
+        t_child = child_cpu_time()
+        start_peak = peak_rss_mb()
+        ok = False
+        try:
+            yield record
+            ok = True
+        finally:
+            record['wall'] = time.perf_counter() - t_wall
+            record['cpu'] = time.process_time() - t_cpu
+            record['child_cpu'] = child_cpu_time() - t_child
+            session_peak = peak_rss_mb()
+            record['session_peak_rss_mb'] = session_peak
+            if session_peak != None:
+                record['peak_rss_increase_mb'] = round(session_peak - start_peak, 1)
+            record['ok'] = ok
+            self.add(record)
+
+    def timed(self, name):
+        """ Decorator timing every call of a function as stage name """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return(func(*args, **kwargs))
+            return(wrapper)
+        return(decorator)
+
+    def add(self, record):
+        self.records.append(record)
+        if self.file_name != None:
+            try:
+                with open(self.file_name, 'a') as log_file:
+                    log_file.write(json.dumps(record) + '\n')
+            except OSError as e:
+                print('Could not write timing record to %s: %s' % (self.file_name, e))
+
+    def summary(self):
+        """ Return [(stage, count, wall, cpu + child cpu, largest rise of
+            the session peak memory in MB)] in order of first appearance.
+            Records added directly with add() need only 'stage' and 'wall' """
+        stages = {}
+        for record in self.records:
+            entry = stages.setdefault(record['stage'], [0, 0.0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += record['wall']
+            entry[2] += record.get('cpu', 0.0) + record.get('child_cpu', 0.0)
+            entry[3] = max(entry[3], record.get('peak_rss_increase_mb') or 0.0)
+        return([(name,) + tuple(entry) for name, entry in stages.items()])
+
+    def clear(self):
+        self.records = []
+
+
+# Shared by all pipeline stages of the add-on
+log = StageLog()
@@ -0,0 +1,239 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""
+This file contains checks of the mesh kernels of the core package on small
+hand-made meshes and the synthetic meshes of benchmark.py.
+
+"""
+
+# python imports
+
+import numpy as np
+import pytest
+
+from addon import benchmark, core
+
+
+def cube_mesh(offset=(0.0, 0.0, 0.0)):
+    """ Return the verts, tris and tri_face of a unit cube made of six
+        quads split into two triangles each """
+    verts = np.array([(x, y, z) for z in (0, 1) for y in (0, 1) for x in (0, 1)], dtype=float)
+    quads = np.array([(0, 2, 3, 1), (4, 5, 7, 6), (0, 1, 5, 4),
+                      (2, 6, 7, 3), (0, 4, 6, 2), (1, 3, 7, 5)])
+    tris = np.concatenate((quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]))
+    tri_face = np.concatenate((np.arange(6), np.arange(6)))
+    return verts + offset, tris, tri_face
+
+
+def mesh_edges(tris):
+    edges = np.concatenate((tris[:, [0, 1]], tris[:, [1, 2]], tris[:, [2, 0]]))
+    edges.sort(axis=1)
+    return np.unique(edges, axis=0)
+
+
+def test_cube_face_areas():
+    verts, tris, tri_face = cube_mesh()
+    assert core.triangle_areas(verts, tris).sum() == pytest.approx(6.0)
+    areas = core.face_areas(verts, tris, tri_face)
+    assert np.allclose(areas, 1.0)
+    assert core.masked_area(areas, np.array([0, 2])) == pytest.approx(2.0)
+    assert core.masked_area(areas, areas > 2.0) == 0.0
+
+
+def test_cube_region_area_and_boundary():
+    verts, tris, tri_face = cube_mesh()
+    assert len(core.boundary_edges(tris)) == 0
+    assert core.boundary_center(verts, tris) is None
+    bottom = core.region_triangles(tris, tri_face, [0])
+    assert len(bottom) == 2
+    assert core.region_area(verts, tris, tri_face, [0, 1]) == pytest.approx(2.0)
+    assert len(core.boundary_edges(bottom)) == 4
+    assert np.allclose(core.boundary_center(verts, bottom), (0.5, 0.5, 0.0))
+
+
+def test_label_components_two_cubes():
+    verts_a, tris_a, tri_face = cube_mesh()
+    verts_b, tris_b, tri_face = cube_mesh((3.0, 0.0, 0.0))
+    verts = np.concatenate((verts_a, verts_b))
+    tris = np.concatenate((tris_a, tris_b + len(verts_a)))
+    # Plus one vertex used by no triangle
+    n_components, labels = core.label_components(len(verts) + 1, mesh_edges(tris))
+    assert n_components == 3
+    assert len(set(labels[:8])) == 1
+    assert len(set(labels[8:16])) == 1
+    assert labels[0] != labels[8]
+    assert sorted(core.component_sizes(labels, n_components).tolist()) == [1, 8, 8]
+
+
+def test_polygon_centroids():
+    verts, tris, tri_face = cube_mesh()
+    quads = np.array([(0, 2, 3, 1), (4, 5, 7, 6)])
+    centroids = core.polygon_centroids(verts, quads.ravel(), [4, 4])
+    assert np.allclose(centroids, [(0.5, 0.5, 0.0), (0.5, 0.5, 1.0)])
+
+
+def test_label_components():
+    verts, tris, regions = benchmark.dendrite_mesh(n_spines=4, edge=0.05, n_components=3)
+    n_components, labels = core.label_components(len(verts), core.unique_edges(tris))
+    assert n_components == 3
+    assert len(labels) == len(verts)
+    sizes = core.component_sizes(labels, n_components)
+    assert sizes.sum() == len(verts)
+    # Every edge joins two vertices of the same component
+    edges = core.unique_edges(tris)
+    assert np.array_equal(labels[edges[:, 0]], labels[edges[:, 1]])
+
+
+def test_label_components_chains():
+    # Two chains given in shuffled order plus an isolated vertex
+    rng = np.random.default_rng(0)
+    edges = np.array([(i, i + 1) for i in range(0, 49)] + [(i, i + 1) for i in range(50, 99)])
+    edges = edges[rng.permutation(len(edges))]
+    n_components, labels = core.label_components(101, edges)
+    assert n_components == 3
+    assert len(set(labels[:50])) == 1
+    assert len(set(labels[50:100])) == 1
+    assert len(set(labels[[0, 50, 100]])) == 3
+
+
+def test_boundary_loops_closed():
+    verts, tris = benchmark.sphere_mesh(np.zeros(3), 1.0, 16)
+    assert core.boundary_loops(tris) == []
+
+
+def test_boundary_loops_polygon_area():
+    # The lower part of a sphere cut along a ring of latitude is bounded by
+    #   that ring, a regular polygon of known area
+    n = 24
+    verts, tris = benchmark.sphere_mesh(np.zeros(3), 1.0, n)
+    cap = tris[verts[tris].max(axis=1)[:, 2] <= verts[0, 2] + 1e-12]
+    loops = core.boundary_loops(cap)
+    assert len(loops) == 1
+    loop = loops[0]
+    assert len(loop) == 2*n
+    r = np.hypot(verts[loop, 0], verts[loop, 1])
+    assert np.allclose(r, r[0])
+    exact = 0.5*2*n*r[0]**2*np.sin(np.pi/n)
+    # Seen from above the outward facing lower part runs clockwise
+    area = core.polygon_area(verts[loop], np.array([0.0, 0.0, 1.0]))
+    assert area == pytest.approx(-exact, rel=1e-12)
+    center, normal, section = core.boundary_cross_section(verts, cap)
+    assert section == pytest.approx(exact, rel=1e-12)
+    assert abs(normal[2]) == pytest.approx(1.0)
+
+
+def test_boundary_loops_two_holes():
+    verts, tris = benchmark.sphere_mesh(np.zeros(3), 1.0, 16)
+    z = verts[tris].mean(axis=1)[:, 2]
+    band = tris[np.abs(z) < 0.5]
+    loops = core.boundary_loops(band)
+    assert sorted(len(loop) for loop in loops) == [32, 32]
+
+
+@pytest.mark.parametrize('n_members', [10, 900])
+def test_face_set_algebra(n_members):
+    n_faces = 1000
+    rng = np.random.default_rng(n_members)
+    a = set(rng.choice(n_faces, n_members, replace=False).tolist())
+    b = set(rng.choice(n_faces, 50, replace=False).tolist())
+    fa = core.FaceSet(n_faces, faces=sorted(a))
+    fb = core.FaceSet(n_faces, faces=sorted(b))
+    assert (fa.indices is None) == (n_members > n_faces*core.FaceSet.DENSE_FRACTION)
+    assert fa.faces().tolist() == sorted(a)
+    assert (fa | fb).faces().tolist() == sorted(a | b)
+    assert (fa & fb).faces().tolist() == sorted(a & b)
+    assert (fa - fb).faces().tolist() == sorted(a - b)
+    assert (fb - fa).faces().tolist() == sorted(b - a)
+    assert len(fa) == len(a)
+    assert np.array_equal(core.FaceSet(n_faces, mask=fa.mask()).faces(), fa.faces())
+    assert core.union_face_sets([fa, fb], n_faces).faces().tolist() == sorted(a | b)
+
+
+def test_face_set_size_mismatch():
+    with pytest.raises(ValueError):
+        core.FaceSet(10, faces=[1]) | core.FaceSet(11, faces=[1])
+
+
+def test_region_centroids():
+    verts, tris, regions = benchmark.dendrite_mesh(n_spines=4, edge=0.05)
+    tri_face = np.arange(len(tris))
+    face_sets = regions['head'] + [np.zeros(0, dtype=np.int64)]
+    centroids = core.region_centroids(verts, tris, tri_face, face_sets, len(tris))
+    for faces, centroid in zip(regions['head'], centroids):
+        assert np.allclose(centroid, verts[np.unique(tris[faces])].mean(axis=0))
+    assert np.isnan(centroids[-1]).all()
+
+
+def test_boundary_loops_non_manifold():
+    # Two fans sharing their center vertex 0, whose boundaries touch there
+    tris = np.array([[0, 1, 2], [0, 3, 4]])
+    with pytest.raises(ValueError):
+        core.boundary_loops(tris)
+    # A flipped triangle leaves the boundary without a consistent direction
+    tris = np.array([[0, 1, 2], [0, 3, 2]])
+    with pytest.raises(ValueError):
+        core.boundary_loops(tris)
+
+
+def test_cross_section_measured_loop():
+    # A tube with a wide end and a narrow end: the section is measured on
+    #   the plane of the longer loop only
+    n = 16
+    theta = np.linspace(0.0, 2*np.pi, 2*n, endpoint=False)
+    wide = np.stack((np.cos(theta), np.sin(theta), np.zeros(2*n)), axis=1)
+    theta = theta[::2]
+    narrow = np.stack((0.3*np.cos(theta) + 1.0, 0.3*np.sin(theta), np.full(n, 2.0)), axis=1)
+    verts = np.concatenate((wide, narrow))
+    k = np.arange(n)
+    w0 = 2*k
+    w1 = 2*k + 1
+    w2 = (2*k + 2) % (2*n)
+    n0 = 2*n + k
+    n1 = 2*n + (k + 1) % n
+    tris = np.concatenate((np.stack((w0, w1, n0), axis=1), np.stack((w1, w2, n1), axis=1),
+                           np.stack((w1, n1, n0), axis=1)))
+    center, normal, area = core.boundary_cross_section(verts, tris)
+    assert np.allclose(center, 0.0, atol=1e-12)
+    assert abs(normal[2]) == pytest.approx(1.0)
+    assert area == pytest.approx(n*np.sin(np.pi/n), rel=1e-12)
+
+
+def tube_mesh(radius, length, n_around=32, n_along=40):
+    """ Return the verts and tris of an open cylinder along z """
+    t = 2*np.pi*np.arange(n_around)/n_around
+    z = np.linspace(0.0, length, n_along)
+    verts = np.array([(radius*np.cos(a), radius*np.sin(a), h) for h in z for a in t])
+    tris = []
+    for j in range(n_along - 1):
+        for i in range(n_around):
+            a, b = j*n_around + i, j*n_around + (i + 1) % n_around
+            tris += [(a, b, b + n_around), (a, b + n_around, a + n_around)]
+    return verts, np.array(tris)
+
+
+def test_tube_slice_diameters():
+    verts, tris = tube_mesh(0.1, 2.0)
+    diameters = core.slice_diameters(verts, tris)
+    assert len(diameters) > 0
+    max_d, min_d, median_d = core.diameter_stats(diameters)
+    assert min_d <= median_d <= max_d
+    assert max_d == pytest.approx(0.2, rel=1e-2)
+    assert min_d == pytest.approx(0.2, rel=1e-2)
+    assert core.diameter_stats(np.zeros(0)) == (0.0, 0.0, 0.0)
@@ -0,0 +1,67 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""
+This file contains checks of the rawc reader.
+
+"""
+
+# python imports
+
+import numpy as np
+import pytest
+
+from addon import addon_module
+
+mesh_io = addon_module('mesh_io')
+
+
+def write_rawc(path, lines):
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+
+def test_read_rawc(tmp_path):
+    file_name = write_rawc(tmp_path / 'a_tiles.rawc', [
+        '4 2',
+        '0 0 0 1 0 0',
+        '1 0 0 1 0 0',
+        '0 1 0 0.5 0.5 0.5',
+        '0 0 1 0 0 1',
+        '0 1 2',
+        '0 3 1'])
+    verts, tris = mesh_io.read_rawc(file_name)
+    assert verts.shape == (4, 3)
+    assert np.array_equal(verts[3], (0.0, 0.0, 1.0))
+    assert tris.dtype == np.int32
+    assert tris.tolist() == [[0, 1, 2], [0, 3, 1]]
+
+
+def test_read_rawc_no_triangles(tmp_path):
+    file_name = write_rawc(tmp_path / 'b_tiles.rawc', ['2 0', '0 0 0', '1 1 1'])
+    verts, tris = mesh_io.read_rawc(file_name)
+    assert verts.tolist() == [[0.0, 0.0, 0.0], [1.0, 1.0, 1.0]]
+    assert tris.shape == (0, 3)
+
+
+def test_read_rawc_bad(tmp_path):
+    with pytest.raises(ValueError):
+        mesh_io.read_rawc(write_rawc(tmp_path / 'c.rawc', ['3 1', '0 0 0', '1 1 1', '2 2 2']))
+    with pytest.raises(ValueError):
+        mesh_io.read_rawc(write_rawc(tmp_path / 'd.rawc', ['2 1', '0 0 0', '1 1', '0 1 1']))
@@ -0,0 +1,104 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""
+This file contains round trip checks of the contact table exporter.
+
+"""
+
+# python imports
+
+import os
+
+import numpy as np
+import pytest
+
+from addon import addon_module
+
+psd_table = addon_module('psd_table')
+
+
+def records():
+    return [
+        {'blend': 'a.blend', 'object': 'd01', 'name': 'd01_cs1', 'area': 0.125,
+         'is_valid': True, 'n_traces': 3, 'label': '001', 'location': [1.0, 2.0, 3.5]},
+        {'blend': 'a.blend', 'object': 'd01', 'name': 'd01_cs2', 'area': 1e-7,
+         'is_valid': False, 'n_traces': 12, 'label': '1e3', 'location': [0.1, 0.2, 0.3]},
+    ]
+
+
+def test_to_columns():
+    columns = psd_table.to_columns(records())
+    assert list(columns) == ['blend', 'object', 'name', 'area', 'is_valid', 'n_traces',
+                             'label', 'location_x', 'location_y', 'location_z']
+    assert columns['area'].dtype == np.float64
+    assert columns['is_valid'].dtype == bool
+    assert columns['n_traces'].dtype == np.int64
+    assert columns['location_y'].tolist() == [2.0, 0.2]
+
+
+@pytest.mark.parametrize('ext', ['.csv', '.npz'])
+def test_round_trip(tmp_path, ext):
+    file_name = str(tmp_path / ('contacts' + ext))
+    columns = psd_table.to_columns(records())
+    assert psd_table.write_table(file_name, columns) == 2
+    assert psd_table.write_table(file_name, columns, append=True) == 2
+    table = psd_table.read_table(file_name)
+    assert list(table) == list(columns)
+    for name, column in columns.items():
+        assert psd_table.column_type(table[name]) == psd_table.column_type(column)
+        assert table[name].tolist() == column.tolist()*2
+    assert table['label'].tolist() == ['001', '1e3']*2
+
+
+@pytest.mark.parametrize('ext', ['.csv', '.npz'])
+def test_append_mismatch(tmp_path, ext):
+    file_name = str(tmp_path / ('contacts' + ext))
+    psd_table.write_table(file_name, psd_table.to_columns(records()))
+    other = psd_table.to_columns([{'name': 'd01_cs3'}])
+    with pytest.raises(ValueError):
+        psd_table.write_table(file_name, other, append=True)
+
+
+@pytest.mark.parametrize('ext', ['.csv', '.npz'])
+def test_append_type_mismatch(tmp_path, ext):
+    file_name = str(tmp_path / ('contacts' + ext))
+    psd_table.write_table(file_name, psd_table.to_columns(records()))
+    other = records()
+    for record in other:
+        record['n_traces'] = float(record['n_traces'])
+    with pytest.raises(ValueError):
+        psd_table.write_table(file_name, psd_table.to_columns(other), append=True)
+
+
+def test_csv_without_types(tmp_path):
+    file_name = str(tmp_path / 'contacts.csv')
+    columns = psd_table.to_columns(records())
+    psd_table.write_table(file_name, columns)
+    os.remove(psd_table.types_file_name(file_name))
+    # Without its sidecar a CSV is only text, and typed rows are not mixed in
+    table = psd_table.read_table(file_name)
+    assert table['n_traces'].tolist() == ['3', '12']
+    with pytest.raises(ValueError):
+        psd_table.write_table(file_name, columns, append=True)
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        psd_table.table_format('contacts.txt')
@@ -0,0 +1,116 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""
+This file contains checks of the contact part names, of the remembered
+name matches and of the cache of MCell region face sets.
+
+"""
+
+# python imports
+
+import types
+
+import numpy as np
+
+from addon import addon_module
+
+pattern_registry = addon_module('pattern_registry')
+mesh_arrays = addon_module('mesh_arrays')
+
+
+def contact_pattern():
+    patterns = types.SimpleNamespace(base_name_1_pattern='d##_', contact_name_pattern='cs#',
+                                     base_name_2_pattern='_a##')
+    return types.SimpleNamespace(
+        contact_name_pattern=patterns.contact_name_pattern,
+        base_name_1_regex=pattern_registry.pattern_regex(patterns.base_name_1_pattern),
+        contact_name_regex=pattern_registry.pattern_regex(patterns.contact_name_pattern),
+        base_name_2_regex=pattern_registry.pattern_regex(patterns.base_name_2_pattern))
+
+
+def test_contact_part_names():
+    pattern = contact_pattern()
+    assert pattern_registry.contact_part_name(pattern, 'd01_cs3_a12', 'sph') == 'd01_sph3_a12'
+    assert pattern_registry.contact_part_name(pattern, 'd01_cs3_a12', 'sp') == 'd01_sp3_a12'
+    assert pattern_registry.contact_part_name(pattern, 'd01_cs3_a12', 'spn') == 'd01_spn3_a12'
+    assert pattern_registry.contact_part_name(pattern, 'd01_sph3_a12', 'spn') is None
+
+
+class Region:
+    """ Stand-in for a CellBlender region storing its faces in the mesh ID
+        properties, counting how often they are decoded """
+
+    def __init__(self, name, reg_id, mesh, faces):
+        self.name = name
+        self.id = reg_id
+        self.n_decoded = 0
+        self.set_region_faces(mesh, faces)
+
+    def get_region_faces(self, mesh):
+        self.n_decoded += 1
+        return set(mesh['mcell']['regions'][str(self.id)])
+
+    def set_region_faces(self, mesh, faces):
+        mesh['mcell']['regions'][str(self.id)] = sorted(faces)
+
+
+class Mesh(dict):
+    def __init__(self, n_faces):
+        super().__init__(mcell={'regions': {}})
+        self.name = 'mesh'
+        self.polygons = range(n_faces)
+        self.is_editmode = False
+
+
+def test_region_face_cache():
+    mesh_arrays.clear_region_faces()
+    m = Mesh(10)
+    reg = Region('head', 1, m, {1, 2, 3})
+    assert mesh_arrays.get_region_faces(reg, m).tolist() == [1, 2, 3]
+    assert mesh_arrays.get_region_faces(reg, m).tolist() == [1, 2, 3]
+    assert reg.n_decoded == 1
+
+    # Faces written directly, as the CellBlender operators do
+    reg.set_region_faces(m, {4, 5})
+    assert mesh_arrays.get_region_faces(reg, m).tolist() == [4, 5]
+    assert reg.n_decoded == 2
+
+    # A region deleted and added again under the same name
+    del m['mcell']['regions']['1']
+    reg = Region('head', 2, m, {7})
+    assert mesh_arrays.get_region_faces(reg, m).tolist() == [7]
+
+    mesh_arrays.set_region_faces(reg, m, np.array([8, 9]))
+    assert mesh_arrays.get_region_faces(reg, m).tolist() == [8, 9]
+    assert reg.n_decoded == 1
+    mesh_arrays.clear_region_faces()
+
+
+def test_match_cache_bounded():
+    pattern_registry.forget()
+    names = ['d01_cs%d_a12' % (i) for i in range(10)]
+    assert pattern_registry.match_flags('d01_cs[0-4]_a12', names) == [i < 5 for i in range(10)]
+    for i in range(pattern_registry.MAX_REGEXES + 10):
+        pattern_registry.match_flags('d01_cs%d.*' % (i), names)
+    assert len(pattern_registry._matches) == pattern_registry.MAX_REGEXES
+    # The least recently used regexes were dropped, the latest kept
+    assert 'd01_cs[0-4]_a12' not in pattern_registry._matches
+    assert 'd01_cs%d.*' % (pattern_registry.MAX_REGEXES + 9) in pattern_registry._matches
+    pattern_registry.forget()
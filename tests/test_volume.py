@@ -0,0 +1,110 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""
+This file contains checks of the NumPy volume engine against analytic
+volumes of spheres and tori.
+
+"""
+
+# python imports
+
+import numpy as np
+import pytest
+
+from addon import addon_module, benchmark, core
+
+volume = addon_module('core.volume')
+
+
+def mesh_volume(verts, tris):
+    return volume.signed_volumes(verts[tris], np.zeros(3)).sum()
+
+
+def test_convex_hull_contains_points():
+    rng = np.random.default_rng(0)
+    points = rng.normal(size=(2000, 3))
+    faces, normals, offsets = core.convex_hull(points)
+    assert (points @ normals.T - offsets).max() < 1e-9
+    # A closed triangulated surface has F = 2V - 4
+    assert len(faces) == 2*len(np.unique(faces)) - 4
+
+
+def test_convex_hull_sphere_points():
+    rng = np.random.default_rng(1)
+    points = rng.normal(size=(3000, 3))
+    points /= np.linalg.norm(points, axis=1)[:, None]
+    faces, normals, offsets = core.convex_hull(points)
+    assert len(np.unique(faces)) == len(points)
+
+
+def test_convex_hull_coplanar():
+    points = np.random.default_rng(2).uniform(size=(50, 3))
+    points[:, 2] = 0.0
+    assert core.convex_hull(points) is None
+
+
+def test_flat_hull_volume():
+    # A flat PSD spans no volume, which is reported as a failure and not 0
+    verts, tris = benchmark.sphere_mesh(np.zeros(3), 1.0, 16)
+    ring = np.isclose(verts[:, 2], verts[len(verts)//2, 2])
+    flat = verts[ring]
+    assert len(flat) >= 4
+    assert core.hull_intersection_volume(verts, tris, flat) is None
+
+
+def test_sphere_volume():
+    verts, tris = benchmark.sphere_mesh(np.array([1.0, 2.0, 3.0]), 1.0, 32)
+    vol = core.hull_intersection_volume(verts, tris, verts)
+    assert vol == pytest.approx(mesh_volume(verts, tris), rel=1e-9)
+    assert vol == pytest.approx(4.0/3.0*np.pi, rel=1e-2)
+
+
+def test_hemisphere_volume():
+    verts, tris = benchmark.sphere_mesh(np.zeros(3), 1.0, 32)
+    hull_points = verts[verts[:, 2] >= 0.0]
+    vol = core.hull_intersection_volume(verts, tris, hull_points, offset=0.0)
+    assert vol == pytest.approx(2.0/3.0*np.pi, rel=1e-2)
+
+
+def test_torus_volume():
+    verts, tris = benchmark.torus_mesh(np.zeros(3), 1.0, 0.3, 16)
+    vol = core.hull_intersection_volume(verts, tris, verts)
+    assert vol == pytest.approx(mesh_volume(verts, tris), rel=1e-9)
+    assert vol == pytest.approx(2.0*np.pi**2*1.0*0.3**2, rel=1e-2)
+
+
+def test_half_torus_volume():
+    verts, tris = benchmark.torus_mesh(np.zeros(3), 1.0, 0.3, 16)
+    hull_points = verts[verts[:, 1] >= 0.0]
+    vol = core.hull_intersection_volume(verts, tris, hull_points, offset=0.0)
+    assert vol == pytest.approx(np.pi**2*1.0*0.3**2, rel=1e-2)
+
+
+def test_largest_piece():
+    # A slab across the hole of the torus cuts two separate pieces of tube
+    verts, tris = benchmark.torus_mesh(np.zeros(3), 1.0, 0.3, 16)
+    hull_points = np.array([[x, y, z] for x in (-2.0, 2.0) for y in (-0.1, 0.1) for z in (-1.0, 1.0)])
+    vol = core.hull_intersection_volume(verts, tris, hull_points, offset=0.0)
+    assert vol == pytest.approx(np.pi*0.3**2*0.2, rel=2e-2)
+
+
+def test_unclosed_cap():
+    points = np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [2.0, 0.0, 0.0]])
+    assert volume.close_cap(points, np.array([True, False, True]), np.array([1.0, 0.0, 0.0])) is None